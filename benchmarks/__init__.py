@@ -0,0 +1,3 @@
+"""
+Benchmarks and stress tools for EVSU-OC IGP Sales Record System
+"""
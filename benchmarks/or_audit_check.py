@@ -0,0 +1,56 @@
+"""
+OR Audit Check
+Records receipts from a few booklets and from unrelated plain-number series, and
+checks the OR audit reports exactly the numbers really skipped within a booklet
+
+Usage:
+    python -m benchmarks.or_audit_check
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+# OR numbers recorded, one receipt each
+OR_NUMBERS = [
+    "A-000100", "A-000101", "A-000102", "A-000104", "A-000105",   # 103 skipped
+    "0012340", "0012342",                                          # 12341 skipped
+    "123", "09999", "122345575", "1234567890",                     # unrelated series
+    "B-1", "B-500",                                                # next booklet of B-, not a gap
+]
+EXPECTED_GAPS = [("", 12341, 12341), ("A-", 103, 103)]
+
+
+def main():
+    today = date.today().isoformat()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "or_audit.db"))
+        db.add_product("Audit Lace", "N/A", 1000, 45.0, "1")
+        for i, or_number in enumerate(OR_NUMBERS):
+            db.add_transaction(f"Buyer {i}", "Audit Lace", "N/A", 1, 45.0, or_number, today)
+        audit = db.get_or_number_audit(today, today)
+        db.close()
+
+    failures = []
+    if audit['gaps'] != EXPECTED_GAPS:
+        failures.append(f"gaps {audit['gaps']}, expected {EXPECTED_GAPS}")
+    if audit['duplicates']:
+        failures.append(f"duplicates {audit['duplicates']}, expected none")
+    if audit['receipts'] != len(OR_NUMBERS):
+        failures.append(f"{audit['receipts']} receipts counted, expected {len(OR_NUMBERS)}")
+
+    print(f"Booklet size: {db.or_booklet_size}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: only numbers skipped within a booklet are reported as gaps")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Report Consistency Check
+Records, edits and deletes sales from a separate process while reports are
+generated over and over, and checks every report's totals equal the sum of its own
+detail rows, that no sale is listed twice, and that multi-year reports list every
+older sale exactly once while the writer moves them between months
+
+Usage:
+    python -m benchmarks.report_consistency --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.report_engine import ReportEngine
+
+PRODUCTS = [("Consistency Polo", "M", 120.0), ("Consistency Lace", "N/A", 45.0)]
+SEEDED_SALES = 300
+
+
+def random_date(rng, first, last):
+    """Random YYYY-MM-DD between two dates (inclusive)"""
+    return (first + timedelta(days=rng.randint(0, (last - first).days))).isoformat()
+
+
+def writer(db_path, first, seeded, stop, counters):
+    """
+    Until told to stop, in turn: record a sale dated today, move a seeded sale to
+    another month (update_transaction), and delete one of the sales it recorded
+    """
+    db = DatabaseManager(db_path)
+    rng = random.Random(1)
+    today = date.today()
+    recorded = []
+    i = 0
+    while not stop.is_set():
+        step = i % 3
+        if step == 0:
+            product, size, price = PRODUCTS[i % len(PRODUCTS)]
+            quantity = i % 3 + 1
+            if db.add_transaction(f"Buyer {i}", product, size, quantity, quantity * price, f"OR-{i}", today.isoformat()):
+                conn = db.get_connection()
+                recorded.append(conn.execute("SELECT MAX(transaction_id) FROM sales").fetchone()[0])
+                conn.close()
+                name = 'recorded'
+        elif step == 1:
+            transaction_id, buyer_name, product, size, quantity, amount, or_number = rng.choice(seeded)
+            success, _ = db.update_transaction(transaction_id, buyer_name, product, size, quantity, amount,
+                                               or_number, random_date(rng, first, today))
+            name = 'moved' if success else None
+        else:
+            name = 'deleted' if recorded and db.delete_transaction(recorded.pop(0)) else None
+        if name:
+            with counters[name].get_lock():
+                counters[name].value += 1
+        i += 1
+
+
+def check(report, seeded_ids=None):
+    """
+    Problems found in one report (empty if consistent)
+
+    Args:
+        seeded_ids (set): Sales the report must list exactly once (it covers all their dates)
+    """
+    rows = report['transactions']
+    ids = [row[0] for row in rows]
+    problems = []
+    if len(set(ids)) != len(ids):
+        problems.append(f"{len(ids) - len(set(ids))} sale(s) listed twice")
+    if seeded_ids is not None and not seeded_ids <= set(ids):
+        problems.append(f"{len(seeded_ids - set(ids))} older sale(s) missing")
+    if report['total_transactions'] != len(rows):
+        problems.append(f"{report['total_transactions']} transactions in totals, {len(rows)} rows listed")
+    if report['total_items_sold'] != sum(row[5] for row in rows):
+        problems.append(f"{report['total_items_sold']} items in totals, {sum(row[5] for row in rows)} in rows")
+    if round(report['total_revenue'], 2) != round(sum(row[6] for row in rows), 2):
+        problems.append(f"revenue {report['total_revenue']:.2f} in totals, {sum(row[6] for row in rows):.2f} in rows")
+    if sum(row[2] for row in report['product_summary']) != sum(row[5] for row in rows):
+        problems.append("product summary quantities differ from rows")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check reports stay consistent while sales are recorded")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    today = date.today()
+    first = date(today.year - 2, 1, 1)
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "consistency.db")
+        db = DatabaseManager(db_path)
+        for product, size, price in PRODUCTS:
+            db.add_product(product, size, 10000000, price, "1")
+
+        # Older sales spread over the multi-year range; the writer moves them between months
+        for i in range(SEEDED_SALES):
+            product, size, price = PRODUCTS[i % len(PRODUCTS)]
+            db.add_transaction(f"Seeded {i}", product, size, 1, price, f"SEED-{i}", random_date(rng, first, today))
+        seeded = [row[:7] for row in db.get_all_transactions()]
+        seeded_ids = {row[0] for row in seeded}
+
+        stop = multiprocessing.Event()
+        counters = {name: multiprocessing.Value('i', 0) for name in ('recorded', 'moved', 'deleted')}
+        process = multiprocessing.Process(target=writer, args=(db_path, first, seeded, stop, counters))
+        process.start()
+
+        engine = ReportEngine(db_path, workers=1)
+        reports = {
+            "monthly": (lambda: db.get_monthly_report(today.year, today.month), None),
+            "date range": (lambda: db.get_date_range_report(today.isoformat(), today.isoformat()), None),
+            "multi-year": (lambda: db.get_date_range_report(first.isoformat(), today.isoformat()), seeded_ids),
+            "partitioned, one snapshot": (lambda: engine.date_range_report(first.isoformat(), today.isoformat()), seeded_ids),
+        }
+        runs = {name: 0 for name in reports}
+        failures = []
+        deadline = time.perf_counter() + args.seconds
+        while time.perf_counter() < deadline:
+            for name, (run, expected) in reports.items():
+                runs[name] += 1
+                for problem in check(run(), expected):
+                    failures.append(f"{name}: {problem}")
+
+        stop.set()
+        process.join()
+
+    print("During the check: " + ", ".join(f"{counter.value:,} sales {name}" for name, counter in counters.items()))
+    for name, count in runs.items():
+        print(f"  {name:<26} {count:>6,} reports")
+    for failure in failures[:20]:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: every report's totals match its detail rows and list each sale once")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Parallel Report Scaling Benchmark
+Times a five-year date range report on a synthetic database: the single-connection
+queries against the monthly-partitioned ReportEngine at several worker counts,
+and checks every run returns the same report
+
+Usage:
+    python -m benchmarks.report_scaling --rows 2000000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from database.report_engine import ReportEngine
+
+PRODUCTS = [
+    ("PE Uniform", ("Small", "Medium", "Large", "X-Large"), 350.0),
+    ("Uniform (Female)", ("Small", "Medium", "Large"), 450.0),
+    ("Uniform (Male)", ("Small", "Medium", "Large"), 450.0),
+    ("ID Lace", ("N/A",), 50.0),
+    ("Test Booklet", ("N/A",), 15.0),
+    ("Text Books", ("N/A",), 250.0),
+]
+COURSES = ["BSIT", "BSEd", "BEEd", "BSHM", "BSCE", "BSME", ""]
+
+
+def build_database(db_path, rows, start, days, seed=1):
+    """Fill the sales table with `rows` random sales spread over `days` days"""
+    db = DatabaseManager(db_path)
+    rng = random.Random(seed)
+    conn = db.get_connection()
+    for product, sizes, _ in PRODUCTS:
+        conn.execute("INSERT INTO products (name) VALUES (?)", (product,))
+        conn.executemany("INSERT OR IGNORE INTO sizes (label) VALUES (?)", [(size,) for size in sizes])
+    product_ids = dict(conn.execute("SELECT name, product_id FROM products"))
+    size_ids = dict(conn.execute("SELECT label, size_id FROM sizes"))
+    chunk = []
+    for i in range(rows):
+        product, sizes, price = rng.choice(PRODUCTS)
+        quantity = rng.randint(1, 3)
+        sale_date = (start + timedelta(days=rng.randrange(days))).isoformat()
+        chunk.append((f"Buyer {rng.randrange(20000)}", rng.choice(COURSES), product_ids[product], size_ids[rng.choice(sizes)],
+                      quantity, quantity * price, f"OR-{i}", sale_date))
+        if len(chunk) == 50000:
+            conn.executemany('''
+                INSERT INTO sales (buyer_name, program_course, product_id, size_id, quantity, amount, or_number, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', chunk)
+            chunk = []
+    if chunk:
+        conn.executemany('''
+            INSERT INTO sales (buyer_name, program_course, product_id, size_id, quantity, amount, or_number, date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', chunk)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return db
+
+
+def same_report(a, b):
+    """Reports match (revenue compared to the centavo, since partial sums round differently)"""
+    return (a['total_transactions'] == b['total_transactions']
+            and a['total_items_sold'] == b['total_items_sold']
+            and round(a['total_revenue'], 2) == round(b['total_revenue'], 2)
+            and a['transactions'] == b['transactions']
+            and [row[:3] for row in a['product_summary']] == [row[:3] for row in b['product_summary']])
+
+
+def timed(run, repeat):
+    best = result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel date range report scaling")
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = date(2020, 1, 1)
+    days = 365 * args.years
+    start_date, end_date = start.isoformat(), (start + timedelta(days=days - 1)).isoformat()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "reports.db")
+        print(f"Building {args.rows:,} synthetic sales over {args.years} years...")
+        build_start = time.perf_counter()
+        db = build_database(db_path, args.rows, start, days)
+        print(f"  built in {time.perf_counter() - build_start:.1f}s "
+              f"({os.path.getsize(db_path) / 1024 / 1024:,.0f} MB, {os.cpu_count()} CPUs)")
+
+        baseline, expected = timed(lambda: db.get_date_range_report(start_date, end_date, workers=1), args.repeat)
+        print(f"\n{'Engine':<28} {'Time':>9} {'Speedup':>8}")
+        print(f"{'single connection':<28} {baseline:>8.2f}s {1:>7.2f}x")
+
+        ok = True
+        pool = "processes" if args.processes else "threads"
+        for workers in args.workers:
+            engine = ReportEngine(db_path, workers, use_processes=args.processes)
+            elapsed, report = timed(lambda: engine.date_range_report(start_date, end_date), args.repeat)
+            match = same_report(report, expected)
+            ok &= match
+            print(f"{f'partitioned, {workers} {pool}':<28} {elapsed:>8.2f}s {baseline / elapsed:>7.2f}x"
+                  f"{'' if match else '  MISMATCH'}")
+
+    print("\nOK: partitioned reports match" if ok else "\nFAIL: partitioned report differs")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
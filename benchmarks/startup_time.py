@@ -0,0 +1,81 @@
+"""
+Startup Time Benchmark
+Compares how long the headless CLI takes to become ready against the GUI
+
+The CLI is timed running a real command (`check`) on a scratch copy of the
+database. The GUI is timed importing main.py (tkinter, tkcalendar and all four
+screens) and, when a display is available, building the main window.
+
+Usage:
+    python -m benchmarks.startup_time --runs 5
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUI_SNIPPET = """
+import os, main
+if os.environ.get('DISPLAY') or os.name == 'nt':
+    app = main.MainApplication()
+    app.update()
+    app.destroy()
+"""
+
+NO_TK_SNIPPET = "import sys, cli; print('tkinter' in sys.modules or 'tkcalendar' in sys.modules)"
+
+
+def time_command(command, runs):
+    """Run a command `runs` times; return sorted wall times, or None if it fails"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            print(f"  failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}")
+            return None
+        times.append(elapsed)
+    return sorted(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI vs GUI startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = os.path.join(tmp, "igp_sales.db")
+        source = os.path.join(BASE_DIR, "database", "igp_sales.db")
+        if os.path.exists(source):
+            shutil.copy(source, db_copy)
+
+        print("CLI (python -m cli check):")
+        cli_times = time_command([sys.executable, "-m", "cli", "--db", db_copy, "check"], args.runs)
+
+    print("GUI (import main + build window):")
+    gui_times = time_command([sys.executable, "-c", GUI_SNIPPET], args.runs)
+
+    loads_tk = subprocess.run([sys.executable, "-c", NO_TK_SNIPPET], cwd=BASE_DIR,
+                              capture_output=True, text=True).stdout.strip()
+
+    if cli_times:
+        print(f"  CLI median: {statistics.median(cli_times) * 1000:.0f} ms")
+    if gui_times:
+        print(f"  GUI median: {statistics.median(gui_times) * 1000:.0f} ms")
+    if cli_times and gui_times:
+        print(f"  CLI is ready in {statistics.median(cli_times) / statistics.median(gui_times):.0%} of the GUI launch time")
+    print(f"CLI imports tkinter/tkcalendar: {loads_tk}")
+
+    sys.exit(0 if cli_times and loads_tk == "False" else 1)
+
+
+if __name__ == "__main__":
+    main()
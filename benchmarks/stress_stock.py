@@ -0,0 +1,113 @@
+"""
+Concurrent Stock Stress Test
+Hammers one inventory item from several processes and checks that stock never
+goes negative and that no sale or restock is lost
+
+Usage:
+    python -m benchmarks.stress_stock --processes 4 --ops 300
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+PRODUCT = "Stress Polo"
+SIZE = "M"
+
+
+def worker(args):
+    """Run a random mix of sales and restocks; return what actually succeeded"""
+    db_path, ops, seed = args
+    rng = random.Random(seed)
+    db = DatabaseManager(db_path)
+
+    sold = restocked = rejected = 0
+    for i in range(ops):
+        qty = rng.randint(1, 3)
+        if rng.random() < 0.75:
+            if db.add_transaction(f"Buyer {seed}-{i}", PRODUCT, SIZE, qty, qty * 100.0, f"OR-{seed}-{i}", "2024-06-01"):
+                sold += qty
+            else:
+                rejected += 1
+        else:
+            if db.update_stock(PRODUCT, SIZE, qty):
+                restocked += qty
+            else:
+                rejected += 1
+    return sold, restocked, rejected
+
+
+def run(processes, ops, initial_stock, batches):
+    """Run the stress test on a scratch database and verify the invariants"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stress.db")
+        db = DatabaseManager(db_path)
+        per_batch = initial_stock // batches
+        for batch in range(1, batches + 1):
+            db.add_product(PRODUCT, SIZE, per_batch, 100.0, str(batch))
+        initial_stock = per_batch * batches
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(worker, [(db_path, ops, seed) for seed in range(processes)])
+        elapsed = time.perf_counter() - start
+
+        sold = sum(r[0] for r in results)
+        restocked = sum(r[1] for r in results)
+        rejected = sum(r[2] for r in results)
+
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(SUM(stock), 0), MIN(stock) FROM inventory WHERE product_name = ? AND size = ?", (PRODUCT, SIZE))
+        final_stock, min_stock = cursor.fetchone()
+        cursor.execute("SELECT COALESCE(SUM(quantity), 0) FROM transactions")
+        recorded_sales = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(SUM(quantity), 0) FROM transaction_allocations")
+        allocated = cursor.fetchone()[0]
+        conn.close()
+
+    total_ops = processes * ops
+    print(f"Processes: {processes}  Ops/process: {ops}  Batches: {batches}")
+    print(f"Initial stock: {initial_stock}  Sold: {sold}  Restocked: {restocked}  Rejected: {rejected}")
+    print(f"Final stock: {final_stock}  (lowest batch: {min_stock})")
+    print(f"Throughput: {total_ops / elapsed:,.0f} ops/s over {elapsed:.2f}s")
+
+    errors = []
+    if min_stock is None or min_stock < 0:
+        errors.append(f"negative stock in a batch: {min_stock}")
+    if final_stock != initial_stock - sold + restocked:
+        errors.append(f"lost update: expected {initial_stock - sold + restocked}, found {final_stock}")
+    if recorded_sales != sold:
+        errors.append(f"transactions record {recorded_sales} items but workers sold {sold}")
+    if allocated != sold:
+        errors.append(f"batch allocations record {allocated} items but workers sold {sold}")
+
+    for error in errors:
+        print(f"FAIL: {error}")
+    if not errors:
+        print("OK: no negative stock, no lost updates")
+    return not errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent stock update stress test")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=300, help="operations per process")
+    parser.add_argument("--stock", type=int, default=500, help="initial stock across all batches")
+    parser.add_argument("--batches", type=int, default=3)
+    args = parser.parse_args()
+
+    ok = run(args.processes, args.ops, args.stock, args.batches)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+End-to-End Benchmark Suite
+Times every public DatabaseManager method and the data preparation behind each
+screen on synthetic databases of 10k, 100k and 1M sales, writes the timings as
+JSON, and fails when anything got slower than a saved baseline
+
+Usage:
+    python -m benchmarks.suite --sizes 10000 100000 -o results.json
+    python -m benchmarks.suite --baseline results.json --threshold 0.25
+"""
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic
+from cli import format_report_text, format_course_breakdown
+from database.analytics import SalesCube
+from database.db_manager import DatabaseManager
+from database.live_sales import LiveSales
+from database.logbook_import import LogbookImporter
+from database.sale_service import Sale, SaleService
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+# Differences below this many seconds are timer noise, never a regression
+NOISE_FLOOR = 0.002
+
+
+class Benchmark:
+    """One timed operation; `setup` runs untimed before each repetition"""
+
+    def __init__(self, name, run, setup=None, covers=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.covers = covers or []
+
+
+def collect(db, scratch):
+    """All benchmarks for one database"""
+    today = date.today()
+    conn = db.get_connection()
+    first, last = conn.execute("SELECT MIN(date), MAX(date) FROM transactions").fetchone()
+    product, size, item_id = conn.execute(
+        "SELECT product_name, size, item_id FROM inventory ORDER BY item_id LIMIT 1").fetchone()
+    sample_buyer, sample_or, sample_sale = conn.execute(
+        "SELECT buyer_name, or_number, transaction_id FROM transactions ORDER BY transaction_id DESC LIMIT 1").fetchone()
+    pairs = conn.execute("SELECT DISTINCT product_name, size FROM inventory").fetchall()
+    # A routine delivery: 24 size/batch lines, a few batches twice
+    batch_ids = [row[0] for row in conn.execute("SELECT item_id FROM inventory ORDER BY item_id LIMIT 20")]
+    delivery = [(batch_ids[i % len(batch_ids)], 10) for i in range(24)]
+    # A supplier spreadsheet: existing batches, so repeated runs update instead of growing inventory
+    stock_count = [(name, sz, batch, 100, price) for name, sz, batch, price in conn.execute(
+        "SELECT product_name, size, batch, price FROM inventory")] * 80
+    stock_count = stock_count[:2000]
+    # Past sales as a logbook import writes them, and logbook rows as typed by hand
+    past_sales = [(f"Logbook Buyer {i}", "BSIT", product, size, 1, 10.0, f"LB-{i}", first) for i in range(1000)]
+    logbook_rows = [{'date': f"{(i % 12) + 1}/{(i % 28) + 1}/2019", 'buyer_name': f" logbook  buyer {i % 500} ",
+                     'program_course': "BSIT", 'product_name': product.lower(), 'size': size, 'quantity': "1",
+                     'amount': "P 1,250", 'or_number': f"{100000 + i}"} for i in range(10000)]
+    code = "BENCH-1"
+    conn.execute("UPDATE inventory_batches SET code = ? WHERE item_id = ?", (code, item_id))
+    conn.commit()
+    conn.close()
+    service = SaleService(db)
+    service.reload_codes()
+    month_start = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+    year_ago = (today - timedelta(days=365)).isoformat()
+    buyer_prefix = sample_buyer.split()[0]
+    state = {}
+
+    # Scratch rows for the write benchmarks, so the sales history itself stays intact
+    def new_sale():
+        db.update_stock(item_id=item_id, quantity_change=1)
+        db.add_transaction("Bench Buyer", product, size, 1, 1.0, "BENCH", today.isoformat(), item_id=item_id)
+        state['sale'] = db.get_connection().execute("SELECT MAX(transaction_id) FROM transactions").fetchone()[0]
+
+    def new_product():
+        # One bench batch at a time: product, size and batch are a unique key
+        if state.get('item'):
+            db.delete_product(state['item'])
+        db.add_product("Bench Item", "N/A", 5, 1.0, "1")
+        state['item'] = db.get_connection().execute("SELECT MAX(item_id) FROM inventory").fetchone()[0]
+
+    def restock_for_sale():
+        db.update_stock(item_id=item_id, quantity_change=1)
+
+    def restock_receipt():
+        db.update_stock(item_id=item_id, quantity_change=3)
+
+    # Mirrors HistoryModule.load_all_transactions without the Treeview
+    def history_rows():
+        rows = []
+        for trans_id, buyer, prod, sz, qty, amount, or_num, sale_date, batch in db.get_all_transactions():
+            rows.append((trans_id, buyer, prod, batch or '', sz, qty, f"₱{amount:,.2f}", or_num, sale_date))
+        return rows
+
+    # Mirrors InventoryModule.load_inventory without the Treeview
+    def inventory_rows():
+        forecast = db.get_stock_forecast()
+        return [(row, forecast.get((row[1], row[2]))) for row in db.get_all_inventory()]
+
+    # Mirrors TransactionModule picking a product and size
+    def transaction_lookups():
+        for name in db.get_unique_products():
+            for sz in db.get_sizes_for_product(name):
+                db.get_first_available_batch_for_size(name, sz)
+                db.get_available_stock(name, sz)
+
+    def normalize_logbook():
+        importer = LogbookImporter(db)
+        for row in logbook_rows:
+            importer.normalize(row)
+
+    return [
+        # Inventory
+        Benchmark("get_all_inventory", db.get_all_inventory),
+        Benchmark("get_unique_products", db.get_unique_products),
+        Benchmark("get_sizes_for_product", lambda: db.get_sizes_for_product(product)),
+        Benchmark("get_product_by_name_size", lambda: db.get_product_by_name_size(product, size)),
+        Benchmark("get_available_stock", lambda: db.get_available_stock(product, size)),
+        Benchmark("get_available_stocks", lambda: db.get_available_stocks(pairs)),
+        Benchmark("get_product_codes", db.get_product_codes),
+        Benchmark("normalize_code", lambda: db.normalize_code(" pe-m2 ")),
+        Benchmark("get_first_available_batch_for_size", lambda: db.get_first_available_batch_for_size(product, size)),
+        Benchmark("quote_split (backdated)", lambda: db.quote_split(product, size, 5, as_of=first)),
+        Benchmark("add_product", new_product),
+        Benchmark("update_product", lambda: db.update_product(state['item'], "Bench Item", "N/A", 7, 1.0, "1"),
+                  setup=new_product),
+        Benchmark("delete_product", lambda: db.delete_product(state['item']), setup=new_product),
+        Benchmark("update_stock", lambda: db.update_stock(item_id=item_id, quantity_change=1)),
+        # Bulk inventory
+        Benchmark("get_product_batches", lambda: db.get_product_batches(product)),
+        Benchmark("preview_restock (24 lines)", lambda: db.preview_restock(delivery), covers=["preview_restock"]),
+        Benchmark("restock_batches (24 lines)", lambda: db.restock_batches(delivery), covers=["restock_batches"]),
+        Benchmark("preview_price_change", lambda: db.preview_price_change(product, 10)),
+        Benchmark("change_prices", lambda: db.change_prices(product, 0)),
+        Benchmark("preview_retire_batch", lambda: db.preview_retire_batch(product, "1")),
+        Benchmark("retire_batch", lambda: db.retire_batch("Bench Item", "1"), setup=new_product),
+        Benchmark("upsert_inventory (2,000 lines)", lambda: db.upsert_inventory(stock_count, add_stock=False),
+                  covers=["upsert_inventory"]),
+        # Buyers
+        Benchmark("get_buyer_suggestions", lambda: db.get_buyer_suggestions(buyer_prefix[:2])),
+        Benchmark("normalize_buyer_name", lambda: db.normalize_buyer_name("  Juan  Dela Cruz ")),
+        Benchmark("find_similar_buyers", lambda: db.find_similar_buyers(sample_buyer.replace(" ", "").lower())),
+        Benchmark("rebuild_buyers", db.rebuild_buyers),
+        # OR numbers
+        Benchmark("split_or_number", lambda: db.split_or_number(" a-000123 ")),
+        Benchmark("find_or_number_uses", lambda: db.find_or_number_uses(sample_or)),
+        Benchmark("get_or_number_audit (last year)", lambda: db.get_or_number_audit(year_ago, today.isoformat())),
+        Benchmark("rebuild_or_numbers", db.rebuild_or_numbers),
+        # Price history
+        Benchmark("get_price_history", lambda: db.get_price_history(item_id)),
+        Benchmark("get_price_as_of", lambda: db.get_price_as_of(item_id, first)),
+        Benchmark("get_product_price_as_of", lambda: db.get_product_price_as_of(product, size, first)),
+        Benchmark("get_sale_price", lambda: db.get_sale_price(sample_sale)),
+        Benchmark("get_price_variance (last year)", lambda: db.get_price_variance(year_ago, today.isoformat())),
+        # Historical import
+        Benchmark("add_historical_sales (1,000 sales)", lambda: db.add_historical_sales(past_sales),
+                  covers=["add_historical_sales"]),
+        Benchmark("suspend_indexes + restore_indexes", lambda: db.restore_indexes(db.suspend_indexes()),
+                  covers=["restore_indexes"]),
+        Benchmark("logbook_import: normalize 10,000 rows", normalize_logbook),
+        # Sales
+        Benchmark("add_transaction", lambda: db.add_transaction(
+            "Bench Buyer", product, size, 1, 1.0, "BENCH", today.isoformat(), item_id=item_id), setup=restock_for_sale),
+        Benchmark("add_receipt (3 items)", lambda: db.add_receipt(
+            "Bench Buyer", "BENCH", [(product, size, 1, 1.0, item_id)] * 3, today.isoformat()), setup=restock_receipt),
+        Benchmark("update_transaction", lambda: db.update_transaction(
+            state['sale'], "Bench Buyer", product, size, 1, 2.0, "BENCH", today.isoformat()), setup=new_sale),
+        Benchmark("delete_transaction", lambda: db.delete_transaction(state['sale']), setup=new_sale),
+        Benchmark("get_all_transactions", db.get_all_transactions),
+        Benchmark("export_transactions", db.export_transactions),
+        Benchmark("search_transactions (buyer prefix)", lambda: db.search_transactions(buyer_name=buyer_prefix),
+                  covers=["search_transactions"]),
+        Benchmark("search_transactions (fuzzy buyer)", lambda: db.search_transactions(
+            buyer_name=sample_buyer.replace(" ", "").lower(), fuzzy_buyer=True)),
+        Benchmark("search_transactions (last year)", lambda: db.search_transactions(start_date=year_ago)),
+        # Reports
+        Benchmark("get_monthly_report", lambda: db.get_monthly_report(month_start.year, month_start.month)),
+        Benchmark("get_date_range_report (all, 1 worker)", lambda: db.get_date_range_report(first, last, workers=1),
+                  covers=["get_date_range_report"]),
+        Benchmark("get_date_range_report (all, partitioned)", lambda: db.get_date_range_report(first, last, workers=None)),
+        Benchmark("get_course_breakdown", lambda: db.get_course_breakdown(year_ago, today.isoformat())),
+        Benchmark("get_stock_forecast", db.get_stock_forecast),
+        Benchmark("get_reorder_alerts", db.get_reorder_alerts),
+        Benchmark("get_sales_activity", lambda: db.get_sales_activity(year_ago)),
+        # Maintenance and plumbing
+        Benchmark("rebuild_sales_velocity", db.rebuild_sales_velocity),
+        Benchmark("check_integrity", db.check_integrity),
+        Benchmark("backup_database", lambda: db.backup_database(os.path.join(scratch, "backup.db"))),
+        Benchmark("get_connection", lambda: db.get_connection().close()),
+        Benchmark("get_read_connection", lambda: db.get_read_connection().close()),
+        Benchmark("get_data_version", db.get_data_version),
+        Benchmark("close", db.close),
+        Benchmark("ensure_database_directory", db.ensure_database_directory),
+        Benchmark("initialize_database", db.initialize_database),
+        Benchmark("check_and_update_schema", db.check_and_update_schema),
+        # Screens (data preparation only)
+        Benchmark("transaction_module: product/size lookups", transaction_lookups),
+        Benchmark("transaction_module: product code lookup", lambda: service.lookup_code(code)),
+        Benchmark("transaction_module: duplicate OR check", lambda: service.or_number_warning(
+            Sale("Bench Buyer", "BENCH", product, size, 1, 1.0, sample_or, today.isoformat()))),
+        Benchmark("inventory_module: rows + forecast", inventory_rows),
+        Benchmark("history_module: rows with batches", history_rows),
+        Benchmark("reports_module: monthly report text", lambda: format_report_text(
+            "Monthly", db.get_monthly_report(month_start.year, month_start.month))),
+        Benchmark("reports_module: course breakdown text", lambda: format_course_breakdown(
+            "Courses", db.get_course_breakdown(year_ago, today.isoformat()), "text")),
+        Benchmark("dashboard_module: initial totals", lambda: LiveSales(db).reset()),
+        Benchmark("analytics: load year + product x month pivot", lambda: SalesCube.load(
+            db, year_ago, today.isoformat()).pivot("product", "month")),
+    ]
+
+
+def uncovered(benchmarks):
+    """Public DatabaseManager methods that no benchmark times"""
+    public = {name for name, _ in inspect.getmembers(DatabaseManager, inspect.isfunction) if not name.startswith("_")}
+    covered = set()
+    for bench in benchmarks:
+        covered.add(bench.name.split(" ")[0])
+        covered.update(bench.covers)
+    return sorted(public - covered)
+
+
+def time_benchmark(bench, repeat):
+    """Best wall time of `repeat` runs"""
+    best = None
+    for _ in range(repeat):
+        if bench.setup:
+            bench.setup()
+        start = time.perf_counter()
+        bench.run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_suite(sizes, repeat, only=None):
+    """
+    Generate a database per size and time every benchmark on it
+
+    Returns:
+        dict: JSON-ready {'meta': {...}, 'results': {size: {benchmark: seconds}}}
+    """
+    results = {}
+    missing = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as scratch:
+            db_path = os.path.join(scratch, "bench.db")
+            started = time.perf_counter()
+            db = synthetic.generate(db_path, size)
+            print(f"\n{size:,} sales (generated in {time.perf_counter() - started:.1f}s)")
+
+            benchmarks = collect(db, scratch)
+            missing = uncovered(benchmarks)
+            timings = {}
+            for bench in benchmarks:
+                if only and not any(word in bench.name for word in only):
+                    continue
+                timings[bench.name] = time_benchmark(bench, repeat)
+                print(f"  {bench.name:<48} {timings[bench.name] * 1000:>10.2f} ms")
+            db.close()
+            results[str(size)] = timings
+
+    return {
+        'meta': {
+            'generated': datetime.now().isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'repeat': repeat,
+            'not_benchmarked': missing,
+        },
+        'results': results,
+    }
+
+
+def regressions(current, baseline, threshold):
+    """Benchmarks slower than baseline by more than `threshold` (0.25 = 25%)"""
+    found = []
+    for size, timings in current['results'].items():
+        for name, seconds in timings.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            if seconds > before * (1 + threshold) and seconds - before > NOISE_FLOOR:
+                found.append(f"{name} @ {int(size):,}: {before * 1000:.2f} ms -> {seconds * 1000:.2f} ms "
+                             f"(+{(seconds / before - 1) * 100:.0f}%)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IGP Sales Record System benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="sales per generated database")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (best is kept)")
+    parser.add_argument("--only", nargs="+", help="run only benchmarks whose name contains one of these words")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.repeat, args.only)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    failed = False
+    if results['meta']['not_benchmarked']:
+        print(f"\nFAIL: public methods without a benchmark: {', '.join(results['meta']['not_benchmarked'])}")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.threshold)
+        for line in found:
+            print(f"REGRESSION: {line}")
+        if found:
+            failed = True
+        else:
+            print(f"\nOK: nothing slower than the baseline by more than {args.threshold:.0%}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
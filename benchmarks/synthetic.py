@@ -0,0 +1,156 @@
+"""
+Synthetic Data Generator
+Builds a realistic IGP sales database of any size: the campus product line in
+several sizes and restock batches, and N sales spread over several school years
+with enrollment spikes at the start of each semester
+
+Usage:
+    python -m benchmarks.synthetic --transactions 100000 -o big.db
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+# (product, sizes, price, relative popularity)
+PRODUCTS = [
+    ("PE Uniform", ("Small", "Medium", "Large", "X-Large"), 350.0, 30),
+    ("Uniform (Female)", ("Small", "Medium", "Large", "X-Large"), 450.0, 20),
+    ("Uniform (Male)", ("Small", "Medium", "Large", "X-Large"), 450.0, 20),
+    ("ID Lace", ("N/A",), 50.0, 35),
+    ("Test Booklet", ("N/A",), 15.0, 40),
+    ("Text Books", ("N/A",), 250.0, 10),
+    ("Lab Gown", ("Small", "Medium", "Large"), 400.0, 6),
+    ("Org Shirt", ("Small", "Medium", "Large", "X-Large"), 300.0, 8),
+]
+# Middle sizes sell most
+SIZE_WEIGHTS = {"Small": 3, "Medium": 5, "Large": 4, "X-Large": 2, "N/A": 1}
+
+COURSES = ["BSIT", "BSEd", "BEEd", "BSHM", "BSCE", "BSME", "BSEE", "BSTM", "BSA", ""]
+FIRST_NAMES = ["Juan", "Maria", "Jose", "Ana", "Mark", "Kristine", "John", "Angel", "Paolo", "Jasmine",
+               "Carlo", "Nicole", "Miguel", "Camille", "Rico", "Patricia", "Joshua", "Erika", "Kevin", "Bea"]
+LAST_NAMES = ["Dela Cruz", "Santos", "Reyes", "Garcia", "Mendoza", "Bautista", "Villanueva", "Ramos",
+              "Aquino", "Castillo", "Rivera", "Flores", "Gonzales", "Torres", "Lopez", "Pacquiao", "Cortes"]
+
+# Relative sales volume per month: enrollment in August/January, quiet over the break
+MONTH_WEIGHTS = {1: 8, 2: 4, 3: 3, 4: 2, 5: 1, 6: 3, 7: 5, 8: 12, 9: 8, 10: 4, 11: 3, 12: 2}
+
+CHUNK = 20000
+
+
+def sale_dates(rng, count, start, years):
+    """`count` sale dates over `years` years, following MONTH_WEIGHTS and skipping Sundays"""
+    days = []
+    weights = []
+    day = start
+    end = start + timedelta(days=365 * years)
+    while day < end:
+        if day.weekday() != 6:
+            days.append(day.isoformat())
+            # Busiest in the first two weeks of an enrollment month
+            weights.append(MONTH_WEIGHTS[day.month] * (2 if day.day <= 14 else 1))
+        day += timedelta(days=1)
+    return sorted(rng.choices(days, weights=weights, k=count))
+
+
+def generate(db_path, transactions, years=5, start=None, buyers=20000, seed=1):
+    """
+    Create a database at db_path with a full inventory and `transactions` sales
+
+    Sales run from `start` (default: `years` years ago) for `years` years, so by
+    default the newest sales are from this week, as in a live database.
+
+    Every sale has a matching batch allocation, and sales velocity, the buyer
+    list and the OR number registry are rebuilt, so the result passes
+    check_integrity() like a database built through the app.
+
+    Returns:
+        DatabaseManager: Manager for the new database
+    """
+    rng = random.Random(seed)
+    start = start or date.today() - timedelta(days=365 * years - 1)
+    db = DatabaseManager(db_path)
+    conn = db.get_connection()
+    cursor = conn.cursor()
+
+    size_ids = {}
+    for size in SIZE_WEIGHTS:
+        cursor.execute("INSERT INTO sizes (label) VALUES (?)", (size,))
+        size_ids[size] = cursor.lastrowid
+
+    # Inventory: two to four restock batches per product/size, later batches pricier
+    items = []   # (item_id, product_id, size_id, price, weight)
+    for product, sizes, price, popularity in PRODUCTS:
+        cursor.execute("INSERT INTO products (name) VALUES (?)", (product,))
+        product_id = cursor.lastrowid
+        for size in sizes:
+            for batch in range(1, rng.randint(2, 4) + 1):
+                cursor.execute(
+                    "INSERT INTO inventory_batches (product_id, size_id, batch, stock, price) VALUES (?, ?, ?, ?, ?)",
+                    (product_id, size_ids[size], str(batch), rng.randint(20, 200), price + 25.0 * (batch - 1)))
+                items.append((cursor.lastrowid, product_id, size_ids[size], price + 25.0 * (batch - 1),
+                              popularity * SIZE_WEIGHTS[size]))
+    cum_weights = list(itertools.accumulate(item[4] for item in items))
+    # Prices on record from the first sale, for as-of price lookups
+    cursor.executemany(
+        "INSERT INTO price_history (item_id, effective_from, price) VALUES (?, ?, ?)",
+        [(item_id, f"{start.isoformat()} 00:00:00", price) for item_id, _, _, price, _ in items])
+
+    people = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(buyers)]
+    person_course = [rng.choice(COURSES) for _ in range(buyers)]
+
+    next_id = (cursor.execute("SELECT COALESCE(MAX(transaction_id), 0) FROM sales").fetchone()[0]) + 1
+    dates = sale_dates(rng, transactions, start, years)
+    for offset in range(0, transactions, CHUNK):
+        sales, allocations = [], []
+        for i, sale_date in enumerate(dates[offset:offset + CHUNK], start=offset):
+            item_id, product_id, size_id, price, _ = rng.choices(items, cum_weights=cum_weights)[0]
+            quantity = rng.choices((1, 2, 3, 5), weights=(70, 20, 7, 3))[0]
+            buyer = rng.randrange(buyers)
+            sales.append((next_id + i, people[buyer], person_course[buyer], product_id, size_id,
+                          quantity, quantity * price, f"{100000 + i}", sale_date))
+            allocations.append((next_id + i, item_id, quantity))
+        cursor.executemany('''
+            INSERT INTO sales (transaction_id, buyer_name, program_course, product_id, size_id, quantity, amount, or_number, date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', sales)
+        cursor.executemany(
+            "INSERT INTO transaction_allocations (transaction_id, item_id, quantity) VALUES (?, ?, ?)",
+            allocations)
+
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    db.rebuild_sales_velocity()
+    db.rebuild_buyers()
+    db.rebuild_or_numbers()
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic IGP sales database")
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", required=True, help="database file to create")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        print(f"{args.output} already exists; choose a new file", file=sys.stderr)
+        sys.exit(1)
+    started = time.perf_counter()
+    generate(args.output, args.transactions, args.years, seed=args.seed)
+    print(f"Generated {args.transactions:,} sales in {time.perf_counter() - started:.1f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
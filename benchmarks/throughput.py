@@ -0,0 +1,216 @@
+"""
+Headless Transaction Throughput Simulator
+Drives the sale workflow (the same SaleService the Transaction Entry screen uses)
+from several cashier processes at a target rate, optionally while other processes
+generate reports, and reports sustained throughput, latency percentiles and lock
+contention, for sizing hardware for enrollment week
+
+Usage:
+    python -m benchmarks.throughput --cashiers 4 --rate 240 --seconds 30
+    python -m benchmarks.throughput --cashiers 8 --rate 0 --readers 2 --db big.db
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic
+from database.db_manager import DatabaseManager
+from database.report_engine import read_only_uri
+from database.sale_service import Sale, SaleService
+
+# Restocked before the run so no sale is turned away for lack of stock
+RESTOCK = 10000000
+
+
+def percentiles(values):
+    """p50/p95/p99/max of a list of seconds, in milliseconds"""
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(values)
+    pick = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': ordered[-1] * 1000}
+
+
+def cashier(db_path, number, rate, seconds, seed, ready, results):
+    """
+    Record sales like one cashier until time is up
+
+    Sales arrive at random (Poisson) at `rate` per second; with rate 0 the next sale
+    starts as soon as the previous one is saved.
+    """
+    rng = random.Random(seed + number)
+    db = DatabaseManager(db_path)
+    service = SaleService(db)
+
+    popularity = {product: weight for product, _, _, weight in synthetic.PRODUCTS}
+    choices = sorted({(row[1], row[2]) for row in db.get_all_inventory()})
+    weights = [popularity.get(product, 1) * synthetic.SIZE_WEIGHTS.get(size, 1) for product, size in choices]
+    today = date.today().isoformat()
+
+    latencies, late, failed = [], 0, 0
+    ready.wait()
+    start = time.perf_counter()
+    deadline = start + seconds
+    due = start
+    i = 0
+    while True:
+        if rate:
+            due += rng.expovariate(rate)
+            if due >= deadline:
+                time.sleep(max(0.0, deadline - time.perf_counter()))
+                break
+            wait = due - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            elif wait < -1.0:
+                late += 1
+        if time.perf_counter() >= deadline:
+            break
+
+        product, size = rng.choices(choices, weights=weights)[0]
+        buyer = f"{rng.choice(synthetic.FIRST_NAMES)} {rng.choice(synthetic.LAST_NAMES)}"
+        began = time.perf_counter()
+        # What the screen does: pick product and size, then save
+        quote = service.quote(product, size)
+        sale = Sale(buyer, rng.choice(synthetic.COURSES[:-1]), product, size,
+                    rng.choices((1, 2, 3), weights=(80, 15, 5))[0], quote['price'],
+                    f"SIM-{number}-{i}", today, item_id=quote['item_id'])
+        success, _ = service.record(sale)
+        latencies.append(time.perf_counter() - began)
+        if not success:
+            failed += 1
+        i += 1
+
+    results.put({'role': 'cashier', 'elapsed': time.perf_counter() - start, 'latencies': latencies,
+                 'failed': failed, 'late': late, 'busy_retries': db.busy_retries})
+
+
+def reader(db_path, number, seconds, ready, results):
+    """Generate this month's report and a one-year report over and over"""
+    db = DatabaseManager(db_path)
+    today = date.today()
+    year_ago = (today - timedelta(days=365)).isoformat()
+    latencies = []
+    ready.wait()
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        began = time.perf_counter()
+        if len(latencies) % 2:
+            db.get_date_range_report(year_ago, today.isoformat())
+        else:
+            db.get_monthly_report(today.year, today.month)
+        latencies.append(time.perf_counter() - began)
+    results.put({'role': 'reader', 'elapsed': time.perf_counter() - start, 'latencies': latencies})
+
+
+def simulate(db_path, cashiers, rate, seconds, readers=0, seed=1):
+    """
+    Run the simulation against db_path
+
+    Args:
+        rate (float): Target sales per minute across all cashiers (0 = as fast as possible)
+
+    Returns:
+        dict: JSON-ready summary
+    """
+    ready = multiprocessing.Barrier(cashiers + readers)
+    results = multiprocessing.Queue()
+    per_cashier = rate / 60.0 / cashiers
+    processes = [multiprocessing.Process(target=cashier, args=(db_path, n, per_cashier, seconds, seed, ready, results))
+                 for n in range(cashiers)]
+    processes += [multiprocessing.Process(target=reader, args=(db_path, n, seconds, ready, results))
+                  for n in range(readers)]
+    for process in processes:
+        process.start()
+    finished = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    sales = [r for r in finished if r['role'] == 'cashier']
+    reports = [r for r in finished if r['role'] == 'reader']
+    latencies = [x for r in sales for x in r['latencies']]
+    saved = len(latencies) - sum(r['failed'] for r in sales)
+    elapsed = max(r['elapsed'] for r in sales)
+    summary = {
+        'cashiers': cashiers,
+        'readers': readers,
+        'target_per_minute': rate or None,
+        'seconds': round(elapsed, 2),
+        'sales_saved': saved,
+        'sales_failed': sum(r['failed'] for r in sales),
+        'per_minute': saved / elapsed * 60,
+        'latency_ms': percentiles(latencies),
+        'busy_retries': sum(r['busy_retries'] for r in sales),
+        'fell_behind': sum(r['late'] for r in sales),
+    }
+    if reports:
+        summary['reports'] = sum(len(r['latencies']) for r in reports)
+        summary['report_latency_ms'] = percentiles([x for r in reports for x in r['latencies']])
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure sustained sales throughput")
+    parser.add_argument("--cashiers", type=int, default=4, help="concurrent cashier processes")
+    parser.add_argument("--rate", type=float, default=240, help="target sales per minute in total (0 = flat out)")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--readers", type=int, default=0, help="processes generating reports meanwhile")
+    parser.add_argument("--history", type=int, default=100000, help="past sales in the generated database")
+    parser.add_argument("--db", help="run against a copy of this database instead of a generated one")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-o", "--output", help="write the summary as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "throughput.db")
+        if args.db:
+            # Online backup, so sales still in the source's WAL file are copied too
+            source = sqlite3.connect(read_only_uri(args.db), uri=True)
+            copy = sqlite3.connect(db_path)
+            source.backup(copy)
+            copy.close()
+            source.close()
+            db = DatabaseManager(db_path)
+        else:
+            db = synthetic.generate(db_path, args.history, seed=args.seed)
+        conn = db.get_connection()
+        conn.execute("UPDATE inventory_batches SET stock = stock + ?", (RESTOCK,))
+        conn.commit()
+        conn.close()
+        db.close()
+
+        summary = simulate(db_path, args.cashiers, args.rate, args.seconds, args.readers, args.seed)
+
+    target = f"{args.rate:,.0f}/min target" if args.rate else "flat out"
+    print(f"{args.cashiers} cashiers ({target}), {args.readers} report readers, {summary['seconds']}s")
+    print(f"  Sustained:     {summary['per_minute']:,.0f} sales/min ({summary['sales_saved']:,} saved, "
+          f"{summary['sales_failed']:,} failed)")
+    latency = summary['latency_ms']
+    if latency['p50'] is not None:
+        print(f"  Latency (ms):  p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  "
+              f"p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+    print(f"  Contention:    {summary['busy_retries']:,} write retries after SQLITE_BUSY")
+    if args.rate and summary['fell_behind']:
+        print(f"  Fell behind:   {summary['fell_behind']:,} sales started over 1s late (target rate not sustainable)")
+    if args.readers:
+        report = summary['report_latency_ms']
+        print(f"  Reports:       {summary['reports']:,} generated, p50 {report['p50']:.1f} ms, p95 {report['p95']:.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
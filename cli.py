@@ -0,0 +1,462 @@
+"""
+EVSU-OC IGP Sales Record System
+Headless Command-Line Interface
+
+Reports, exports, backups, integrity checks and imports without opening any
+Tk window, for scheduled jobs and quick look-ups. Never imports tkinter.
+
+Usage:
+    python -m cli report monthly --year 2024 --month 6 --format csv -o june.csv
+    python -m cli report range --start 2024-01-01 --end 2024-06-30 --format json
+    python -m cli report courses --start 2024-06-01 --end 2024-06-30
+    python -m cli report or-audit --start 2024-01-01 --end 2024-12-31
+    python -m cli report prices --start 2024-01-01 --end 2024-12-31
+    python -m cli export transactions --format csv -o sales.csv
+    python -m cli backup
+    python -m cli check
+    python -m cli import inventory new_stock.csv
+    python -m cli import inventory stocktake.csv --set-stock
+    python -m cli import logbook logbook_2019.xlsx --dry-run --rejects rejects.csv
+    python -m cli maintenance full
+    python -m cli slice --start 2024-01-01 --end 2024-12-31 --rows product --cols month
+    python -m cli --profile low-ram config
+"""
+
+import argparse
+import calendar
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from database.db_manager import DatabaseManager
+from database.inventory_import import import_inventory_csv
+from database.logbook_import import CHUNK, LogbookImporter
+from database.maintenance import DatabaseMaintenance
+from database.analytics import SalesCube, DIMENSIONS, MEASURES
+
+TRANSACTION_COLUMNS = ["transaction_id", "buyer_name", "program_course", "product_name",
+                       "size", "quantity", "amount", "or_number", "date"]
+INVENTORY_COLUMNS = ["item_id", "product_name", "size", "batch", "stock", "price"]
+SUMMARY_COLUMNS = ["product_name", "size", "total_qty", "total_amount"]
+
+
+# ========== FORMATTING ==========
+
+def format_report_text(title, report):
+    """Render a report dict as a plain-text report"""
+    lines = [
+        "EVSU-OC IGP SALES REPORT",
+        title,
+        f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        f"Total Transactions: {report['total_transactions']}",
+        f"Total Items Sold:   {report['total_items_sold']}",
+        f"Total Revenue:      ₱{report['total_revenue']:,.2f}",
+        "",
+        "PRODUCT SUMMARY",
+    ]
+    for product_name, size, qty, amount in report['product_summary']:
+        lines.append(f"  {product_name:<30} {size:<10} {qty:>6}  ₱{amount:>12,.2f}")
+
+    lines += ["", "DETAILED TRANSACTIONS"]
+    if not report['transactions']:
+        lines.append("  No transactions found for this period")
+    for trans_id, buyer, course, product, size, qty, amount, or_num, date in report['transactions']:
+        lines.append(f"  {date}  {buyer:<25} {course or '':<14} {product:<25} {size:<8} "
+                     f"{qty:>4}  ₱{amount:>10,.2f}  OR# {or_num}")
+    return "\n".join(lines) + "\n"
+
+
+def format_rows_csv(columns, rows):
+    """Render rows as CSV text with a header line"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def format_report_json(title, report):
+    """Render a report dict as JSON with named fields"""
+    return json.dumps({
+        'title': title,
+        'total_transactions': report['total_transactions'],
+        'total_items_sold': report['total_items_sold'],
+        'total_revenue': report['total_revenue'],
+        'product_summary': [dict(zip(SUMMARY_COLUMNS, row)) for row in report['product_summary']],
+        'transactions': [dict(zip(TRANSACTION_COLUMNS, row)) for row in report['transactions']],
+    }, indent=2, ensure_ascii=False) + "\n"
+
+
+def write_output(text, output_path):
+    """Write to a file, or stdout when no path is given"""
+    if output_path:
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Written to {output_path}", file=sys.stderr)
+    else:
+        sys.stdout.write(text)
+
+
+def parse_date(value):
+    """argparse type for YYYY-MM-DD dates"""
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', use YYYY-MM-DD")
+    return value
+
+
+# ========== COMMANDS ==========
+
+def format_course_breakdown(title, breakdown, fmt):
+    """Render a per-course breakdown as text, CSV or JSON"""
+    if fmt == 'json':
+        return json.dumps({
+            'title': title,
+            'total_quantity': breakdown['total_quantity'],
+            'total_revenue': breakdown['total_revenue'],
+            'courses': [
+                {'course': course, 'transactions': count, 'quantity': qty, 'revenue': revenue,
+                 'products': [dict(zip(("product", "transactions", "quantity", "revenue"), row))
+                              for row in breakdown['product_mix'][course]]}
+                for course, count, qty, revenue in breakdown['courses']
+            ],
+        }, indent=2, ensure_ascii=False) + "\n"
+    if fmt == 'csv':
+        rows = [(course, product, p_count, p_qty, p_revenue)
+                for course, _, _, _ in breakdown['courses']
+                for product, p_count, p_qty, p_revenue in breakdown['product_mix'][course]]
+        return format_rows_csv(["course", "product", "transactions", "quantity", "revenue"], rows)
+
+    lines = [title, f"Total Items Sold: {breakdown['total_quantity']}  Total Revenue: ₱{breakdown['total_revenue']:,.2f}", ""]
+    for course, count, qty, revenue in breakdown['courses']:
+        lines.append(f"{course or '(No course)':<30} {count:>6} txn {qty:>6} pcs  ₱{revenue:>12,.2f}")
+        for product, p_count, p_qty, p_revenue in breakdown['product_mix'][course]:
+            lines.append(f"    {product:<26} {p_count:>6} txn {p_qty:>6} pcs  ₱{p_revenue:>12,.2f}")
+    return "\n".join(lines) + "\n"
+
+
+def format_or_audit(title, audit, fmt):
+    """Render an OR number audit (duplicates and gaps) as text, CSV or JSON"""
+    if fmt == 'json':
+        return json.dumps({
+            'title': title,
+            'receipts': audit['receipts'],
+            'booklets': audit['booklets'],
+            'duplicates': [{'or_number': or_number,
+                            'receipts': [dict(zip(("buyer_name", "date", "items"), use)) for use in uses]}
+                           for or_number, uses in audit['duplicates']],
+            'gaps': [dict(zip(("booklet", "first_missing", "last_missing"), gap)) for gap in audit['gaps']],
+        }, indent=2, ensure_ascii=False) + "\n"
+    if fmt == 'csv':
+        rows = [("duplicate", or_number, buyer_name, date, items, "", "", "")
+                for or_number, uses in audit['duplicates'] for buyer_name, date, items in uses]
+        rows += [("gap", "", "", "", "", booklet, first, last) for booklet, first, last in audit['gaps']]
+        return format_rows_csv(["issue", "or_number", "buyer_name", "date", "items",
+                                "booklet", "first_missing", "last_missing"], rows)
+
+    missing = sum(last - first + 1 for _, first, last in audit['gaps'])
+    lines = [title,
+             f"Receipts: {audit['receipts']} in {audit['booklets']} booklet(s)  |  "
+             f"Duplicates: {len(audit['duplicates'])}  |  Skipped numbers: {missing}", ""]
+    lines.append("DUPLICATE OR NUMBERS")
+    if not audit['duplicates']:
+        lines.append("  None")
+    for or_number, uses in audit['duplicates']:
+        for i, (buyer_name, date, items) in enumerate(uses):
+            lines.append(f"  {or_number if i == 0 else '':<14} {date}  {buyer_name:<30} {items:>3} item(s)")
+    lines += ["", "SKIPPED OR NUMBERS"]
+    if not audit['gaps']:
+        lines.append("  None")
+    for booklet, first, last in audit['gaps']:
+        span = f"{booklet}{first}" if first == last else f"{booklet}{first} to {booklet}{last}"
+        lines.append(f"  {span:<40} ({last - first + 1} missing)")
+    return "\n".join(lines) + "\n"
+
+
+PRICE_VARIANCE_COLUMNS = ["product_name", "size", "sales", "quantity", "charged", "list_amount",
+                          "difference", "off_list", "unpriced"]
+
+
+def format_price_variance(title, rows, fmt):
+    """Render charged amounts against list prices at the time of sale as text, CSV or JSON"""
+    if fmt == 'json':
+        return json.dumps({'title': title, 'products': [dict(zip(PRICE_VARIANCE_COLUMNS, row)) for row in rows]},
+                          indent=2, ensure_ascii=False) + "\n"
+    if fmt == 'csv':
+        return format_rows_csv(PRICE_VARIANCE_COLUMNS, rows)
+
+    charged = sum(row[4] for row in rows)
+    listed = sum(row[5] for row in rows)
+    lines = [title, f"Charged: ₱{charged:,.2f}  At list price: ₱{listed:,.2f}  Difference: ₱{charged - listed:,.2f}", ""]
+    lines.append(f"{'Product':<26} {'Size':<10} {'Sales':>7} {'Charged':>14} {'At list':>14} {'Difference':>12} {'Off list':>8}")
+    for product_name, size, sales, _, charged, listed, difference, off_list, unpriced in rows:
+        note = f"  ({unpriced} unpriced)" if unpriced else ""
+        lines.append(f"{product_name:<26} {size:<10} {sales:>7} {charged:>14,.2f} {listed:>14,.2f} "
+                     f"{difference:>12,.2f} {off_list:>8}{note}")
+    return "\n".join(lines) + "\n"
+
+
+def cmd_report(db, args):
+    """Generate a monthly, date range, per-course, OR number audit or price variance report"""
+    if args.kind == 'prices':
+        title = f"Charged vs List Price at Time of Sale ({args.start} to {args.end})"
+        write_output(format_price_variance(title, db.get_price_variance(args.start, args.end), args.format), args.output)
+        return 0
+
+    if args.kind == 'or-audit':
+        audit = db.get_or_number_audit(args.start, args.end)
+        if audit is None:
+            return 1
+        title = f"OR Number Audit ({args.start} to {args.end})"
+        write_output(format_or_audit(title, audit, args.format), args.output)
+        return 0
+
+    if args.kind == 'courses':
+        title = f"Sales by Course ({args.start} to {args.end})"
+        write_output(format_course_breakdown(title, db.get_course_breakdown(args.start, args.end), args.format), args.output)
+        return 0
+
+    if args.kind == 'monthly':
+        report = db.get_monthly_report(args.year, args.month)
+        title = f"{calendar.month_name[args.month]} {args.year} Sales Report"
+    else:
+        report = db.get_date_range_report(args.start, args.end)
+        title = f"Sales Report ({args.start} to {args.end})"
+
+    if args.format == 'json':
+        text = format_report_json(title, report)
+    elif args.format == 'csv':
+        text = format_rows_csv(TRANSACTION_COLUMNS, report['transactions'])
+    else:
+        text = format_report_text(title, report)
+    write_output(text, args.output)
+    return 0
+
+
+def cmd_export(db, args):
+    """Export a whole table"""
+    if args.table == 'inventory':
+        columns, rows = INVENTORY_COLUMNS, db.get_all_inventory()
+    else:
+        columns, rows = TRANSACTION_COLUMNS, db.export_transactions()
+
+    if args.format == 'json':
+        text = json.dumps([dict(zip(columns, row)) for row in rows], indent=2, ensure_ascii=False) + "\n"
+    else:
+        text = format_rows_csv(columns, rows)
+    write_output(text, args.output)
+    return 0
+
+
+def cmd_backup(db, args):
+    """Back up the database to a dated file"""
+    dest = args.dest
+    if not dest:
+        name = f"igp_sales_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.db"
+        dest = os.path.join(config.BASE_DIR, "backups", name)
+    if not db.backup_database(dest):
+        return 1
+    print(f"Backup written to {dest}")
+    return 0
+
+
+def cmd_check(db, args):
+    """Run integrity and consistency checks"""
+    problems = db.check_integrity()
+    for problem in problems:
+        print(f"PROBLEM: {problem}")
+    if problems:
+        return 1
+    print("OK: database passed all integrity checks")
+    return 0
+
+
+def cmd_import(db, args):
+    """Upsert inventory rows from a CSV, or load past sales from a logbook CSV/XLSX"""
+    if args.table == 'logbook':
+        return import_logbook(db, args)
+    result = import_inventory_csv(db, args.file, add_stock=not args.set_stock)
+    for line_no, reason in result['rejected']:
+        print(f"Rejected line {line_no}: {reason}", file=sys.stderr)
+    print(f"Inserted {result['inserted']} batch(es), updated {result['updated']}, "
+          f"rejected {len(result['rejected'])} line(s)")
+    return 1 if result['rejected'] else 0
+
+
+def import_logbook(db, args):
+    """Load past sales from a logbook; with --dry-run only validate"""
+    importer = LogbookImporter(db, new_products=args.new_products)
+    try:
+        summary = importer.run(args.file, dry_run=args.dry_run, rejects_path=args.rejects, chunk=args.chunk,
+                               progress=lambda read: print(f"  {read:,} rows read...", file=sys.stderr))
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for line_no, reason in summary['errors']:
+        print(f"Rejected line {line_no}: {reason}", file=sys.stderr)
+    if summary['rejected'] > len(summary['errors']):
+        print(f"... and {summary['rejected'] - len(summary['errors']):,} more", file=sys.stderr)
+    action = "Would import" if args.dry_run else "Imported"
+    span = f" from {summary['first_date']} to {summary['last_date']}" if summary['first_date'] else ""
+    print(f"{action} {summary['imported']:,} of {summary['read']:,} sale(s){span}, "
+          f"rejected {summary['rejected']:,} ({summary['seconds']:.1f}s)")
+    if args.rejects and summary['rejected']:
+        print(f"Rejected rows written to {args.rejects}")
+    return 1 if summary['rejected'] else 0
+
+
+def cmd_maintenance(db, args):
+    """Database statistics, ANALYZE/optimize and incremental vacuum"""
+    maintenance = DatabaseMaintenance(db.db_path)
+    if args.action == 'analyze':
+        maintenance.analyze()
+        print("ANALYZE complete")
+    elif args.action == 'optimize':
+        maintenance.optimize()
+        print("PRAGMA optimize complete")
+    elif args.action == 'enable-incremental':
+        converted = maintenance.enable_incremental_vacuum()
+        print("Converted to auto_vacuum=INCREMENTAL" if converted else "Already INCREMENTAL")
+    elif args.action == 'vacuum':
+        remaining = maintenance.vacuum_step(args.pages)
+        print(f"Free pages remaining: {remaining:,}")
+    elif args.action == 'full':
+        print(maintenance.format_timings(maintenance.run_full_maintenance()))
+        print()
+    if args.action in ('stats', 'full'):
+        print(maintenance.format_stats())
+    return 0
+
+
+def cmd_slice(db, args):
+    """Group-by / top-N / pivot over an in-memory columnar snapshot"""
+    cube = SalesCube.load(db, args.start, args.end)
+    where = {}
+    for condition in args.where or []:
+        dimension, _, value = condition.partition("=")
+        where.setdefault(dimension, []).append(value)
+
+    if args.cols:
+        rows, columns, matrix = cube.pivot(args.rows, args.cols, args.measure, where)
+        text = format_rows_csv([f"{args.rows}\\{args.cols}"] + columns,
+                               [[label] + values for label, values in zip(rows, matrix)])
+    else:
+        ranked = cube.top_n(args.rows, args.top, args.measure, where)
+        text = format_rows_csv([args.rows, args.measure], ranked)
+    write_output(text, args.output)
+    return 0
+
+
+def cmd_config(db, args):
+    """Print the effective configuration and where each value came from"""
+    print(config.get_config().dump())
+    return 0
+
+
+def build_parser():
+    """Create the argument parser with all subcommands"""
+    parser = argparse.ArgumentParser(prog="python -m cli", description="EVSU-OC IGP Sales Record System (headless)")
+    parser.add_argument("--db", help="path to the SQLite database (default: database.path from the config)")
+    parser.add_argument("--profile", help="configuration profile, e.g. low-ram or desktop")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="generate a sales report")
+    kinds = report.add_subparsers(dest="kind", required=True)
+    monthly = kinds.add_parser("monthly", help="report for one calendar month")
+    monthly.add_argument("--year", type=int, default=datetime.now().year)
+    monthly.add_argument("--month", type=int, choices=range(1, 13), default=datetime.now().month, metavar="1-12")
+    date_range = kinds.add_parser("range", help="report for a custom date range")
+    date_range.add_argument("--start", type=parse_date, required=True)
+    date_range.add_argument("--end", type=parse_date, required=True)
+    courses = kinds.add_parser("courses", help="per program/course totals and product mix")
+    courses.add_argument("--start", type=parse_date, required=True)
+    courses.add_argument("--end", type=parse_date, required=True)
+    or_audit = kinds.add_parser("or-audit", help="duplicate and skipped OR numbers per receipt booklet")
+    or_audit.add_argument("--start", type=parse_date, required=True)
+    or_audit.add_argument("--end", type=parse_date, required=True)
+    prices = kinds.add_parser("prices", help="amounts charged against list prices at the time of sale")
+    prices.add_argument("--start", type=parse_date, required=True)
+    prices.add_argument("--end", type=parse_date, required=True)
+    for sub in (monthly, date_range, courses, or_audit, prices):
+        sub.add_argument("--format", choices=("text", "csv", "json"), default="text")
+        sub.add_argument("-o", "--output", help="write to this file instead of stdout")
+    report.set_defaults(func=cmd_report)
+
+    export = commands.add_parser("export", help="export a whole table")
+    export.add_argument("table", choices=("inventory", "transactions"))
+    export.add_argument("--format", choices=("csv", "json"), default="csv")
+    export.add_argument("-o", "--output", help="write to this file instead of stdout")
+    export.set_defaults(func=cmd_export)
+
+    backup = commands.add_parser("backup", help="back up the database")
+    backup.add_argument("--dest", help="backup file path (default: backups/igp_sales_<timestamp>.db)")
+    backup.set_defaults(func=cmd_backup)
+
+    check = commands.add_parser("check", help="run integrity checks")
+    check.set_defaults(func=cmd_check)
+
+    imp = commands.add_parser("import", help="import data from CSV")
+    imp.add_argument("table", choices=("inventory", "logbook"))
+    imp.add_argument("file", help="CSV file to import (logbook: CSV or XLSX)")
+    imp.add_argument("--set-stock", action="store_true",
+                     help="inventory: replace the stock of existing batches (a stock count) instead of adding to it")
+    imp.add_argument("--dry-run", action="store_true", help="logbook: validate only, save nothing")
+    imp.add_argument("--rejects", help="logbook: write rows that cannot be imported to this CSV")
+    imp.add_argument("--new-products", action="store_true",
+                     help="logbook: import products not in inventory instead of rejecting them")
+    imp.add_argument("--chunk", type=int, default=CHUNK, help="logbook: sales saved per transaction")
+    imp.set_defaults(func=cmd_import)
+
+    maintenance = commands.add_parser("maintenance", help="database statistics and upkeep")
+    maintenance.add_argument("action", choices=("stats", "analyze", "optimize", "enable-incremental", "vacuum", "full"),
+                             help="full = ANALYZE + optimize + reclaim free pages, with report timings before/after")
+    maintenance.add_argument("--pages", type=int, default=DatabaseMaintenance.VACUUM_STEP_PAGES,
+                             help="free pages to release per vacuum step")
+    maintenance.set_defaults(func=cmd_maintenance)
+
+    slicer = commands.add_parser("slice", help="slice sales by product/size/course/day/week/month")
+    slicer.add_argument("--start", type=parse_date, required=True)
+    slicer.add_argument("--end", type=parse_date, required=True)
+    slicer.add_argument("--rows", choices=DIMENSIONS, default="product")
+    slicer.add_argument("--cols", choices=DIMENSIONS, help="pivot against a second dimension")
+    slicer.add_argument("--measure", choices=MEASURES, default="amount")
+    slicer.add_argument("--top", type=int, default=10, help="rows to show without --cols")
+    slicer.add_argument("--where", action="append", metavar="DIM=VALUE", help="filter, e.g. --where course=BSIT")
+    slicer.add_argument("-o", "--output", help="write to this file instead of stdout")
+    slicer.set_defaults(func=cmd_slice)
+
+    settings = commands.add_parser("config", help="show the effective configuration (for support)")
+    settings.set_defaults(func=cmd_config)
+
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    try:
+        config.configure(args.profile)
+    except config.ConfigError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.command == "config":
+        return args.func(None, args)
+    db = DatabaseManager(args.db)
+    try:
+        return args.func(db, args)
+    finally:
+        # Runs PRAGMA optimize and prunes the change journal, as the app does on exit
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
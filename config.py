@@ -0,0 +1,206 @@
+"""
+EVSU-OC IGP Sales Record System
+Runtime Configuration
+
+Settings come from, in increasing priority:
+    1. the built-in defaults below
+    2. the built-in profile ("standard", "low-ram" or "desktop")
+    3. igp_config.ini next to this file (or the file named by IGP_CONFIG), whose
+       [profile:NAME] section, if the chosen profile has one, wins over the rest
+    4. environment variables named IGP_<SECTION>_<KEY>, e.g. IGP_DATABASE_PATH
+
+The profile is chosen with --profile, IGP_PROFILE, or "profile" under [app] in the
+config file. Relative paths are resolved against this folder, not the current
+working directory, so every entry point opens the same database.
+
+    python -m cli --profile low-ram config     # show the effective settings
+"""
+
+import configparser
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, "igp_config.ini")
+
+JOURNAL_MODES = ("WAL", "DELETE", "TRUNCATE", "PERSIST")
+
+# (section, key): (type, default, description)
+SETTINGS = {
+    ("database", "path"): (str, os.path.join("database", "igp_sales.db"), "SQLite database file"),
+    ("database", "journal_mode"): (str, "WAL", "WAL, or DELETE for databases on a network share"),
+    ("database", "cache_size_kb"): (int, 16384, "SQLite page cache per connection (KB)"),
+    ("database", "mmap_size_mb"): (int, 64, "memory-mapped I/O per connection (MB, 0 = off)"),
+    ("database", "busy_timeout"): (float, 5.0, "seconds to wait for another writer's lock"),
+    ("reports", "workers"): (int, 4, "worker pool size for parallel multi-year reports (opt-in)"),
+    ("reports", "min_partitions"): (int, 12, "months a range must span before it is split"),
+    ("reports", "or_booklet_size"): (int, 50, "OR numbers per receipt booklet; longer jumps start a new series, not a gap"),
+    ("views", "table_page_size"): (int, 200, "rows per page in the table browser"),
+    ("views", "result_row_cap"): (int, 1000, "most rows the SQL console displays"),
+    ("views", "dashboard_refresh_seconds"): (float, 5.0, "how long dashboard totals are reused before re-checking"),
+}
+
+SECTIONS = {section for section, _ in SETTINGS}
+KEY_SECTIONS = {key: section for section, key in SETTINGS}
+
+PROFILES = {
+    "standard": {},
+    "low-ram": {
+        ("database", "cache_size_kb"): 2048,
+        ("database", "mmap_size_mb"): 0,
+        ("reports", "workers"): 1,
+        ("views", "table_page_size"): 100,
+        ("views", "result_row_cap"): 500,
+        ("views", "dashboard_refresh_seconds"): 15.0,
+    },
+    "desktop": {
+        ("database", "cache_size_kb"): 65536,
+        ("database", "mmap_size_mb"): 256,
+        ("reports", "workers"): 8,
+        ("views", "table_page_size"): 500,
+        ("views", "result_row_cap"): 5000,
+        ("views", "dashboard_refresh_seconds"): 3.0,
+    },
+}
+
+_current = None
+
+
+class ConfigError(ValueError):
+    """Raised when the configuration file or environment holds invalid settings"""
+
+
+class Config:
+    """Effective settings plus where each value came from"""
+
+    def __init__(self, profile, values, sources, config_file):
+        self.profile = profile
+        self.values = values
+        self.sources = sources
+        self.config_file = config_file
+
+    def get(self, section, key):
+        return self.values[(section, key)]
+
+    @property
+    def db_path(self):
+        """Absolute database path"""
+        path = os.path.expanduser(self.get("database", "path"))
+        return path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+
+    def dump(self):
+        """Effective configuration as text, for support requests"""
+        found = "found" if os.path.exists(self.config_file) else "not found"
+        lines = [
+            f"Profile:     {self.profile}",
+            f"Config file: {self.config_file} ({found})",
+            f"Database:    {self.db_path}",
+        ]
+        section = None
+        for (sec, key), value in self.values.items():
+            if sec != section:
+                section = sec
+                lines += ["", f"[{sec}]"]
+            lines.append(f"{key} = {value}    ; {self.sources[(sec, key)]}")
+        return "\n".join(lines)
+
+
+def _convert(section, key, raw, source, errors):
+    """Parse and validate one raw value; record a message in `errors` if invalid"""
+    kind = SETTINGS[(section, key)][0]
+    try:
+        value = kind(raw)
+    except (TypeError, ValueError):
+        errors.append(f"{source}: {section}.{key} must be {kind.__name__}, got {raw!r}")
+        return None
+
+    if key == "journal_mode":
+        value = value.upper()
+        if value not in JOURNAL_MODES:
+            errors.append(f"{source}: database.journal_mode must be one of {', '.join(JOURNAL_MODES)}")
+    elif key == "path":
+        if not value.strip():
+            errors.append(f"{source}: database.path must not be empty")
+    elif key in ("workers", "min_partitions", "or_booklet_size", "table_page_size", "result_row_cap", "dashboard_refresh_seconds"):
+        if value < 1:
+            errors.append(f"{source}: {section}.{key} must be at least 1")
+    elif value < 0:
+        errors.append(f"{source}: {section}.{key} must not be negative")
+    return value
+
+
+def load_config(profile=None, config_file=None, environ=None):
+    """
+    Build the effective configuration
+
+    Args:
+        profile (str): Profile name (default: IGP_PROFILE, then [app] profile, then "standard")
+        config_file (str): INI file to read (default: IGP_CONFIG, then igp_config.ini)
+        environ (dict): Environment to read overrides from (default: os.environ)
+
+    Raises:
+        ConfigError: listing every invalid setting
+    """
+    environ = os.environ if environ is None else environ
+    config_file = config_file or environ.get("IGP_CONFIG") or CONFIG_FILE
+
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(config_file, encoding="utf-8")
+    except configparser.Error as e:
+        raise ConfigError(f"{config_file}: {e}")
+
+    profile = profile or environ.get("IGP_PROFILE") or parser.get("app", "profile", fallback="standard")
+    file_profile = f"profile:{profile}"
+    if profile not in PROFILES and not parser.has_section(file_profile):
+        names = sorted(set(PROFILES) | {s.split(":", 1)[1] for s in parser.sections() if s.startswith("profile:")})
+        raise ConfigError(f"Unknown profile '{profile}', expected one of: {', '.join(names)}")
+
+    errors = []
+    values, sources = {}, {}
+    for setting, (_, default, _) in SETTINGS.items():
+        values[setting], sources[setting] = default, "default"
+    for setting, value in PROFILES.get(profile, {}).items():
+        values[setting], sources[setting] = value, f"profile {profile}"
+
+    # Plain sections first, so a [profile:NAME] section can override them
+    name = os.path.basename(config_file)
+    sections = [s for s in parser.sections() if s != "app" and not s.startswith("profile:")]
+    if parser.has_section(file_profile):
+        sections.append(file_profile)
+    for file_section in sections:
+        source = f"{name} [{file_section}]"
+        if file_section != file_profile and file_section not in SECTIONS:
+            errors.append(f"{source}: unknown section")
+            continue
+        for key, raw in parser.items(file_section):
+            section = KEY_SECTIONS.get(key)
+            if section is None or (file_section != file_profile and section != file_section):
+                errors.append(f"{source}: unknown setting '{key}'")
+                continue
+            values[(section, key)] = _convert(section, key, raw, source, errors)
+            sources[(section, key)] = source
+
+    for section, key in SETTINGS:
+        variable = f"IGP_{section}_{key}".upper()
+        if variable in environ:
+            source = f"environment {variable}"
+            values[(section, key)] = _convert(section, key, environ[variable], source, errors)
+            sources[(section, key)] = source
+
+    if errors:
+        raise ConfigError("Invalid configuration:\n  " + "\n  ".join(errors))
+    return Config(profile, values, sources, config_file)
+
+
+def configure(profile=None, config_file=None):
+    """Load the configuration once at startup; later get_config() calls reuse it"""
+    global _current
+    _current = load_config(profile, config_file)
+    return _current
+
+
+def get_config():
+    """The configuration loaded at startup (loaded with defaults on first use)"""
+    if _current is None:
+        configure()
+    return _current
@@ -0,0 +1,269 @@
+"""
+Sales Analytics for EVSU-OC IGP Sales Record System
+Loads a date range of transactions into compact columnar arrays once, then answers
+group-by, top-N and pivot queries in memory without going back to SQLite
+
+Strings (product, size, course) are dictionary-encoded to small integer codes, and
+dates are kept as day ordinals. NumPy is used when installed; otherwise the same
+queries run on stdlib arrays.
+"""
+
+from array import array
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # optional acceleration
+    np = None
+
+
+DIMENSIONS = ("product", "size", "course", "day", "week", "month")
+MEASURES = ("amount", "quantity", "count")
+
+
+class _Dictionary:
+    """Two-way mapping between strings and dense integer codes"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class SalesCube:
+    """Columnar, dictionary-encoded snapshot of transactions for interactive slicing"""
+
+    def __init__(self):
+        self.transaction_ids = array('q')
+        self.days = array('l')        # date.toordinal()
+        self.months = array('l')      # year * 12 + (month - 1)
+        self.products = array('l')
+        self.sizes = array('l')
+        self.courses = array('l')
+        self.quantities = array('q')
+        self.amounts = array('d')
+
+        self.dictionaries = {
+            'product': _Dictionary(),
+            'size': _Dictionary(),
+            'course': _Dictionary(),
+        }
+        self.skipped = 0
+        self._numpy_columns = None
+
+    # ========== LOADING ==========
+
+    @classmethod
+    def load(cls, db_manager, start_date, end_date, chunk_size=10000):
+        """
+        Load transactions dated start_date..end_date (inclusive, YYYY-MM-DD)
+
+        Rows are streamed in chunks, so memory holds only the compact columns.
+
+        Args:
+            db_manager (DatabaseManager): Source database
+        """
+        cube = cls()
+        conn = db_manager.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT transaction_id, date, product_name, size, program_course, quantity, amount
+            FROM transactions
+            WHERE date >= ? AND date <= ?
+        ''', (start_date, end_date))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            cube.append_rows(rows)
+        conn.close()
+        return cube
+
+    def append_rows(self, rows):
+        """Append (transaction_id, date, product, size, course, quantity, amount) rows"""
+        encode_product = self.dictionaries['product'].encode
+        encode_size = self.dictionaries['size'].encode
+        encode_course = self.dictionaries['course'].encode
+        for transaction_id, date_str, product, size, course, quantity, amount in rows:
+            try:
+                day = date.fromisoformat(date_str[:10])
+            except (TypeError, ValueError):
+                self.skipped += 1
+                continue
+            self.transaction_ids.append(transaction_id)
+            self.days.append(day.toordinal())
+            self.months.append(day.year * 12 + day.month - 1)
+            self.products.append(encode_product(product))
+            self.sizes.append(encode_size(size))
+            self.courses.append(encode_course(course or ''))
+            self.quantities.append(quantity or 0)
+            self.amounts.append(amount or 0.0)
+        self._numpy_columns = None
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    # ========== COLUMN ACCESS ==========
+
+    def _column(self, name):
+        """Integer code column for a dimension, or the values of a measure"""
+        columns = {
+            'product': self.products,
+            'size': self.sizes,
+            'course': self.courses,
+            'day': self.days,
+            'month': self.months,
+            'quantity': self.quantities,
+            'amount': self.amounts,
+        }
+        if name == 'week':
+            # Ordinal 1 is a Monday, so this groups Monday-to-Sunday weeks
+            return array('l', ((d - 1) // 7 for d in self.days))
+        return columns[name]
+
+    def _np_column(self, name):
+        """Same as _column, as a cached NumPy array"""
+        if self._numpy_columns is None:
+            self._numpy_columns = {}
+        if name not in self._numpy_columns:
+            if name == 'week':
+                self._numpy_columns[name] = (self._np_column('day') - 1) // 7
+            else:
+                column = self._column(name)
+                self._numpy_columns[name] = np.frombuffer(column, dtype=column.typecode).copy()
+        return self._numpy_columns[name]
+
+    def label(self, dimension, code):
+        """Human-readable label for a dimension code"""
+        if dimension in self.dictionaries:
+            return self.dictionaries[dimension].values[code]
+        if dimension == 'day':
+            return date.fromordinal(code).isoformat()
+        if dimension == 'week':
+            return date.fromordinal(code * 7 + 1).isoformat()
+        if dimension == 'month':
+            return f"{code // 12}-{code % 12 + 1:02d}"
+        raise ValueError(f"Unknown dimension: {dimension}")
+
+    def _encode_filter(self, dimension, values):
+        """Convert label(s) to the set of codes they map to"""
+        if isinstance(values, str) or not hasattr(values, '__iter__'):
+            values = [values]
+        if dimension in self.dictionaries:
+            codes = self.dictionaries[dimension].codes
+            return {codes[v] for v in values if v in codes}
+        if dimension == 'day':
+            return {date.fromisoformat(v).toordinal() for v in values}
+        if dimension == 'week':
+            return {(date.fromisoformat(v).toordinal() - 1) // 7 for v in values}
+        if dimension == 'month':
+            return {int(v[:4]) * 12 + int(v[5:7]) - 1 for v in values}
+        raise ValueError(f"Unknown dimension: {dimension}")
+
+    # ========== QUERIES ==========
+
+    def _check(self, dimensions, measure):
+        for dimension in dimensions:
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dimension}', expected one of {DIMENSIONS}")
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure '{measure}', expected one of {MEASURES}")
+
+    def group_by(self, dimensions, measure='amount', where=None):
+        """
+        Aggregate a measure over one or more dimensions
+
+        Args:
+            dimensions (list): e.g. ['product', 'size'] or ['course', 'week']
+            measure (str): 'amount', 'quantity' or 'count'
+            where (dict): {dimension: label or list of labels} filters
+
+        Returns:
+            dict: {(label, ...): total}
+        """
+        dimensions = list(dimensions)
+        self._check(dimensions, measure)
+        if np is not None and len(self):
+            totals = self._group_by_numpy(dimensions, measure, where or {})
+        else:
+            totals = self._group_by_python(dimensions, measure, where or {})
+        return {
+            tuple(self.label(dim, code) for dim, code in zip(dimensions, key)): value
+            for key, value in totals.items()
+        }
+
+    def _group_by_python(self, dimensions, measure, where):
+        keep = [(self._column(dim), self._encode_filter(dim, values)) for dim, values in where.items()]
+        key_columns = [self._column(dim) for dim in dimensions]
+        weights = None if measure == 'count' else self._column(measure)
+
+        totals = {}
+        for i in range(len(self)):
+            if any(column[i] not in allowed for column, allowed in keep):
+                continue
+            key = tuple(column[i] for column in key_columns)
+            totals[key] = totals.get(key, 0) + (1 if weights is None else weights[i])
+        return totals
+
+    def _group_by_numpy(self, dimensions, measure, where):
+        mask = np.ones(len(self), dtype=bool)
+        for dim, values in where.items():
+            mask &= np.isin(self._np_column(dim), list(self._encode_filter(dim, values)))
+
+        # Mixed-radix combine the dimension codes into one key per row
+        columns = [self._np_column(dim)[mask] for dim in dimensions]
+        offsets = [int(column.min()) if column.size else 0 for column in columns]
+        radixes = [int(column.max()) - offset + 1 if column.size else 1 for column, offset in zip(columns, offsets)]
+        keys = np.zeros(int(mask.sum()), dtype=np.int64)
+        for column, offset, radix in zip(columns, offsets, radixes):
+            keys = keys * radix + (column - offset)
+
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        weights = None if measure == 'count' else self._np_column(measure)[mask]
+        sums = np.bincount(inverse, weights=weights, minlength=len(unique_keys))
+
+        totals = {}
+        for key, value in zip(unique_keys.tolist(), sums.tolist()):
+            codes = []
+            for offset, radix in reversed(list(zip(offsets, radixes))):
+                key, code = divmod(key, radix)
+                codes.append(code + offset)
+            totals[tuple(reversed(codes))] = int(value) if measure != 'amount' else value
+        return totals
+
+    def top_n(self, dimension, n=10, measure='amount', where=None):
+        """
+        Largest values of a measure for one dimension
+
+        Returns:
+            list: [(label, total), ...] largest first
+        """
+        totals = self.group_by([dimension], measure, where)
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(key[0], value) for key, value in ranked]
+
+    def pivot(self, row_dimension, column_dimension, measure='amount', where=None):
+        """
+        Cross-tabulate a measure, e.g. product x week
+
+        Returns:
+            tuple: (row labels, column labels, matrix as list of lists)
+        """
+        totals = self.group_by([row_dimension, column_dimension], measure, where)
+        rows = sorted({key[0] for key in totals})
+        columns = sorted({key[1] for key in totals})
+        column_index = {label: i for i, label in enumerate(columns)}
+        row_index = {label: i for i, label in enumerate(rows)}
+        matrix = [[0] * len(columns) for _ in rows]
+        for (row_label, column_label), value in totals.items():
+            matrix[row_index[row_label]][column_index[column_label]] = value
+        return rows, columns, matrix
@@ -5,19 +5,62 @@ Handles all SQLite3 database operations including initialization and CRUD operat
 
 import sqlite3
 import os
+import random
+import re
+import sys
+import time
 from datetime import datetime
 
+if __package__ in (None, ""):
+    # Run directly (SETUP_DATABASE.bat): make the project folder importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import get_config
+from database import forecasting, fuzzy
+from database.report_engine import EMPTY_REPORT, ReportEngine, month_partitions, read_only_uri
+
 class DatabaseManager:
     """Manages SQLite database operations for the IGP Sales Record System"""
     
-    def __init__(self, db_path="database/igp_sales.db"):
+    # Batches are consumed oldest first; batch numbers are entered as text
+    # ("1", "2", "10") so they are compared numerically before falling back to text
+    FIFO_ORDER = "CAST(batch AS INTEGER), batch, item_id"
+    
+    # Batch label(s) a row of `transactions` was drawn from ("2", or "1, 2" when a
+    # sale was split across batches); NULL for sales without allocations
+    SALE_BATCHES = '''(SELECT GROUP_CONCAT(b.batch, ', ')
+                       FROM transaction_allocations a
+                       JOIN inventory_batches b ON b.item_id = a.item_id
+                       WHERE a.transaction_id = transactions.transaction_id)'''
+    
+    # How many times a write is retried with exponential backoff if it still gets
+    # SQLITE_BUSY after waiting database.busy_timeout seconds (see config.py)
+    BUSY_RETRIES = 5
+    BUSY_BACKOFF = 0.05
+    
+    # Edits/deletes are journaled for live views; entries older than this are pruned on close
+    CHANGE_JOURNAL_DAYS = 7
+    
+    def __init__(self, db_path=None):
         """
         Initialize database manager and create tables if they don't exist
         
         Args:
-            db_path (str): Path to the SQLite database file
+            db_path (str): Path to the SQLite database file (default: database.path
+                from the configuration, resolved against the program folder)
         """
-        self.db_path = db_path
+        config = get_config()
+        self.db_path = db_path or config.db_path
+        self.journal_mode = config.get("database", "journal_mode")
+        self.busy_timeout = config.get("database", "busy_timeout")
+        self.cache_size_kb = config.get("database", "cache_size_kb")
+        self.mmap_size_mb = config.get("database", "mmap_size_mb")
+        self.report_workers = config.get("reports", "workers")
+        self.min_partitions = config.get("reports", "min_partitions")
+        self.or_booklet_size = config.get("reports", "or_booklet_size")
+        self._version_conn = None
+        # Writes retried because another connection held the lock (lock contention)
+        self.busy_retries = 0
         self.ensure_database_directory()
         self.initialize_database()
         self.check_and_update_schema()
@@ -35,20 +78,150 @@ class DatabaseManager:
         Returns:
             sqlite3.Connection: Database connection object
         """
-        return sqlite3.connect(self.db_path)
+        # `timeout` installs SQLite's busy handler (PRAGMA busy_timeout) so a second
+        # terminal or manage_db.py holding the write lock makes us wait instead of fail
+        return self._tune(sqlite3.connect(self.db_path, timeout=self.busy_timeout))
+    
+    def get_read_connection(self):
+        """
+        Create a read-only connection for reports
+        
+        It can never take the write lock, and in WAL mode its reads neither wait
+        for nor hold up writers.
+        """
+        return self._tune(sqlite3.connect(read_only_uri(self.db_path), uri=True, timeout=self.busy_timeout))
+    
+    def _tune(self, conn):
+        """Apply the configured page cache and memory-mapped I/O sizes to a connection"""
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size_mb) * 1024 * 1024}")
+        return conn
+    
+    def get_data_version(self):
+        """
+        Return a number that changes whenever the database is modified
+        
+        A long-lived connection is kept for this so PRAGMA data_version sees commits
+        from every other connection, including other programs such as manage_db.py.
+        
+        Returns:
+            int: Current data version, or None if it could not be read
+        """
+        try:
+            if self._version_conn is None:
+                self._version_conn = self.get_connection()
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+        except Exception as e:
+            print(f"Error reading data version: {e}")
+            return None
+    
+    def close(self):
+        """
+        Shut down cleanly: drop change journal entries no live view still needs,
+        let SQLite refresh stale planner statistics (PRAGMA optimize) and release
+        the long-lived connection
+        """
+        try:
+            conn = self.get_connection()
+            conn.execute("DELETE FROM transaction_changes WHERE changed_at < datetime('now', ?)",
+                         (f"-{self.CHANGE_JOURNAL_DAYS} days",))
+            conn.commit()
+            conn.execute("PRAGMA optimize")
+            conn.close()
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+        except Exception as e:
+            print(f"Error closing database: {e}")
+    
+    @staticmethod
+    def _is_busy_error(error):
+        """Check whether an OperationalError is SQLITE_BUSY / SQLITE_LOCKED"""
+        message = str(error).lower()
+        return 'locked' in message or 'busy' in message
+    
+    def _run_write(self, operation):
+        """
+        Run `operation(conn, cursor)` inside one IMMEDIATE write transaction.
+        
+        The operation commits on success; anything left uncommitted is rolled back
+        when the connection closes. If the write lock cannot be obtained the whole
+        operation is retried with jittered exponential backoff.
+        
+        Returns:
+            Whatever `operation` returns
+        """
+        delay = self.BUSY_BACKOFF
+        for attempt in range(self.BUSY_RETRIES):
+            conn = self.get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                return operation(conn, cursor)
+            except sqlite3.OperationalError as e:
+                if not self._is_busy_error(e) or attempt == self.BUSY_RETRIES - 1:
+                    raise
+            finally:
+                conn.close()
+            self.busy_retries += 1
+            time.sleep(delay * (1 + random.random()))
+            delay *= 2
+    
+    def _run_read(self, operation):
+        """
+        Run operation(cursor) inside one read transaction on a read-only connection
+        
+        Every statement the operation runs sees the same snapshot of the database,
+        however many sales are committed meanwhile.
+        """
+        conn = self.get_read_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            result = operation(cursor)
+            conn.commit()
+            return result
+        finally:
+            conn.close()
     
     def initialize_database(self):
         """Create database tables if they don't exist"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Create inventory table
+        # Only takes effect before the first table is created: new databases can hand
+        # free pages back in small steps (see DatabaseMaintenance.reclaim_free_pages).
+        # Existing ones keep their mode until converted with one full VACUUM
+        # (DatabaseMaintenance.enable_incremental_vacuum)
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        
+        # Write-ahead logging (the default) lets reports read a stable snapshot while
+        # sales are written; DELETE is for databases kept on a network share
+        cursor.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        
+        # Product names and size labels are stored once and referenced by integer keys
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS products (
+                product_id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sizes (
+                size_id INTEGER PRIMARY KEY,
+                label TEXT NOT NULL UNIQUE
+            )
+        ''')
+        
+        # Create inventory batches table (read through the `inventory` view)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
+            CREATE TABLE IF NOT EXISTS inventory_batches (
                 item_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                product_name TEXT NOT NULL,
-                size TEXT NOT NULL,
+                product_id INTEGER NOT NULL REFERENCES products(product_id),
+                size_id INTEGER NOT NULL REFERENCES sizes(size_id),
                 batch TEXT DEFAULT '',
+                code TEXT,
                 stock INTEGER NOT NULL DEFAULT 0,
                 price REAL NOT NULL,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
@@ -56,14 +229,14 @@ class DatabaseManager:
             )
         ''')
         
-        # Create transactions table
+        # Create sales table (read through the `transactions` view)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
+            CREATE TABLE IF NOT EXISTS sales (
                 transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
                 buyer_name TEXT NOT NULL,
                 program_course TEXT,
-                product_name TEXT NOT NULL,
-                size TEXT NOT NULL,
+                product_id INTEGER NOT NULL REFERENCES products(product_id),
+                size_id INTEGER NOT NULL REFERENCES sizes(size_id),
                 quantity INTEGER NOT NULL,
                 amount REAL NOT NULL,
                 or_number TEXT NOT NULL,
@@ -72,25 +245,212 @@ class DatabaseManager:
             )
         ''')
         
+        # Per-batch split of each sale (one row per inventory batch touched)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transaction_allocations (
+                allocation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transaction_id INTEGER NOT NULL,
+                item_id INTEGER NOT NULL,
+                quantity INTEGER NOT NULL
+            )
+        ''')
+
+        # Exponentially weighted sales per product/size, folded in on every sale
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sales_velocity (
+                product_name TEXT NOT NULL,
+                size TEXT NOT NULL,
+                decayed_qty REAL NOT NULL DEFAULT 0,
+                last_date TEXT NOT NULL,
+                PRIMARY KEY (product_name, size)
+            )
+        ''')
+
+        # Signed before/after amounts of edited and deleted sales, so live views can
+        # apply them as deltas instead of reloading
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transaction_changes (
+                change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                transaction_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                product_name TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # One row per distinct buyer for autocomplete; the NOCASE primary key doubles
+        # as the prefix index
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS buyers (
+                name TEXT PRIMARY KEY COLLATE NOCASE,
+                program_course TEXT,
+                last_date TEXT NOT NULL,
+                purchases INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+
+        # Trigram index over buyer names for typo-tolerant search (see database/fuzzy.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS buyer_trigrams (
+                trigram TEXT NOT NULL,
+                name TEXT NOT NULL COLLATE NOCASE,
+                PRIMARY KEY (trigram, name)
+            ) WITHOUT ROWID
+        ''')
+
+        # OR number of every sale split into booklet prefix and serial number, for
+        # duplicate checks and the receipt audit (see split_or_number)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS or_numbers (
+                transaction_id INTEGER PRIMARY KEY,
+                booklet TEXT NOT NULL,
+                serial INTEGER
+            )
+        ''')
+
+        # Every price a batch has had and the local time it took effect; the primary
+        # key doubles as the index for as-of lookups (see get_price_as_of)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS price_history (
+                item_id INTEGER NOT NULL,
+                effective_from TEXT NOT NULL,
+                price REAL NOT NULL,
+                PRIMARY KEY (item_id, effective_from)
+            ) WITHOUT ROWID
+        ''')
+
         # Create indexes
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_transactions_date 
-            ON transactions(date)
+            CREATE INDEX IF NOT EXISTS idx_or_numbers_booklet
+            ON or_numbers(booklet, serial)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_allocations_transaction
+            ON transaction_allocations(transaction_id)
+        ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sales_date
+            ON sales(date)
         ''')
         
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_transactions_buyer 
-            ON transactions(buyer_name)
+            CREATE INDEX IF NOT EXISTS idx_sales_buyer
+            ON sales(buyer_name)
         ''')
         
+        # Fuzzy buyer search fetches sales by buyer regardless of letter case
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_inventory_product 
-            ON inventory(product_name, size)
+            CREATE INDEX IF NOT EXISTS idx_sales_buyer_nocase
+            ON sales(buyer_name COLLATE NOCASE)
         ''')
         
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sales_course_date
+            ON sales(program_course, date)
+        ''')
+        
+        # Databases from before the split still have `inventory`/`transactions` tables;
+        # check_and_update_schema() moves them over and creates the views then
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('inventory', 'transactions')")
+        if not cursor.fetchone()[0]:
+            self._create_compat_views(cursor)
+        
         conn.commit()
         conn.close()
 
+    def _create_compat_views(self, cursor):
+        """
+        Create the `inventory` and `transactions` views over the normalized tables
+        
+        They have the columns the tables had before products and sizes were split out,
+        so reports and other readers work unchanged. They are read-only: writes go to
+        inventory_batches and sales (with keys from _product_size_ids()).
+        """
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS inventory AS
+            SELECT b.item_id, p.name AS product_name, z.label AS size, b.batch, b.code,
+                   b.stock, b.price, b.created_at, b.updated_at
+            FROM inventory_batches b
+            JOIN products p ON p.product_id = b.product_id
+            JOIN sizes z ON z.size_id = b.size_id
+        ''')
+        
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS transactions AS
+            SELECT s.transaction_id, s.buyer_name, s.program_course, p.name AS product_name,
+                   z.label AS size, s.quantity, s.amount, s.or_number, s.date, s.created_at
+            FROM sales s
+            JOIN products p ON p.product_id = s.product_id
+            JOIN sizes z ON z.size_id = s.size_id
+        ''')
+    
+    def _normalize_legacy_tables(self, cursor):
+        """
+        Move the rows of the old `inventory` and `transactions` tables into the
+        normalized tables (keeping every item_id and transaction_id), drop the old
+        tables and put the compatibility views in their place
+        """
+        cursor.execute('''
+            INSERT OR IGNORE INTO products (name)
+            SELECT product_name FROM inventory UNION SELECT product_name FROM transactions
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO sizes (label)
+            SELECT size FROM inventory UNION SELECT size FROM transactions
+        ''')
+        cursor.execute('''
+            INSERT INTO inventory_batches (item_id, product_id, size_id, batch, code, stock, price, created_at, updated_at)
+            SELECT i.item_id, p.product_id, z.size_id, COALESCE(i.batch, ''), i.code, i.stock, i.price,
+                   i.created_at, i.updated_at
+            FROM inventory i
+            JOIN products p ON p.name = i.product_name
+            JOIN sizes z ON z.label = i.size
+        ''')
+        cursor.execute('''
+            INSERT INTO sales (transaction_id, buyer_name, program_course, product_id, size_id,
+                               quantity, amount, or_number, date, created_at)
+            SELECT t.transaction_id, t.buyer_name, t.program_course, p.product_id, z.size_id,
+                   t.quantity, t.amount, t.or_number, t.date, t.created_at
+            FROM transactions t
+            JOIN products p ON p.name = t.product_name
+            JOIN sizes z ON z.label = t.size
+        ''')
+        
+        # Keep AUTOINCREMENT counters, so ids of deleted rows are still never reused
+        for old, new in (('inventory', 'inventory_batches'), ('transactions', 'sales')):
+            cursor.execute("SELECT MAX(seq) FROM sqlite_sequence WHERE name IN (?, ?)", (old, new))
+            seq = cursor.fetchone()[0]
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name IN (?, ?)", (old, new))
+            if seq is not None:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (new, seq))
+        
+        cursor.execute("DROP TABLE inventory")
+        cursor.execute("DROP TABLE transactions")
+        self._create_compat_views(cursor)
+    
+    def _make_batch_keys_unique(self, cursor):
+        """
+        Give duplicate product/size/batch rows distinct batch labels ("2" becomes
+        "2 #17", after the item id) so the batch key can be a unique index; the rows
+        themselves are kept, as sales were allocated to them
+        
+        Returns:
+            int: Rows renamed
+        """
+        cursor.execute("UPDATE inventory_batches SET batch = '' WHERE batch IS NULL")
+        cursor.execute('''
+            UPDATE inventory_batches
+            SET batch = TRIM(batch || ' #' || item_id)
+            WHERE item_id NOT IN (
+                SELECT MIN(item_id) FROM inventory_batches GROUP BY product_id, size_id, batch
+            )
+        ''')
+        return cursor.rowcount
+    
     def check_and_update_schema(self):
         """Check for missing columns and update schema if necessary (Migration)"""
         try:
@@ -115,47 +475,161 @@ class DatabaseManager:
                 cursor.execute("ALTER TABLE inventory ADD COLUMN batch TEXT DEFAULT ''")
                 conn.commit()
                 print("Inventory migration successful.")
-                
+            if 'code' not in inv_cols:
+                print("Migrating database: Adding product code column to inventory...")
+                cursor.execute("ALTER TABLE inventory ADD COLUMN code TEXT")
+                conn.commit()
+                print("Product code migration successful.")
+            
+            # Split product names and sizes out of databases that predate it
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('inventory', 'transactions')")
+            if cursor.fetchone()[0]:
+                print("Migrating database: Moving products and sizes into their own tables...")
+                cursor.execute("BEGIN IMMEDIATE")
+                self._normalize_legacy_tables(cursor)
+                conn.commit()
+                # Give the space of the old tables back to the file system
+                cursor.execute("VACUUM")
+                print("Normalized schema migration successful.")
+            
+            # Product/barcode codes identify one batch each (NULL = no code)
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_batches_code
+                ON inventory_batches(code)
+            ''')
+            conn.commit()
+            
+            # One row per product/size/batch, so imports can upsert on it
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_inventory_batches_key'")
+            if not cursor.fetchone():
+                cursor.execute("BEGIN IMMEDIATE")
+                renamed = self._make_batch_keys_unique(cursor)
+                if renamed:
+                    print(f"Migrating database: Renamed {renamed} duplicate batch label(s)...")
+                cursor.execute('''
+                    CREATE UNIQUE INDEX idx_inventory_batches_key
+                    ON inventory_batches(product_id, size_id, batch)
+                ''')
+                # Superseded by the unique index, which starts with the same columns
+                cursor.execute("DROP INDEX IF EXISTS idx_inventory_batches_product")
+                conn.commit()
+            
+            # Start the price history of databases that predate it with the current
+            # prices, effective from when each batch was added
+            cursor.execute('''
+                SELECT NOT EXISTS(SELECT 1 FROM price_history) AND EXISTS(SELECT 1 FROM inventory_batches)
+            ''')
+            if cursor.fetchone()[0]:
+                print("Migrating database: Starting price history...")
+                cursor.execute('''
+                    INSERT INTO price_history (item_id, effective_from, price)
+                    SELECT item_id, COALESCE(datetime(created_at, 'localtime'), datetime('now', 'localtime')), price
+                    FROM inventory_batches
+                ''')
+                conn.commit()
+                print("Price history migration successful.")
+            
+            # Fill the buyer list once for databases that predate it
+            cursor.execute('''
+                SELECT EXISTS(SELECT 1 FROM buyers) AND EXISTS(SELECT 1 FROM buyer_trigrams),
+                       EXISTS(SELECT 1 FROM sales)
+            ''')
+            has_buyers, has_transactions = cursor.fetchone()
+            
+            # Seed sales velocity once for databases that predate it
+            cursor.execute('''
+                SELECT EXISTS(SELECT 1 FROM sales_velocity),
+                       EXISTS(SELECT 1 FROM sales WHERE date >= ?)
+            ''', (self._velocity_since(),))
+            has_velocity, has_sales = cursor.fetchone()
+            
+            # Register OR numbers once for databases that predate the registry
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM or_numbers)")
+            has_or_numbers = cursor.fetchone()[0]
             conn.close()
+            if has_transactions and not has_buyers:
+                print("Migrating database: Building buyer list from history...")
+                self.rebuild_buyers()
+                print("Buyer list migration successful.")
+            if has_transactions and not has_or_numbers:
+                print("Migrating database: Registering OR numbers...")
+                self.rebuild_or_numbers()
+                print("OR number migration successful.")
+            if has_sales and not has_velocity:
+                print("Migrating database: Building sales velocity from history...")
+                self.rebuild_sales_velocity()
+                print("Sales velocity migration successful.")
         except Exception as e:
             print(f"Schema update error: {e}")
     
     # ========== INVENTORY OPERATIONS ==========
     
-    def add_product(self, product_name, size, stock, price, batch=''):
-        """Add a new product to inventory"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
+    @staticmethod
+    def normalize_code(code):
+        """Product codes are matched case-insensitively; blank means no code"""
+        code = (code or '').strip().upper()
+        return code or None
+    
+    def _product_size_ids(self, cursor, product_name, size):
+        """
+        Integer keys of a product name and a size label, adding whichever is new
+        
+        Returns:
+            tuple: (product_id, size_id)
+        """
+        ids = []
+        for table, key, column, value in (('products', 'product_id', 'name', product_name),
+                                          ('sizes', 'size_id', 'label', size)):
+            cursor.execute(f"SELECT {key} FROM {table} WHERE {column} = ?", (value,))
+            row = cursor.fetchone()
+            if row:
+                ids.append(row[0])
+            else:
+                cursor.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (value,))
+                ids.append(cursor.lastrowid)
+        return tuple(ids)
+    
+    def add_product(self, product_name, size, stock, price, batch='', code=None):
+        """Add a new product to inventory (fails if `code` is already used)"""
+        def insert(conn, cursor):
+            product_id, size_id = self._product_size_ids(cursor, product_name, size)
             cursor.execute('''
-                INSERT INTO inventory (product_name, size, batch, stock, price)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (product_name, size, batch, stock, price))
-            
+                INSERT INTO inventory_batches (product_id, size_id, batch, code, stock, price)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (product_id, size_id, batch, self.normalize_code(code), stock, price))
+            self._record_prices(cursor, [cursor.lastrowid])
             conn.commit()
-            conn.close()
             return True
+        
+        try:
+            return self._run_write(insert)
         except Exception as e:
             print(f"Error adding product: {e}")
             return False
     
-    def update_product(self, item_id, product_name, size, stock, price, batch=''):
-        """Update an existing product in inventory"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
+    def update_product(self, item_id, product_name, size, stock, price, batch='', code=None):
+        """
+        Update an existing product in inventory
+        
+        Args:
+            code (str): New product code ('' removes it); None keeps the current one.
+                Fails if the code is already used by another batch.
+        """
+        def apply(conn, cursor):
+            product_id, size_id = self._product_size_ids(cursor, product_name, size)
             cursor.execute('''
-                UPDATE inventory 
-                SET product_name = ?, size = ?, batch = ?, stock = ?, price = ?,
+                UPDATE inventory_batches 
+                SET product_id = ?, size_id = ?, batch = ?, stock = ?, price = ?,
+                    code = CASE WHEN ? THEN ? ELSE code END,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE item_id = ?
-            ''', (product_name, size, batch, stock, price, item_id))
-            
+            ''', (product_id, size_id, batch, stock, price, code is not None, self.normalize_code(code), item_id))
+            self._record_prices(cursor, [item_id])
             conn.commit()
-            conn.close()
             return True
+        
+        try:
+            return self._run_write(apply)
         except Exception as e:
             print(f"Error updating product: {e}")
             return False
@@ -164,82 +638,59 @@ class DatabaseManager:
         """Update stock quantity for a product or specific item (batch).
 
         If `item_id` is provided, update that specific inventory row.
-        Otherwise, operate on the first matching inventory row for the given product_name and size.
+        Otherwise, operate on the first matching inventory row (FIFO) for the given product_name and size.
         This ensures we only modify a single batch row and avoid affecting other batches.
-        """
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            # If item_id is provided, target that row
-            if item_id is not None:
-                cursor.execute('SELECT stock FROM inventory WHERE item_id = ?', (item_id,))
-                row = cursor.fetchone()
-                if not row:
-                    print(f"Item not found: item_id={item_id}")
-                    conn.close()
-                    return False
-
-                new_stock = row[0] + quantity_change
-                if new_stock < 0:
-                    print(f"Error: Insufficient stock for item {item_id}. Current: {row[0]}, Requested: {abs(quantity_change)}")
-                    conn.close()
-                    return False
-
-                cursor.execute('''
-                    UPDATE inventory
-                    SET stock = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE item_id = ?
-                ''', (new_stock, item_id))
 
-                conn.commit()
-                conn.close()
-                return True
-
-            # No item_id: find the first matching row for product_name & size
-            cursor.execute('''
-                SELECT item_id, stock FROM inventory
+        The change is applied as one guarded `stock = stock + ?` statement, so concurrent
+        writers can never drive stock negative or overwrite each other's changes.
+        """
+        if item_id is not None:
+            target_sql, target_params = '?', (item_id,)
+        else:
+            target_sql = f'''(
+                SELECT item_id FROM inventory
                 WHERE product_name = ? AND size = ?
-                ORDER BY batch ASC, item_id ASC
+                ORDER BY {self.FIFO_ORDER}
                 LIMIT 1
-            ''', (product_name, size))
-
-            result = cursor.fetchone()
-            if not result:
-                print(f"Product not found: {product_name} ({size})")
-                conn.close()
-                return False
+            )'''
+            target_params = (product_name, size)
 
-            target_item_id, current_stock = result
-            new_stock = current_stock + quantity_change
+        def apply(conn, cursor):
+            cursor.execute(f'''
+                UPDATE inventory_batches
+                SET stock = stock + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE item_id = {target_sql} AND stock + ? >= 0
+            ''', (quantity_change, *target_params, quantity_change))
 
-            if new_stock < 0:
-                print(f"Error: Insufficient stock. Current: {current_stock}, Requested: {abs(quantity_change)}")
-                conn.close()
-                return False
+            if cursor.rowcount == 1:
+                conn.commit()
+                return True
 
-            cursor.execute('''
-                UPDATE inventory
-                SET stock = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE item_id = ?
-            ''', (new_stock, target_item_id))
+            # Nothing changed: find out why for the log
+            cursor.execute(f'SELECT stock FROM inventory WHERE item_id = {target_sql}', target_params)
+            row = cursor.fetchone()
+            if not row:
+                label = f"item_id={item_id}" if item_id is not None else f"{product_name} ({size})"
+                print(f"Product not found: {label}")
+            else:
+                print(f"Error: Insufficient stock. Current: {row[0]}, Requested: {abs(quantity_change)}")
+            return False
 
-            conn.commit()
-            conn.close()
-            return True
+        try:
+            return self._run_write(apply)
         except Exception as e:
             print(f"Error updating stock: {e}")
             return False
     
     def delete_product(self, item_id):
         """Delete a product from inventory"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM inventory WHERE item_id = ?', (item_id,))
+        def apply(conn, cursor):
+            cursor.execute('DELETE FROM inventory_batches WHERE item_id = ?', (item_id,))
             conn.commit()
-            conn.close()
             return True
+        
+        try:
+            return self._run_write(apply)
         except Exception as e:
             print(f"Error deleting product: {e}")
             return False
@@ -278,6 +729,28 @@ class DatabaseManager:
             print(f"Error fetching product: {e}")
             return None
     
+    def get_product_codes(self):
+        """
+        Get every batch that has a product code
+        
+        Returns:
+            list: [(code, item_id, product_name, size, batch), ...]
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT code, item_id, product_name, size, batch
+                FROM inventory
+                WHERE code IS NOT NULL
+            ''')
+            results = cursor.fetchall()
+            conn.close()
+            return results
+        except Exception as e:
+            print(f"Error fetching product codes: {e}")
+            return []
+    
     def get_available_stock(self, product_name, size):
         """Get available stock for a specific product and size"""
         try:
@@ -294,6 +767,40 @@ class DatabaseManager:
             print(f"Error checking stock: {e}")
             return 0
     
+    def _stock_levels(self, cursor, pairs):
+        """Total stock of each (product_name, size) in `pairs`, in one query"""
+        pairs = sorted(set(pairs))
+        if not pairs:
+            return {}
+        rows = ", ".join("(?, ?)" for _ in pairs)
+        cursor.execute(f'''
+            SELECT product_name, size, SUM(stock) FROM inventory
+            WHERE (product_name, size) IN (VALUES {rows})
+            GROUP BY product_name, size
+        ''', [value for pair in pairs for value in pair])
+        levels = {pair: 0 for pair in pairs}
+        levels.update({(product_name, size): stock for product_name, size, stock in cursor.fetchall()})
+        return levels
+    
+    def get_available_stocks(self, pairs):
+        """
+        Get available stock for several product/size pairs at once
+        
+        Args:
+            pairs (list): [(product_name, size), ...]
+        
+        Returns:
+            dict: {(product_name, size): stock}, 0 for pairs not in inventory
+        """
+        try:
+            conn = self.get_connection()
+            levels = self._stock_levels(conn.cursor(), pairs)
+            conn.close()
+            return levels
+        except Exception as e:
+            print(f"Error checking stock: {e}")
+            return {pair: 0 for pair in pairs}
+    
     def get_unique_products(self):
         """Get list of unique product names"""
         try:
@@ -324,153 +831,1281 @@ class DatabaseManager:
             print(f"Error fetching sizes: {e}")
             return []
     
-    def get_first_available_batch_for_size(self, product_name, size):
-        """Get the first batch with available stock for a product/size combination"""
+    def get_first_available_batch_for_size(self, product_name, size, preferred_item_id=None):
+        """
+        Get the first batch with available stock for a product/size combination
+        
+        Args:
+            preferred_item_id (int): Batch to return if it still has stock (e.g. a scanned code)
+        """
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT item_id, product_name, size, batch, stock, price
                 FROM inventory 
                 WHERE product_name = ? AND size = ? AND stock > 0
-                ORDER BY batch ASC
+                ORDER BY item_id = ? DESC, {self.FIFO_ORDER}
                 LIMIT 1
-            ''', (product_name, size))
+            ''', (product_name, size, preferred_item_id))
             result = cursor.fetchone()
             conn.close()
-            return result
+            return result
+        except Exception as e:
+            print(f"Error fetching first available batch: {e}")
+            return None
+    
+    
+    # ========== BULK INVENTORY OPERATIONS ==========
+    
+    def get_product_batches(self, product_name):
+        """
+        Get every batch of one product, by size and in FIFO order
+        
+        Returns:
+            list: [(item_id, size, batch, stock, price), ...]
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT item_id, size, batch, stock, price
+                FROM inventory
+                WHERE product_name = ?
+                ORDER BY size, {self.FIFO_ORDER}
+            ''', (product_name,))
+            results = cursor.fetchall()
+            conn.close()
+            return results
+        except Exception as e:
+            print(f"Error fetching batches: {e}")
+            return []
+    
+    @staticmethod
+    def _restock_change(lines):
+        """Set-based change adding each line's quantity to its batch"""
+        wanted = {}
+        for item_id, quantity in lines:
+            wanted[item_id] = wanted.get(item_id, 0) + quantity
+        rows = ", ".join("(?, ?)" for _ in wanted)
+        return {
+            'with': f"WITH delivery (item_id, quantity) AS (VALUES {rows})",
+            'with_params': [value for line in wanted.items() for value in line],
+            'column': 'stock',
+            'value': "inventory_batches.stock + (SELECT quantity FROM delivery WHERE delivery.item_id = inventory_batches.item_id)",
+            'value_params': [],
+            'where': "inventory_batches.item_id IN (SELECT item_id FROM delivery)",
+            'where_params': [],
+        }
+    
+    @staticmethod
+    def _price_change(product_name, percent, size=None):
+        """Set-based change moving every price of a product (or one size of it) by `percent`"""
+        where = "inventory_batches.product_id = (SELECT product_id FROM products WHERE name = ?)"
+        where_params = [product_name]
+        if size:
+            where += " AND inventory_batches.size_id = (SELECT size_id FROM sizes WHERE label = ?)"
+            where_params.append(size)
+        return {
+            'with': "", 'with_params': [],
+            'column': 'price',
+            'value': "ROUND(inventory_batches.price * ?, 2)",
+            'value_params': [1 + percent / 100.0],
+            'where': where,
+            'where_params': where_params,
+        }
+    
+    @staticmethod
+    def _retire_change(product_name, batch):
+        """Set-based change writing off the remaining stock of one batch in every size"""
+        return {
+            'with': "", 'with_params': [],
+            'column': 'stock',
+            'value': "0",
+            'value_params': [],
+            'where': '''inventory_batches.product_id = (SELECT product_id FROM products WHERE name = ?)
+                       AND inventory_batches.batch = ? AND inventory_batches.stock > 0''',
+            'where_params': [product_name, batch],
+        }
+    
+    def _preview_change(self, change):
+        """Rows a change would touch: [(item_id, product_name, size, batch, current, new), ...]"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                {change['with']}
+                SELECT inventory_batches.item_id, p.name, s.label, inventory_batches.batch,
+                       inventory_batches.{change['column']}, {change['value']}
+                FROM inventory_batches
+                JOIN products p ON p.product_id = inventory_batches.product_id
+                JOIN sizes s ON s.size_id = inventory_batches.size_id
+                WHERE {change['where']}
+                ORDER BY p.name, s.label, inventory_batches.item_id
+            ''', change['with_params'] + change['value_params'] + change['where_params'])
+            results = cursor.fetchall()
+            conn.close()
+            return results
+        except Exception as e:
+            print(f"Error previewing inventory change: {e}")
+            return []
+    
+    def _apply_change(self, change, expected=None):
+        """
+        Apply a change as one UPDATE in one write transaction
+        
+        Args:
+            expected (int): Rows the preview showed; if the batches changed since,
+                nothing is applied
+        
+        Returns:
+            tuple: (success: bool, rows changed or error message)
+        """
+        def apply(conn, cursor):
+            cursor.execute(f'''
+                {change['with']}
+                UPDATE inventory_batches
+                SET {change['column']} = {change['value']}, updated_at = CURRENT_TIMESTAMP
+                WHERE {change['where']}
+            ''', change['with_params'] + change['value_params'] + change['where_params'])
+            # cursor.rowcount is not set for statements starting with WITH
+            changed = cursor.execute("SELECT changes()").fetchone()[0]
+            if expected is not None and changed != expected:
+                conn.rollback()
+                return False, "Inventory changed since the preview. Please preview again."
+            if change['column'] == 'price':
+                self._record_prices(cursor)
+            conn.commit()
+            return True, changed
+        
+        try:
+            return self._run_write(apply)
+        except Exception as e:
+            print(f"Error applying inventory change: {e}")
+            return False, str(e)
+    
+    def preview_restock(self, lines):
+        """
+        Batches a delivery would restock
+        
+        Args:
+            lines (list): [(item_id, quantity), ...]; an item may appear more than once
+        
+        Returns:
+            list: [(item_id, product_name, size, batch, stock, new_stock), ...]
+        """
+        return self._preview_change(self._restock_change(lines)) if lines else []
+    
+    def restock_batches(self, lines, expected=None):
+        """
+        Add a delivery of many size/batch lines to stock in one statement
+        
+        Returns:
+            tuple: (success: bool, batches restocked or error message)
+        """
+        if not lines:
+            return False, "Nothing to restock"
+        if any(quantity <= 0 for _, quantity in lines):
+            return False, "Quantities must be positive"
+        return self._apply_change(self._restock_change(lines), expected)
+    
+    def preview_price_change(self, product_name, percent, size=None):
+        """
+        Batches a percentage price change would reprice (rounded to centavos)
+        
+        Returns:
+            list: [(item_id, product_name, size, batch, price, new_price), ...]
+        """
+        return self._preview_change(self._price_change(product_name, percent, size))
+    
+    def change_prices(self, product_name, percent, size=None, expected=None):
+        """
+        Raise (or with a negative percent, lower) every price of a product, or of one
+        size of it, in one statement
+        
+        Returns:
+            tuple: (success: bool, batches repriced or error message)
+        """
+        if percent <= -100:
+            return False, "Prices cannot drop by 100% or more"
+        return self._apply_change(self._price_change(product_name, percent, size), expected)
+    
+    def preview_retire_batch(self, product_name, batch):
+        """
+        Sizes of a batch that still have stock to write off
+        
+        Returns:
+            list: [(item_id, product_name, size, batch, stock, 0), ...]
+        """
+        return self._preview_change(self._retire_change(product_name, batch))
+    
+    def retire_batch(self, product_name, batch, expected=None):
+        """
+        Take a batch out of sale in every size by writing off its remaining stock;
+        the batch rows stay, as past sales were allocated to them
+        
+        Returns:
+            tuple: (success: bool, batches retired or error message)
+        """
+        return self._apply_change(self._retire_change(product_name, batch), expected)
+    
+    def upsert_inventory(self, rows, add_stock=True):
+        """
+        Insert or update many batches in one write, keyed by product, size and batch
+        
+        All rows go through one executemany of INSERT ... ON CONFLICT DO UPDATE, so
+        either every row is saved or none is. A row for an existing batch takes the
+        new price.
+        
+        Args:
+            rows (list): [(product_name, size, batch, stock, price), ...]
+            add_stock (bool): True adds the stock to existing batches (a delivery);
+                False replaces it (a stock count)
+        
+        Returns:
+            tuple: (inserted, updated) batch counts, or None on error
+        """
+        stock_sql = "inventory_batches.stock + excluded.stock" if add_stock else "excluded.stock"
+        
+        def apply(conn, cursor):
+            cursor.execute("SELECT product_name, size, batch FROM inventory")
+            existing = set(cursor.fetchall())
+            keys = {}
+            values, inserted = [], 0
+            for product_name, size, batch, stock, price in rows:
+                if (product_name, size) not in keys:
+                    keys[(product_name, size)] = self._product_size_ids(cursor, product_name, size)
+                if (product_name, size, batch) not in existing:
+                    existing.add((product_name, size, batch))
+                    inserted += 1
+                values.append((*keys[(product_name, size)], batch, stock, price))
+            
+            cursor.executemany(f'''
+                INSERT INTO inventory_batches (product_id, size_id, batch, stock, price)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (product_id, size_id, batch) DO UPDATE SET
+                    stock = {stock_sql},
+                    price = excluded.price,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', values)
+            self._record_prices(cursor)
+            conn.commit()
+            return inserted, len(values) - inserted
+        
+        try:
+            return self._run_write(apply)
+        except Exception as e:
+            print(f"Error importing inventory: {e}")
+            return None
+    
+    # ========== PRICE HISTORY ==========
+    
+    def _record_prices(self, cursor, item_ids=None):
+        """
+        Add the current price of batches whose price changed to the price history,
+        effective now (local time, as sale dates are); called in the same write as
+        the change
+        
+        Args:
+            item_ids (list): Batches to check; None checks every batch
+        """
+        where, params = "", []
+        if item_ids is not None:
+            where = f"AND b.item_id IN ({', '.join('?' for _ in item_ids)})"
+            params = list(item_ids)
+        cursor.execute(f'''
+            INSERT INTO price_history (item_id, effective_from, price)
+            SELECT b.item_id, datetime('now', 'localtime'), b.price
+            FROM inventory_batches b
+            WHERE b.price IS NOT (SELECT h.price FROM price_history h WHERE h.item_id = b.item_id
+                                  ORDER BY h.effective_from DESC LIMIT 1)
+            {where}
+            ON CONFLICT (item_id, effective_from) DO UPDATE SET price = excluded.price
+        ''', params)
+    
+    @staticmethod
+    def _price_as_of_sql(item_sql, date_sql):
+        """
+        SQL for the price of batch `item_sql` on date `date_sql`: the last price set
+        by the end of that day, or the first price on record for dates before the
+        history starts; one or two seeks on the price_history primary key
+        """
+        return f'''COALESCE(
+            (SELECT h.price FROM price_history h
+             WHERE h.item_id = {item_sql} AND h.effective_from < date({date_sql}, '+1 day')
+             ORDER BY h.effective_from DESC LIMIT 1),
+            (SELECT h.price FROM price_history h
+             WHERE h.item_id = {item_sql} ORDER BY h.effective_from LIMIT 1))'''
+    
+    def get_price_history(self, item_id):
+        """
+        Get every price a batch has had
+        
+        Returns:
+            list: [(effective_from, price), ...] oldest first
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT effective_from, price FROM price_history
+                WHERE item_id = ?
+                ORDER BY effective_from
+            ''', (item_id,))
+            results = cursor.fetchall()
+            conn.close()
+            return results
+        except Exception as e:
+            print(f"Error fetching price history: {e}")
+            return []
+    
+    def get_price_as_of(self, item_id, as_of):
+        """
+        Price of a batch on a date (YYYY-MM-DD), e.g. for a backdated sale
+        
+        Returns:
+            float: Price, or None if the batch has no price on record
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {self._price_as_of_sql('?', '?')}", (item_id, as_of, item_id))
+            result = cursor.fetchone()[0]
+            conn.close()
+            return result
+        except Exception as e:
+            print(f"Error fetching price: {e}")
+            return None
+    
+    def get_product_price_as_of(self, product_name, size, as_of):
+        """
+        Price a product/size sold for on a date: that of the first batch (FIFO) that
+        had a price by then, or of the first batch if none had
+        
+        Returns:
+            float: Price, or None if the product/size has no batches
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {self._price_as_of_sql('item_id', '?')}
+                FROM inventory
+                WHERE product_name = ? AND size = ?
+                ORDER BY EXISTS(SELECT 1 FROM price_history h
+                                WHERE h.item_id = inventory.item_id AND h.effective_from < date(?, '+1 day')) DESC,
+                         {self.FIFO_ORDER}
+                LIMIT 1
+            ''', (as_of, product_name, size, as_of))
+            result = cursor.fetchone()
+            conn.close()
+            return result[0] if result else None
+        except Exception as e:
+            print(f"Error fetching price: {e}")
+            return None
+    
+    def get_sale_price(self, transaction_id, as_of=None):
+        """
+        Unit price of a sale as of its date (or `as_of`): the average over the
+        batches it was drawn from, each at its price then, so quantity × price is what
+        add_transaction() charges; sales without batch allocations (e.g. imported
+        from logbooks) use get_product_price_as_of()
+        
+        Returns:
+            float: Price, or None if the sale or its product is gone
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT t.product_name, t.size, COALESCE(?, t.date),
+                       (SELECT SUM(a.quantity * {self._price_as_of_sql('a.item_id', 'COALESCE(?, t.date)')})
+                               * 1.0 / SUM(a.quantity)
+                        FROM transaction_allocations a WHERE a.transaction_id = t.transaction_id)
+                FROM transactions t
+                WHERE t.transaction_id = ?
+            ''', (as_of, as_of, transaction_id))
+            row = cursor.fetchone()
+            conn.close()
+        except Exception as e:
+            print(f"Error fetching sale price: {e}")
+            return None
+        if row is None:
+            return None
+        product_name, size, sale_date, price = row
+        return price if price is not None else self.get_product_price_as_of(product_name, size, sale_date)
+    
+    def get_price_variance(self, start_date, end_date):
+        """
+        Charged amounts against list prices at the time of sale, per product/size
+        
+        Each sale's list amount is what add_transaction() would charge on its date:
+        every portion of its batch split at that batch's as-of price, so discounts,
+        overcharges and typed-over amounts show up even after prices have changed.
+        Each price is looked up once per batch and date. Sales without batch
+        allocations (imported from logbooks) are unpriced.
+        
+        Returns:
+            list: [(product_name, size, sales, quantity, charged, list_amount,
+                difference, off_list, unpriced), ...] where charged, list_amount
+                and difference cover priced sales only and off_list counts sales
+                charged differently from list
+        """
+        try:
+            conn = self.get_read_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                WITH ranged AS (
+                    SELECT transaction_id, product_id, size_id, quantity, amount, date
+                    FROM sales
+                    WHERE date BETWEEN ? AND ?
+                ),
+                prices AS (
+                    SELECT a.item_id, r.date, {self._price_as_of_sql('a.item_id', 'r.date')} AS price
+                    FROM ranged r
+                    JOIN transaction_allocations a ON a.transaction_id = r.transaction_id
+                    GROUP BY a.item_id, r.date
+                ),
+                listed AS (
+                    SELECT r.product_id, r.size_id, r.quantity, r.amount,
+                           SUM(a.quantity * x.price) AS list_amount
+                    FROM ranged r
+                    LEFT JOIN transaction_allocations a ON a.transaction_id = r.transaction_id
+                    LEFT JOIN prices x ON x.item_id = a.item_id AND x.date = r.date
+                    GROUP BY r.transaction_id
+                )
+                SELECT p.name, z.label, l.quantity, l.amount, COUNT(*), l.list_amount
+                FROM listed l
+                JOIN products p ON p.product_id = l.product_id
+                JOIN sizes z ON z.size_id = l.size_id
+                GROUP BY l.product_id, l.size_id, l.quantity, l.amount, l.list_amount
+            ''', (start_date, end_date))
+            groups = cursor.fetchall()
+            conn.close()
+        except Exception as e:
+            print(f"Error generating price variance: {e}")
+            return []
+        
+        totals = {}
+        for product_name, size, quantity, amount, count, list_amount in groups:
+            # [sales, quantity, charged, list_amount, off_list, unpriced]
+            total = totals.setdefault((product_name, size), [0, 0, 0.0, 0.0, 0, 0])
+            total[0] += count
+            total[1] += quantity * count
+            if list_amount is None:
+                total[5] += count
+                continue
+            total[2] += amount * count
+            total[3] += list_amount * count
+            if round(amount - list_amount, 2):
+                total[4] += count
+        return [(product_name, size, sales, quantity, round(charged, 2), round(list_amount, 2),
+                 round(charged - list_amount, 2), off_list, unpriced)
+                for (product_name, size), (sales, quantity, charged, list_amount, off_list, unpriced)
+                in sorted(totals.items())]
+    
+    # ========== BATCH ALLOCATION ==========
+    
+    def _fifo_split(self, cursor, product_name, size, quantity, preferred_item_id=None, date=None, skip=0):
+        """
+        Per-batch split of a sale of a product/size in FIFO order, priced per batch
+        
+        Each portion is priced at its own batch's price: that of the sale date for
+        a backdated sale, the current one otherwise.
+        
+        Args:
+            preferred_item_id (int): Batch to draw from first (e.g. the one shown in the form)
+            date (str): Sale date (YYYY-MM-DD)
+            skip (int): Pieces taken first by earlier lines of the same receipt
+        
+        Returns:
+            list: [(item_id, batch, quantity, price), ...]; covers less than `quantity`
+                if stock is short
+        """
+        cursor.execute(f'''
+            WITH fifo AS (
+                SELECT item_id, batch, stock, price,
+                       SUM(stock) OVER (
+                           ORDER BY item_id = ? DESC, {self.FIFO_ORDER}
+                           ROWS UNBOUNDED PRECEDING
+                       ) AS running
+                FROM inventory
+                WHERE product_name = ? AND size = ? AND stock > 0
+            )
+            SELECT item_id, batch, MIN(running, ?) - MAX(running - stock, ?),
+                   CASE WHEN date(?) < date('now', 'localtime')
+                        THEN COALESCE({self._price_as_of_sql('item_id', '?')}, price)
+                        ELSE price END
+            FROM fifo
+            WHERE running > ? AND running - stock < ?
+            ORDER BY running
+        ''', (preferred_item_id, product_name, size, skip + quantity, skip, date, date, skip, skip + quantity))
+        return cursor.fetchall()
+    
+    def _allocate_fifo(self, cursor, product_name, size, quantity, preferred_item_id=None, date=None):
+        """
+        Deduct a sale quantity from the batches of a product/size in FIFO order.
+        
+        The per-batch split is computed by a single windowed query and applied with
+        one guarded UPDATE per touched batch on the caller's cursor, so it commits or
+        rolls back together with the transaction row.
+        
+        Args:
+            preferred_item_id (int): Batch to draw from first (e.g. the one shown in the form)
+            date (str): Sale date, for the batch prices (see _fifo_split)
+        
+        Returns:
+            list: [(item_id, quantity, price), ...] or None if stock is insufficient
+        """
+        if quantity <= 0:
+            return []
+        
+        split = [(item_id, qty, price) for item_id, _, qty, price
+                 in self._fifo_split(cursor, product_name, size, quantity, preferred_item_id, date)]
+        
+        if sum(qty for _, qty, _ in split) < quantity:
+            return None
+        
+        cursor.executemany('''
+            UPDATE inventory_batches
+            SET stock = stock - ?, updated_at = CURRENT_TIMESTAMP
+            WHERE item_id = ? AND stock >= ?
+        ''', [(qty, item_id, qty) for item_id, qty, _ in split])
+        
+        # A concurrent writer drained one of the batches after the split was computed
+        if cursor.rowcount != len(split):
+            return None
+        return split
+    
+    @staticmethod
+    def _split_amount(split):
+        """Amount charged for an allocated split: each portion at its batch's price"""
+        return round(sum(qty * (price or 0) for _, qty, price in split), 2)
+    
+    def quote_split(self, product_name, size, quantity, preferred_item_id=None, as_of=None, reserved=0):
+        """
+        How a sale would be split across batches (FIFO) and what each portion costs,
+        without taking any stock; add_transaction() charges the same split
+        
+        Args:
+            preferred_item_id (int): Batch to draw from first
+            as_of (str): Sale date (YYYY-MM-DD); a backdated sale is priced as of then
+            reserved (int): Pieces of the same product/size taken by earlier cart lines
+        
+        Returns:
+            list: [(item_id, batch, quantity, price), ...]; covers less than
+                `quantity` if stock is short
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            split = self._fifo_split(cursor, product_name, size, quantity, preferred_item_id, as_of, reserved)
+            conn.close()
+            return split
+        except Exception as e:
+            print(f"Error quoting sale: {e}")
+            return []
+    
+    def _release_allocations(self, cursor, transaction_id, product_name, size, quantity):
+        """
+        Return the stock of a recorded sale to the exact batches it was taken from.
+        
+        Sales recorded before per-batch tracking (or whose batch has since been
+        deleted) are returned to the first FIFO batch of the product/size instead.
+        
+        Returns:
+            bool: True if the whole quantity was restored
+        """
+        cursor.execute('''
+            SELECT item_id, quantity FROM transaction_allocations
+            WHERE transaction_id = ?
+        ''', (transaction_id,))
+        split = cursor.fetchall()
+        
+        unplaced = quantity if not split else 0
+        for item_id, qty in split:
+            cursor.execute('''
+                UPDATE inventory_batches
+                SET stock = stock + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE item_id = ?
+            ''', (qty, item_id))
+            if cursor.rowcount == 0:
+                unplaced += qty
+        
+        cursor.execute('DELETE FROM transaction_allocations WHERE transaction_id = ?', (transaction_id,))
+        
+        if unplaced:
+            cursor.execute(f'''
+                UPDATE inventory_batches
+                SET stock = stock + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE item_id = (
+                    SELECT item_id FROM inventory
+                    WHERE product_name = ? AND size = ?
+                    ORDER BY {self.FIFO_ORDER}
+                    LIMIT 1
+                )
+            ''', (unplaced, product_name, size))
+            return cursor.rowcount == 1
+        return True
+    
+    def _record_allocations(self, cursor, transaction_id, split):
+        """Store the per-batch split of a sale"""
+        cursor.executemany('''
+            INSERT INTO transaction_allocations (transaction_id, item_id, quantity)
+            VALUES (?, ?, ?)
+        ''', [(transaction_id, item_id, qty) for item_id, qty, _ in split])
+    
+    # ========== SALES VELOCITY ==========
+    
+    def _record_velocity(self, cursor, product_name, size, quantity, date):
+        """
+        Fold a sale (negative quantity to undo one) into the product/size's velocity
+        
+        Runs inside the caller's write transaction, so the read-modify-write is atomic.
+        """
+        cursor.execute("SELECT decayed_qty, last_date FROM sales_velocity WHERE product_name = ? AND size = ?",
+                       (product_name, size))
+        row = cursor.fetchone()
+        decayed_qty, last_date = row if row else (0.0, None)
+        if last_date is None and quantity <= 0:
+            return
+        decayed_qty, last_date = forecasting.fold_sale(decayed_qty, last_date, quantity, date)
+        cursor.execute('''
+            INSERT OR REPLACE INTO sales_velocity (product_name, size, decayed_qty, last_date)
+            VALUES (?, ?, ?, ?)
+        ''', (product_name, size, decayed_qty, last_date))
+    
+    @staticmethod
+    def _velocity_since():
+        """Oldest sale date that still carries weight (ten half-lives, under 0.1%)"""
+        return datetime.fromordinal(
+            datetime.now().toordinal() - int(forecasting.HALF_LIFE_DAYS * 10)).strftime("%Y-%m-%d")
+    
+    def rebuild_sales_velocity(self):
+        """
+        Recompute every velocity from the transactions table
+        
+        Only needed once for databases that predate the sales_velocity table; after
+        that each sale updates its own row.
+        """
+        since = self._velocity_since()
+        
+        def rebuild(conn, cursor):
+            cursor.execute('''
+                SELECT p.name, z.label, g.date, g.quantity
+                FROM (
+                    SELECT product_id, size_id, date, SUM(quantity) AS quantity
+                    FROM sales
+                    WHERE date >= ?
+                    GROUP BY product_id, size_id, date
+                ) g
+                JOIN products p ON p.product_id = g.product_id
+                JOIN sizes z ON z.size_id = g.size_id
+                ORDER BY g.date
+            ''', (since,))
+            velocity = {}
+            for product_name, size, date, quantity in cursor.fetchall():
+                decayed_qty, last_date = velocity.get((product_name, size), (0.0, None))
+                velocity[(product_name, size)] = forecasting.fold_sale(decayed_qty, last_date, quantity, date)
+            
+            cursor.execute("DELETE FROM sales_velocity")
+            cursor.executemany('''
+                INSERT INTO sales_velocity (product_name, size, decayed_qty, last_date)
+                VALUES (?, ?, ?, ?)
+            ''', [key + value for key, value in velocity.items()])
+            conn.commit()
+            return True
+        
+        try:
+            return self._run_write(rebuild)
+        except Exception as e:
+            print(f"Error rebuilding sales velocity: {e}")
+            return False
+    
+    def get_stock_forecast(self, today=None):
+        """
+        Sales velocity and projected days until stockout for every product/size
+        
+        Reads only inventory and sales_velocity (one row per product/size), never
+        the transactions table, so it is cheap enough to run on every refresh.
+        
+        Returns:
+            dict: {(product_name, size): (stock, units_per_day, days_left)}
+                  days_left is None for items with no recent sales
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT i.product_name, i.size, SUM(i.stock), v.decayed_qty, v.last_date
+                FROM inventory i
+                LEFT JOIN sales_velocity v ON v.product_name = i.product_name AND v.size = i.size
+                GROUP BY i.product_name, i.size
+            ''')
+            rows = cursor.fetchall()
+            conn.close()
+        except Exception as e:
+            print(f"Error fetching stock forecast: {e}")
+            return {}
+        
+        forecast = {}
+        for product_name, size, stock, decayed_qty, last_date in rows:
+            rate = forecasting.daily_rate(decayed_qty, last_date, today)
+            forecast[(product_name, size)] = (stock, rate, forecasting.days_until_stockout(stock, rate))
+        return forecast
+    
+    def get_reorder_alerts(self, within_days=forecasting.REORDER_DAYS, today=None):
+        """
+        Products/sizes projected to run out within `within_days`, soonest first
+        
+        Returns:
+            list: [(product_name, size, stock, units_per_day, days_left), ...]
+        """
+        alerts = [
+            key + value for key, value in self.get_stock_forecast(today).items()
+            if value[2] is not None and value[2] <= within_days
+        ]
+        return sorted(alerts, key=lambda alert: (alert[4], -alert[3]))
+    
+    # ========== BUYERS ==========
+    
+    @staticmethod
+    def normalize_buyer_name(name):
+        """Buyer name with surrounding and repeated spaces removed"""
+        return " ".join((name or '').split())
+    
+    def _record_buyer(self, cursor, buyer_name, program_course, date, purchases=1):
+        """Add or refresh a buyer; the course of their most recent purchase is remembered"""
+        name = self.normalize_buyer_name(buyer_name)
+        if not name:
+            return
+        cursor.execute("SELECT 1 FROM buyers WHERE name = ?", (name,))
+        if cursor.fetchone() is None:
+            cursor.executemany("INSERT OR IGNORE INTO buyer_trigrams (trigram, name) VALUES (?, ?)",
+                               [(trigram, name) for trigram in fuzzy.trigrams(name)])
+        cursor.execute('''
+            INSERT INTO buyers (name, program_course, last_date, purchases)
+            VALUES (?, NULLIF(?, ''), ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                program_course = CASE
+                    WHEN excluded.program_course IS NOT NULL AND excluded.last_date >= last_date
+                    THEN excluded.program_course ELSE program_course END,
+                last_date = MAX(last_date, excluded.last_date),
+                purchases = purchases + excluded.purchases
+        ''', (name, (program_course or '').strip(), date, purchases))
+    
+    def _release_buyer(self, cursor, buyer_name, purchases=1):
+        """
+        Take sales back from a buyer (deleted, or moved to another name); called
+        after the sales table has been changed, in the same write
+        
+        A buyer left without purchases is removed with their trigrams, so a
+        corrected typo stops being suggested and found; otherwise their last date
+        and course are recomputed from the sales they still have.
+        """
+        name = self.normalize_buyer_name(buyer_name)
+        cursor.execute("SELECT name, purchases FROM buyers WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        if row is None:
+            return
+        name, remaining = row[0], row[1] - purchases
+        if remaining <= 0:
+            cursor.execute("DELETE FROM buyers WHERE name = ?", (name,))
+            # By primary key: the trigrams were stored under the name as the buyer was first added
+            cursor.executemany("DELETE FROM buyer_trigrams WHERE trigram = ? AND name = ?",
+                               [(trigram, name) for trigram in fuzzy.trigrams(name)])
+            return
+        cursor.execute('''
+            UPDATE buyers SET
+                purchases = ?,
+                last_date = COALESCE(
+                    (SELECT MAX(date) FROM sales WHERE buyer_name = ? COLLATE NOCASE), last_date),
+                program_course = COALESCE(
+                    (SELECT TRIM(program_course) FROM sales
+                     WHERE buyer_name = ? COLLATE NOCASE AND TRIM(program_course) <> ''
+                     ORDER BY date DESC, transaction_id DESC LIMIT 1), program_course)
+            WHERE name = ?
+        ''', (remaining, name, name, name))
+    
+    def rebuild_buyers(self):
+        """
+        Rebuild the buyer list from the sales history (migration and repair;
+        sales keep it current as they are recorded)
+        """
+        def rebuild(conn, cursor):
+            self._rebuild_buyers(cursor)
+            conn.commit()
+            return True
+        
+        try:
+            return self._run_write(rebuild)
+        except Exception as e:
+            print(f"Error rebuilding buyers: {e}")
+            return False
+    
+    def _rebuild_buyers(self, cursor):
+        """Replace the buyer list with one built from the sales history"""
+        cursor.execute("DELETE FROM buyers")
+        cursor.execute("DELETE FROM buyer_trigrams")
+        cursor.execute('''
+            SELECT buyer_name, program_course, date FROM sales
+            ORDER BY date, transaction_id
+        ''')
+        latest = {}  # name -> [program_course, last_date, purchases]
+        for buyer_name, program_course, date in cursor.fetchall():
+            name = self.normalize_buyer_name(buyer_name)
+            entry = latest.setdefault(name, [None, date, 0])
+            entry[0] = (program_course or '').strip() or entry[0]
+            entry[1] = date
+            entry[2] += 1
+        # The upsert merges names that differ only in letter case
+        for name, (program_course, date, purchases) in latest.items():
+            self._record_buyer(cursor, name, program_course, date, purchases)
+    
+    def get_buyer_suggestions(self, prefix, limit=8):
+        """
+        Buyers whose name starts with `prefix` (any case), most recent first
+        
+        The NOCASE primary key is range-scanned, so this stays fast however many
+        buyers there are.
+        
+        Returns:
+            list: [(name, program_course), ...]
+        """
+        prefix = self.normalize_buyer_name(prefix)
+        if not prefix:
+            return []
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT name, COALESCE(program_course, '') FROM buyers
+                WHERE name >= ? AND name < ?
+                ORDER BY last_date DESC, purchases DESC, name
+                LIMIT ?
+            ''', (prefix, prefix + "\U0010ffff", limit))
+            results = cursor.fetchall()
+            conn.close()
+            return results
+        except Exception as e:
+            print(f"Error fetching buyer suggestions: {e}")
+            return []
+    
+    def find_similar_buyers(self, text, limit=25, threshold=0.3):
+        """
+        Buyers whose name looks like `text`, most similar first
+        
+        Candidates sharing the most trigrams are read from the trigram index, then
+        ranked by exact trigram similarity, so "Delacruz" finds "Juan Dela Cruz" and
+        "dela cruz juan" without scanning every buyer.
+        
+        Returns:
+            list: [(name, similarity), ...] with similarity from threshold to 1.0
+        """
+        wanted = fuzzy.trigrams(text)
+        if not wanted:
+            return []
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            placeholders = ", ".join("?" for _ in wanted)
+            cursor.execute(f'''
+                SELECT name, COUNT(*) AS shared FROM buyer_trigrams
+                WHERE trigram IN ({placeholders})
+                GROUP BY name
+                HAVING shared >= ?
+                ORDER BY shared DESC
+                LIMIT ?
+            ''', (*wanted, max(1, int(len(wanted) * threshold)), limit * 10))
+            candidates = [name for name, _ in cursor.fetchall()]
+            conn.close()
+        except Exception as e:
+            print(f"Error searching buyers: {e}")
+            return []
+        
+        scored = [(name, fuzzy.similarity(wanted, fuzzy.trigrams(name))) for name in candidates]
+        scored = [(name, score) for name, score in scored if score >= threshold]
+        scored.sort(key=lambda match: (-match[1], match[0]))
+        return scored[:limit]
+    
+    # ========== OR NUMBERS ==========
+    
+    @staticmethod
+    def split_or_number(or_number):
+        """
+        Booklet and serial number of an OR number: "A-000123" -> ("A-", 123),
+        "0012345" -> ("", 12345)
+        
+        Spaces and letter case are ignored. An OR number without trailing digits is
+        its own booklet with serial None.
+        """
+        text = "".join((or_number or '').split()).upper()
+        match = re.match(r"(.*?)(\d+)$", text)
+        if not match:
+            return text, None
+        return match.group(1), int(match.group(2))
+    
+    def _record_or_numbers(self, cursor, sales):
+        """Register the OR numbers of [(transaction_id, or_number), ...]"""
+        cursor.executemany(
+            "INSERT OR REPLACE INTO or_numbers (transaction_id, booklet, serial) VALUES (?, ?, ?)",
+            [(transaction_id, *self.split_or_number(or_number)) for transaction_id, or_number in sales])
+    
+    def rebuild_or_numbers(self):
+        """Re-register the OR number of every sale (migration and repair)"""
+        def rebuild(conn, cursor):
+            cursor.execute("DELETE FROM or_numbers")
+            cursor.execute("SELECT transaction_id, or_number FROM sales")
+            self._record_or_numbers(cursor, cursor.fetchall())
+            conn.commit()
+            return True
+        
+        try:
+            return self._run_write(rebuild)
+        except Exception as e:
+            print(f"Error rebuilding OR numbers: {e}")
+            return False
+    
+    def find_or_number_uses(self, or_number):
+        """
+        Receipts already recorded under an OR number (matched by booklet and serial,
+        so "123" and "00123" are the same number)
+        
+        Returns:
+            list: [(buyer_name, date, items), ...] oldest first
+        """
+        booklet, serial = self.split_or_number(or_number)
+        if not booklet and serial is None:
+            return []
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT MIN(s.buyer_name), s.date, COUNT(*)
+                FROM or_numbers r
+                JOIN sales s ON s.transaction_id = r.transaction_id
+                WHERE r.booklet = ? AND r.serial IS ?
+                GROUP BY s.buyer_name COLLATE NOCASE, s.date
+                ORDER BY s.date
+            ''', (booklet, serial))
+            results = cursor.fetchall()
+            conn.close()
+            return results
         except Exception as e:
-            print(f"Error fetching first available batch: {e}")
+            print(f"Error looking up OR number: {e}")
+            return []
+    
+    def get_or_number_audit(self, start_date, end_date):
+        """
+        Duplicate and skipped OR numbers per receipt booklet between two dates
+        
+        A receipt is the sales of one buyer on one day under one OR number (a cart
+        of several items is one receipt). An OR number on more than one receipt is
+        a duplicate, also when the other receipt is older than the period (a reused
+        number); serial numbers missing between two freshly used ones in a booklet
+        are a gap, found with a window over the booklet's serials. A jump of more
+        than a booklet (reports.or_booklet_size) is another series, not a gap: plain
+        numbers of any length share the booklet "".
+        
+        Returns:
+            dict: 'receipts' and 'booklets' counted in the period,
+                  'duplicates' [(or_number, [(buyer_name, date, items), ...]), ...],
+                  'gaps' [(booklet, first_missing, last_missing), ...];
+                  None on error
+        """
+        def read(cursor):
+            cursor.execute('''
+                WITH used AS (
+                    SELECT DISTINCT r.booklet, r.serial
+                    FROM sales s
+                    JOIN or_numbers r ON r.transaction_id = s.transaction_id
+                    WHERE s.date >= ? AND s.date <= ?
+                ), receipts AS (
+                    SELECT r.booklet, r.serial, MIN(s.or_number) AS or_number,
+                           MIN(s.buyer_name) AS buyer_name, s.date, COUNT(*) AS items
+                    FROM used u
+                    JOIN or_numbers r ON r.booklet = u.booklet AND r.serial IS u.serial
+                    JOIN sales s ON s.transaction_id = r.transaction_id
+                    GROUP BY r.booklet, r.serial, s.buyer_name COLLATE NOCASE, s.date
+                ), serials AS (
+                    SELECT booklet, serial, COUNT(*) AS uses, MIN(date) >= ? AS fresh,
+                           SUM(date >= ? AND date <= ?) AS in_period
+                    FROM receipts
+                    GROUP BY booklet, serial
+                ), sequence AS (
+                    SELECT booklet, serial, LAG(serial) OVER (PARTITION BY booklet ORDER BY serial) AS previous
+                    FROM serials
+                    WHERE fresh AND serial IS NOT NULL
+                )
+                SELECT 'totals', NULL, NULL, NULL, NULL,
+                       (SELECT SUM(in_period) FROM serials), (SELECT COUNT(DISTINCT booklet) FROM serials)
+                UNION ALL
+                SELECT 'duplicate', r.booklet, r.serial, r.or_number, r.buyer_name, r.date, r.items
+                FROM serials n
+                JOIN receipts r ON r.booklet = n.booklet AND r.serial IS n.serial
+                WHERE n.uses > 1
+                UNION ALL
+                SELECT 'gap', booklet, serial, previous, NULL, NULL, NULL
+                FROM sequence
+                WHERE serial - previous > 1 AND serial - previous <= ?
+                ORDER BY 1, 2, 3, 6
+            ''', (start_date, end_date, start_date, start_date, end_date, self.or_booklet_size))
+            return cursor.fetchall()
+        
+        try:
+            rows = self._run_read(read)
+        except Exception as e:
+            print(f"Error auditing OR numbers: {e}")
             return None
+        
+        audit = {'receipts': 0, 'booklets': 0, 'duplicates': [], 'gaps': []}
+        duplicates = {}
+        for kind, booklet, serial, value, buyer_name, date, items in rows:
+            if kind == 'totals':
+                audit['receipts'], audit['booklets'] = date or 0, items
+            elif kind == 'duplicate':
+                duplicates.setdefault((booklet, serial), (value, []))[1].append((buyer_name, date, items))
+            else:
+                audit['gaps'].append((booklet, value + 1, serial - 1))
+        audit['duplicates'] = list(duplicates.values())
+        return audit
+    
+    # ========== TRANSACTION OPERATIONS ==========
     
+    def _journal_change(self, cursor, transaction_id, date, product_name, quantity, amount):
+        """Journal a signed change to a sale (negative quantity/amount takes it back)"""
+        cursor.execute('''
+            INSERT INTO transaction_changes (transaction_id, date, product_name, quantity, amount)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (transaction_id, date, product_name, quantity, amount))
     
     def add_transaction(self, buyer_name, product_name, size, quantity, amount, or_number, date=None, program_course=None, item_id=None):
-        """Add a new sales transaction"""
-        try:
-            if date is None:
-                date = datetime.now().strftime("%Y-%m-%d")
-            
+        """
+        Add a new sales transaction
+        
+        Stock is taken across batches in FIFO order (starting with `item_id` if given),
+        so a sale larger than a single batch is split instead of rejected.
+        
+        Args:
+            amount (float): Amount charged; None charges each batch's portion at that
+                batch's price (as of `date`)
+        """
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        
+        def record(conn, cursor):
             # Check and update stock
-            if not self.update_stock(product_name, size, -quantity, item_id=item_id):
+            split = self._allocate_fifo(cursor, product_name, size, quantity, preferred_item_id=item_id, date=date)
+            if split is None:
+                print(f"Error: Insufficient stock for {product_name} ({size}). Requested: {quantity}")
+                conn.rollback()
                 return False
+            charged = amount if amount is not None else self._split_amount(split)
             
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
+            product_id, size_id = self._product_size_ids(cursor, product_name, size)
             cursor.execute('''
-                INSERT INTO transactions (buyer_name, program_course, product_name, size, quantity, amount, or_number, date)
+                INSERT INTO sales (buyer_name, program_course, product_id, size_id, quantity, amount, or_number, date)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (buyer_name, program_course, product_name, size, quantity, amount, or_number, date))
+            ''', (buyer_name, program_course, product_id, size_id, quantity, charged, or_number, date))
+            transaction_id = cursor.lastrowid
+            self._record_allocations(cursor, transaction_id, split)
+            self._record_or_numbers(cursor, [(transaction_id, or_number)])
+            self._record_velocity(cursor, product_name, size, quantity, date)
+            self._record_buyer(cursor, buyer_name, program_course, date)
             
             conn.commit()
-            conn.close()
             return True
+        
+        try:
+            return self._run_write(record)
         except Exception as e:
             print(f"Error adding transaction: {e}")
             return False
 
+    def add_receipt(self, buyer_name, or_number, items, date=None, program_course=None):
+        """
+        Record every line of one receipt (OR number) as a single write
+        
+        Stock for all lines is checked in one query, each line is allocated FIFO, and
+        the sales and their batch splits are inserted with executemany, so either the
+        whole receipt is saved or none of it is.
+        
+        Args:
+            items (list): [(product_name, size, quantity, amount, item_id), ...]; an
+                amount of None is priced per batch as in add_transaction()
+        
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        if not items:
+            return False, "The cart is empty"
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        
+        wanted = {}
+        for product_name, size, quantity, _, _ in items:
+            wanted[(product_name, size)] = wanted.get((product_name, size), 0) + quantity
+        
+        def record(conn, cursor):
+            levels = self._stock_levels(cursor, wanted)
+            short = [f"{product_name} ({size}): {levels[(product_name, size)]} available, {quantity} needed"
+                     for (product_name, size), quantity in wanted.items() if quantity > levels[(product_name, size)]]
+            if short:
+                conn.rollback()
+                return False, "Insufficient stock:\n" + "\n".join(short)
+            
+            # Explicit ids (we hold the write lock) so the batch splits can be inserted in bulk too
+            cursor.execute('''
+                SELECT MAX(COALESCE((SELECT MAX(transaction_id) FROM sales), 0),
+                           COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'sales'), 0))
+            ''')
+            next_id = cursor.fetchone()[0] + 1
+            
+            keys = {pair: self._product_size_ids(cursor, *pair) for pair in wanted}
+            sales, allocations = [], []
+            for offset, (product_name, size, quantity, amount, item_id) in enumerate(items):
+                split = self._allocate_fifo(cursor, product_name, size, quantity, preferred_item_id=item_id, date=date)
+                if split is None:
+                    conn.rollback()
+                    return False, f"Stock for {product_name} ({size}) changed while saving. Please try again."
+                if amount is None:
+                    amount = self._split_amount(split)
+                sales.append((next_id + offset, buyer_name, program_course, *keys[(product_name, size)],
+                              quantity, amount, or_number, date))
+                allocations.extend((next_id + offset, alloc_item_id, qty) for alloc_item_id, qty, _ in split)
+            
+            cursor.executemany('''
+                INSERT INTO sales (transaction_id, buyer_name, program_course, product_id, size_id, quantity, amount, or_number, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', sales)
+            cursor.executemany('''
+                INSERT INTO transaction_allocations (transaction_id, item_id, quantity)
+                VALUES (?, ?, ?)
+            ''', allocations)
+            self._record_or_numbers(cursor, [(sale[0], or_number) for sale in sales])
+            for (product_name, size), quantity in wanted.items():
+                self._record_velocity(cursor, product_name, size, quantity, date)
+            self._record_buyer(cursor, buyer_name, program_course, date, len(items))
+            
+            conn.commit()
+            return True, f"{len(items)} item(s) saved under OR {or_number}"
+        
+        try:
+            return self._run_write(record)
+        except Exception as e:
+            print(f"Error adding receipt: {e}")
+            return False, str(e)
+    
     def update_transaction(self, transaction_id, buyer_name, product_name, size, quantity, amount, or_number, date):
         """
         Update a transaction and adjust inventory if product/qty changed
         Returns: (success: bool, message: str)
         """
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
+        def apply(conn, cursor):
             # 1. Get old transaction details
-            cursor.execute("SELECT product_name, size, quantity FROM transactions WHERE transaction_id = ?", (transaction_id,))
+            cursor.execute('''
+                SELECT product_name, size, quantity, date, amount, buyer_name, program_course
+                FROM transactions WHERE transaction_id = ?
+            ''', (transaction_id,))
             old_data = cursor.fetchone()
             
             if not old_data:
-                conn.close()
+                conn.rollback()
                 return False, "Transaction not found"
             
-            old_prod, old_size, old_qty = old_data
+            old_prod, old_size, old_qty, old_date, old_amount, old_buyer, old_course = old_data
             
-            # 2. Handle Inventory Updates
-            cursor.execute("SELECT item_id, stock FROM inventory WHERE product_name = ? AND size = ? ORDER BY batch ASC, item_id ASC LIMIT 1", (old_prod, old_size))
-            old_stock_row = cursor.fetchone()
-            old_item_id = None
-            old_stock = 0
-            if old_stock_row:
-                old_item_id, old_stock = old_stock_row
-                cursor.execute("UPDATE inventory SET stock = ? WHERE item_id = ?", (old_stock + old_qty, old_item_id))
+            # 2. Handle Inventory Updates: give the old split back, then allocate afresh
+            self._release_allocations(cursor, transaction_id, old_prod, old_size, old_qty)
 
-            cursor.execute("SELECT item_id, stock FROM inventory WHERE product_name = ? AND size = ? ORDER BY batch ASC, item_id ASC LIMIT 1", (product_name, size))
-            new_stock_row = cursor.fetchone()
-            if not new_stock_row:
+            cursor.execute("SELECT COUNT(*), COALESCE(SUM(stock), 0) FROM inventory WHERE product_name = ? AND size = ?", (product_name, size))
+            batch_count, current_stock = cursor.fetchone()
+            if not batch_count:
                 conn.rollback() # Undo revert
-                conn.close()
                 return False, f"Product {product_name} ({size}) not found in inventory"
 
-            new_item_id, new_stock = new_stock_row
-
-            if product_name == old_prod and size == old_size and old_stock_row:
-                current_stock = old_stock + old_qty
-            else:
-                current_stock = new_stock
-
             if current_stock < quantity:
                 conn.rollback() # Undo revert
-                conn.close()
                 return False, f"Insufficient stock for {product_name} ({size}). Available: {current_stock}"
 
-            # Deduct from the selected/new batch it
-            cursor.execute("UPDATE inventory SET stock = ? WHERE item_id = ?", (current_stock - quantity, new_item_id))
+            split = self._allocate_fifo(cursor, product_name, size, quantity)
+            if split is None:
+                conn.rollback()
+                return False, f"Stock for {product_name} ({size}) changed while saving. Please try again."
+            self._record_allocations(cursor, transaction_id, split)
+            self._record_velocity(cursor, old_prod, old_size, -old_qty, old_date)
+            self._record_velocity(cursor, product_name, size, quantity, date)
+            self._journal_change(cursor, transaction_id, old_date, old_prod, -old_qty, -old_amount)
+            self._journal_change(cursor, transaction_id, date, product_name, quantity, amount)
             
             # 3. Update Transaction Record
+            product_id, size_id = self._product_size_ids(cursor, product_name, size)
             cursor.execute("""
-                UPDATE transactions 
-                SET buyer_name=?, product_name=?, size=?, quantity=?, amount=?, or_number=?, date=?
+                UPDATE sales 
+                SET buyer_name=?, product_id=?, size_id=?, quantity=?, amount=?, or_number=?, date=?
                 WHERE transaction_id=?
-            """, (buyer_name, product_name, size, quantity, amount, or_number, date, transaction_id))
+            """, (buyer_name, product_id, size_id, quantity, amount, or_number, date, transaction_id))
+            self._record_or_numbers(cursor, [(transaction_id, or_number)])
+            # 4. Move the sale between buyers (also recomputes the last date of an unchanged one)
+            self._release_buyer(cursor, old_buyer)
+            self._record_buyer(cursor, buyer_name, old_course, date)
             
             conn.commit()
-            conn.close()
             return True, "Transaction updated successfully"
-            
+        
+        try:
+            return self._run_write(apply)
         except Exception as e:
             print(f"Error updating transaction: {e}")
             return False, str(e)
 
     def delete_transaction(self, transaction_id):
-        """Delete a transaction and restore inventory stock"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT product_name, size, quantity FROM transactions WHERE transaction_id = ?", (transaction_id,))
+        """Delete a transaction and restore inventory stock to the batches it came from"""
+        def apply(conn, cursor):
+            cursor.execute('''
+                SELECT product_name, size, quantity, date, amount, buyer_name
+                FROM transactions WHERE transaction_id = ?
+            ''', (transaction_id,))
             row = cursor.fetchone()
             if not row:
-                conn.close()
+                conn.rollback()
                 return False
 
-            product_name, size, quantity = row
+            product_name, size, quantity, date, amount, buyer_name = row
 
             # Restore stock (add back the quantity)
-            try:
-                self.update_stock(product_name=product_name, size=size, quantity_change=quantity)
-            except Exception:
+            if not self._release_allocations(cursor, transaction_id, product_name, size, quantity):
                 # proceed to delete anyway but log
                 print(f"Warning: failed to restore stock for {product_name} ({size}) when deleting transaction {transaction_id}")
 
-            cursor.execute('DELETE FROM transactions WHERE transaction_id = ?', (transaction_id,))
+            self._record_velocity(cursor, product_name, size, -quantity, date)
+            self._journal_change(cursor, transaction_id, date, product_name, -quantity, -amount)
+            cursor.execute('DELETE FROM sales WHERE transaction_id = ?', (transaction_id,))
+            cursor.execute('DELETE FROM or_numbers WHERE transaction_id = ?', (transaction_id,))
+            self._release_buyer(cursor, buyer_name)
             conn.commit()
-            conn.close()
             return True
+        
+        try:
+            return self._run_write(apply)
         except Exception as e:
             print(f"Error deleting transaction: {e}")
             return False
     
     def get_all_transactions(self):
-        """Get all transactions"""
+        """
+        Get all transactions
+        
+        Returns:
+            list: [(transaction_id, buyer_name, product_name, size, quantity, amount,
+                or_number, date, batch), ...] newest first; batch as in SALE_BATCHES
+        """
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            # Note: We keep original column selection for compatibility with history module
-            cursor.execute('''
-                SELECT transaction_id, buyer_name, product_name, size, quantity, amount, or_number, date
+            cursor.execute(f'''
+                SELECT transaction_id, buyer_name, product_name, size, quantity, amount, or_number, date,
+                       {self.SALE_BATCHES}
                 FROM transactions
                 ORDER BY date DESC, transaction_id DESC
             ''')
@@ -481,22 +2116,65 @@ class DatabaseManager:
             print(f"Error fetching transactions: {e}")
             return []
     
-    def search_transactions(self, buyer_name=None, product_name=None, or_number=None, start_date=None, end_date=None):
-        """Search transactions with multiple filters"""
+    def export_transactions(self):
+        """
+        Get every transaction for export, oldest first, in one read
+        
+        Returns:
+            list: [(transaction_id, buyer_name, program_course, product_name, size,
+                quantity, amount, or_number, date), ...] (the report row shape)
+        """
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            query = '''
-                SELECT transaction_id, buyer_name, product_name, size, quantity, amount, or_number, date
+            return self._run_read(lambda cursor: cursor.execute('''
+                SELECT transaction_id, buyer_name, program_course, product_name, size, quantity, amount, or_number, date
                 FROM transactions
-                WHERE 1=1
-            '''
+                ORDER BY date, transaction_id
+            ''').fetchall())
+        except Exception as e:
+            print(f"Error exporting transactions: {e}")
+            return []
+    
+    def search_transactions(self, buyer_name=None, product_name=None, or_number=None, start_date=None, end_date=None,
+                            fuzzy_buyer=False):
+        """
+        Search transactions with multiple filters
+        
+        Args:
+            fuzzy_buyer (bool): Match buyers with similar names (typos, spacing, case)
+                instead of the exact text; closest names are listed first
+        
+        Returns:
+            list: Rows shaped as for get_all_transactions()
+        """
+        try:
+            order = 'date DESC, transaction_id DESC'
             params = []
-            
-            if buyer_name:
-                query += ' AND buyer_name LIKE ?'
-                params.append(f'%{buyer_name}%')
+            if buyer_name and fuzzy_buyer:
+                matches = self.find_similar_buyers(buyer_name)
+                if not matches:
+                    return []
+                # Rank each sale by how close its buyer's name is, fetched through the NOCASE buyer index
+                rows = ", ".join("(?, ?)" for _ in matches)
+                query = f'''
+                    WITH matches(name, score) AS (VALUES {rows})
+                    SELECT transaction_id, buyer_name, product_name, size, quantity, amount, or_number, date,
+                           {self.SALE_BATCHES}
+                    FROM matches
+                    JOIN transactions ON transactions.buyer_name = matches.name COLLATE NOCASE
+                    WHERE 1=1
+                '''
+                params.extend(value for match in matches for value in match)
+                order = 'matches.score DESC, ' + order
+            else:
+                query = f'''
+                    SELECT transaction_id, buyer_name, product_name, size, quantity, amount, or_number, date,
+                           {self.SALE_BATCHES}
+                    FROM transactions
+                    WHERE 1=1
+                '''
+                if buyer_name:
+                    query += ' AND buyer_name LIKE ?'
+                    params.append(f'%{buyer_name}%')
             
             if product_name:
                 query += ' AND product_name LIKE ?'
@@ -514,8 +2192,10 @@ class DatabaseManager:
                 query += ' AND date <= ?'
                 params.append(end_date)
             
-            query += ' ORDER BY date DESC, transaction_id DESC'
+            query += f' ORDER BY {order}'
             
+            conn = self.get_connection()
+            cursor = conn.cursor()
             cursor.execute(query, params)
             results = cursor.fetchall()
             conn.close()
@@ -524,94 +2204,385 @@ class DatabaseManager:
             print(f"Error searching transactions: {e}")
             return []
     
+    def _report_queries(self, cursor, where, params):
+        """Totals, detail rows and product summary for the rows matching `where`"""
+        cursor.execute(f'''
+            SELECT COUNT(*), SUM(quantity), SUM(amount)
+            FROM sales
+            WHERE {where}
+        ''', params)
+        totals = cursor.fetchone()
+        
+        cursor.execute(f'''
+            SELECT transaction_id, buyer_name, program_course, product_name, size, quantity, amount, or_number, date
+            FROM transactions
+            WHERE {where}
+            ORDER BY date, transaction_id
+        ''', params)
+        transactions = cursor.fetchall()
+        
+        # Grouped on the integer keys; names are looked up once per group, not per sale
+        cursor.execute(f'''
+            SELECT p.name, z.label, g.total_qty, g.total_amount
+            FROM (
+                SELECT product_id, size_id, SUM(quantity) as total_qty, SUM(amount) as total_amount
+                FROM sales
+                WHERE {where}
+                GROUP BY product_id, size_id
+            ) g
+            JOIN products p ON p.product_id = g.product_id
+            JOIN sizes z ON z.size_id = g.size_id
+            ORDER BY p.name, z.label
+        ''', params)
+        product_summary = cursor.fetchall()
+        
+        return {
+            'total_transactions': totals[0] or 0,
+            'total_items_sold': totals[1] or 0,
+            'total_revenue': totals[2] or 0.0,
+            'transactions': transactions,
+            'product_summary': product_summary
+        }
+    
     def get_monthly_report(self, year, month):
-        """Get monthly sales report"""
+        """
+        Get monthly sales report
+        
+        All queries read one snapshot, so the totals always agree with the
+        transaction list even while sales are being recorded.
+        """
+        start_date = f"{year}-{month:02d}-01"
+        if month == 12:
+            end_date = f"{year + 1}-01-01"
+        else:
+            end_date = f"{year}-{month + 1:02d}-01"
+        
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            start_date = f"{year}-{month:02d}-01"
-            if month == 12:
-                end_date = f"{year + 1}-01-01"
-            else:
-                end_date = f"{year}-{month + 1:02d}-01"
-            
-            cursor.execute('''
-                SELECT COUNT(*), SUM(quantity), SUM(amount)
-                FROM transactions
-                WHERE date >= ? AND date < ?
-            ''', (start_date, end_date))
-            totals = cursor.fetchone()
+            return self._run_read(lambda cursor: self._report_queries(
+                cursor, "date >= ? AND date < ?", (start_date, end_date)))
+        except Exception as e:
+            print(f"Error generating monthly report: {e}")
+            return {'total_transactions': 0, 'total_items_sold': 0, 'total_revenue': 0.0, 'transactions': [], 'product_summary': []}
+    
+    def get_date_range_report(self, start_date, end_date, workers=1):
+        """
+        Get sales report for custom date range
+        
+        By default the whole range is read from one snapshot, so its totals and
+        rows agree even while sales are edited or deleted. With workers > 1 (None
+        for reports.workers), ranges spanning reports.min_partitions months or more
+        are computed month by month in parallel instead: faster multi-year trends
+        on big databases, but each month is its own snapshot, so a sale edited or
+        deleted meanwhile may be counted twice or missed.
+        """
+        workers = self.report_workers if workers is None else workers
+        try:
+            # Count partitions over the months that hold sales, not the requested span
+            first, last = self._run_read(lambda cursor: cursor.execute(
+                "SELECT MAX(?, MIN(date)), MIN(?, MAX(date)) FROM sales", (start_date, end_date)).fetchone())
+            if first is None or first > last:
+                return dict(EMPTY_REPORT)
+            if workers != 1 and len(month_partitions(first, last)) >= self.min_partitions:
+                engine = ReportEngine(self.db_path, workers, timeout=self.busy_timeout)
+                return engine.date_range_report(start_date, end_date)
             
+            return self._run_read(lambda cursor: self._report_queries(
+                cursor, "date >= ? AND date <= ?", (start_date, end_date)))
+        except Exception as e:
+            print(f"Error generating date range report: {e}")
+            return dict(EMPTY_REPORT)
+    
+    def get_sales_activity(self, since_date, after_transaction_id=0, after_change_id=None):
+        """
+        Sales recorded and changed since a live view last looked
+        
+        Both lists are read from one snapshot so they describe the same moment.
+        Only rows dated since_date or later are returned, but the returned ids
+        always move past everything that was read. Pass after_change_id=None on
+        the first call: the view starts from the current rows, so earlier changes
+        are already reflected and are skipped.
+        
+        Returns:
+            dict: 'transactions' [(transaction_id, date, product_name, quantity, amount)],
+                  'changes' [(transaction_id, date, product_name, quantity, amount)],
+                  'last_transaction_id', 'last_change_id'; None on error
+        """
+        def read(cursor):
             cursor.execute('''
-                SELECT transaction_id, buyer_name, program_course, product_name, size, quantity, amount, or_number, date
+                SELECT transaction_id, date, product_name, quantity, amount
                 FROM transactions
-                WHERE date >= ? AND date < ?
-                ORDER BY date, transaction_id
-            ''', (start_date, end_date))
+                WHERE transaction_id > ? AND date >= ?
+                ORDER BY transaction_id
+            ''', (after_transaction_id, since_date))
             transactions = cursor.fetchall()
+            cursor.execute("SELECT MAX(transaction_id) FROM sales")
+            last_transaction_id = max(cursor.fetchone()[0] or 0, after_transaction_id)
             
-            cursor.execute('''
-                SELECT product_name, size, SUM(quantity) as total_qty, SUM(amount) as total_amount
-                FROM transactions
-                WHERE date >= ? AND date < ?
-                GROUP BY product_name, size
-                ORDER BY product_name, size
-            ''', (start_date, end_date))
-            product_summary = cursor.fetchall()
-            
-            conn.close()
+            if after_change_id is None:
+                cursor.execute("SELECT MAX(change_id) FROM transaction_changes")
+                last_change_id = cursor.fetchone()[0] or 0
+                changes = []
+            else:
+                cursor.execute('''
+                    SELECT change_id, transaction_id, date, product_name, quantity, amount
+                    FROM transaction_changes
+                    WHERE change_id > ?
+                    ORDER BY change_id
+                ''', (after_change_id,))
+                changes = cursor.fetchall()
+                last_change_id = changes[-1][0] if changes else after_change_id
             
             return {
-                'total_transactions': totals[0] or 0,
-                'total_items_sold': totals[1] or 0,
-                'total_revenue': totals[2] or 0.0,
                 'transactions': transactions,
-                'product_summary': product_summary
+                'changes': [row[1:] for row in changes if row[2] >= since_date],
+                'last_transaction_id': last_transaction_id,
+                'last_change_id': last_change_id,
             }
+        
+        try:
+            return self._run_read(read)
         except Exception as e:
-            print(f"Error generating monthly report: {e}")
-            return {'total_transactions': 0, 'total_items_sold': 0, 'total_revenue': 0.0, 'transactions': [], 'product_summary': []}
+            print(f"Error fetching sales activity: {e}")
+            return None
+    
+    def get_course_breakdown(self, start_date, end_date):
+        """
+        Get per-course totals and product mix for a date range (inclusive)
+        
+        Everything comes from one grouped query: rows are grouped by course and
+        product, and window sums over each course partition add the course totals,
+        so the cost does not grow with the number of courses. It is read on a
+        read-only snapshot like the other reports.
+        
+        Returns:
+            dict: 'courses' [(course, transactions, quantity, revenue)] by revenue,
+                  'product_mix' {course: [(product, transactions, quantity, revenue)]},
+                  'total_quantity', 'total_revenue'
+            Transactions without a course are reported under course ''.
+        """
+        empty = {'courses': [], 'product_mix': {}, 'total_quantity': 0, 'total_revenue': 0.0}
+        
+        def read(cursor):
+            cursor.execute('''
+                SELECT g.course, p.name, g.count, g.quantity, g.amount,
+                       SUM(g.count) OVER course, SUM(g.quantity) OVER course,
+                       SUM(g.amount) OVER course AS course_revenue
+                FROM (
+                    SELECT COALESCE(program_course, '') AS course, product_id,
+                           COUNT(*) AS count, SUM(quantity) AS quantity, SUM(amount) AS amount
+                    FROM sales
+                    WHERE date >= ? AND date <= ?
+                    GROUP BY course, product_id
+                ) g
+                JOIN products p ON p.product_id = g.product_id
+                WINDOW course AS (PARTITION BY g.course)
+                ORDER BY course_revenue DESC, g.course, g.amount DESC, p.name
+            ''', (start_date, end_date))
+            return cursor.fetchall()
+        
+        try:
+            rows = self._run_read(read)
+        except Exception as e:
+            print(f"Error generating course breakdown: {e}")
+            return empty
+        
+        result = dict(empty, product_mix={})
+        courses = result['courses']
+        for course, product, count, qty, amount, course_count, course_qty, course_revenue in rows:
+            if course not in result['product_mix']:
+                courses.append((course, course_count, course_qty, course_revenue))
+                result['product_mix'][course] = []
+                result['total_quantity'] += course_qty
+                result['total_revenue'] += course_revenue
+            result['product_mix'][course].append((product, count, qty, amount))
+        return result
+    
+    # ========== HISTORICAL IMPORT ==========
+    
+    def add_historical_sales(self, sales):
+        """
+        Insert a chunk of past sales (e.g. from paper logbooks) in one write
+        
+        Stock is not touched, as it has been counted since, and no batch splits are
+        recorded, as for sales from before batches were tracked. The OR number
+        registry is filled as the sales go in; buyers and sales velocity are rebuilt
+        once after the whole import.
+        
+        Args:
+            sales (list): [(buyer_name, program_course, product_name, size, quantity,
+                amount, or_number, date), ...]
+        
+        Returns:
+            int: Sales inserted, or None on error
+        """
+        def record(conn, cursor):
+            # Explicit ids (we hold the write lock) so the registry can be filled in bulk too
+            cursor.execute('''
+                SELECT MAX(COALESCE((SELECT MAX(transaction_id) FROM sales), 0),
+                           COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'sales'), 0))
+            ''')
+            next_id = cursor.fetchone()[0] + 1
+            
+            keys = {}
+            rows = []
+            for offset, (buyer_name, program_course, product_name, size, quantity, amount, or_number, date) in enumerate(sales):
+                if (product_name, size) not in keys:
+                    keys[(product_name, size)] = self._product_size_ids(cursor, product_name, size)
+                rows.append((next_id + offset, buyer_name, program_course, *keys[(product_name, size)],
+                             quantity, amount, or_number, date))
+            
+            cursor.executemany('''
+                INSERT INTO sales (transaction_id, buyer_name, program_course, product_id, size_id, quantity, amount, or_number, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self._record_or_numbers(cursor, [(row[0], row[7]) for row in rows])
+            conn.commit()
+            return len(rows)
+        
+        try:
+            return self._run_write(record)
+        except Exception as e:
+            print(f"Error importing sales: {e}")
+            return None
+    
+    def suspend_indexes(self, tables=('sales', 'or_numbers')):
+        """
+        Drop the secondary indexes of `tables` before a bulk load, which is much
+        faster than keeping them current row by row
+        
+        The app recreates any missing index when it next starts, so an interrupted
+        import cannot leave them missing for good.
+        
+        Returns:
+            list: CREATE INDEX statements for restore_indexes()
+        """
+        def drop(conn, cursor):
+            placeholders = ", ".join("?" for _ in tables)
+            cursor.execute(f'''
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+            ''', tuple(tables))
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX "{name}"')
+            conn.commit()
+            return [sql for _, sql in indexes]
+        
+        try:
+            return self._run_write(drop)
+        except Exception as e:
+            print(f"Error suspending indexes: {e}")
+            return []
+    
+    def restore_indexes(self, statements):
+        """Recreate indexes dropped by suspend_indexes(), then refresh planner statistics"""
+        def create(conn, cursor):
+            for sql in statements:
+                cursor.execute(sql)
+            conn.commit()
+            cursor.execute("ANALYZE")
+            return True
+        
+        try:
+            return self._run_write(create)
+        except Exception as e:
+            print(f"Error restoring indexes: {e}")
+            return False
+    
+    # ========== MAINTENANCE OPERATIONS ==========
+    
+    def backup_database(self, dest_path):
+        """
+        Copy the database to `dest_path` using SQLite's online backup API
+        
+        Safe while the application is running: the copy is a consistent snapshot.
+        
+        Returns:
+            bool: True if the backup was written
+        """
+        try:
+            dest_dir = os.path.dirname(dest_path)
+            if dest_dir and not os.path.exists(dest_dir):
+                os.makedirs(dest_dir)
+            
+            conn = self.get_connection()
+            dest = sqlite3.connect(dest_path)
+            conn.backup(dest)
+            dest.close()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"Error backing up database: {e}")
+            return False
     
-    def get_date_range_report(self, start_date, end_date):
-        """Get sales report for custom date range"""
+    def check_integrity(self):
+        """
+        Run SQLite's integrity check plus the application's own consistency checks
+        
+        Returns:
+            list: Problems found (empty if the database is healthy)
+        """
+        problems = []
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
+            cursor.execute("PRAGMA integrity_check")
+            problems.extend(row[0] for row in cursor.fetchall() if row[0] != 'ok')
+            
+            # Every batch and sale must point at an existing product and size
+            cursor.execute("PRAGMA foreign_key_check")
+            for table, rowid, parent, _ in cursor.fetchall():
+                problems.append(f"Row {rowid} of {table} refers to a missing row of {parent}")
+            
+            cursor.execute("SELECT item_id, product_name, size, stock FROM inventory WHERE stock < 0")
+            for item_id, product_name, size, stock in cursor.fetchall():
+                problems.append(f"Negative stock {stock} for {product_name} ({size}), item_id={item_id}")
+            
+            # Every recorded batch split must add up to the quantity of its sale
             cursor.execute('''
-                SELECT COUNT(*), SUM(quantity), SUM(amount)
-                FROM transactions
-                WHERE date >= ? AND date <= ?
-            ''', (start_date, end_date))
-            totals = cursor.fetchone()
+                SELECT t.transaction_id, t.quantity, SUM(a.quantity)
+                FROM sales t
+                JOIN transaction_allocations a ON a.transaction_id = t.transaction_id
+                GROUP BY t.transaction_id
+                HAVING SUM(a.quantity) != t.quantity
+            ''')
+            for transaction_id, quantity, allocated in cursor.fetchall():
+                problems.append(f"Transaction {transaction_id} sold {quantity} but batches record {allocated}")
             
             cursor.execute('''
-                SELECT transaction_id, buyer_name, program_course, product_name, size, quantity, amount, or_number, date
-                FROM transactions
-                WHERE date >= ? AND date <= ?
-                ORDER BY date, transaction_id
-            ''', (start_date, end_date))
-            transactions = cursor.fetchall()
+                SELECT COUNT(*) FROM transaction_allocations a
+                WHERE NOT EXISTS (SELECT 1 FROM sales t WHERE t.transaction_id = a.transaction_id)
+            ''')
+            orphans = cursor.fetchone()[0]
+            if orphans:
+                problems.append(f"{orphans} batch allocation(s) belong to deleted transactions")
             
             cursor.execute('''
-                SELECT product_name, size, SUM(quantity) as total_qty, SUM(amount) as total_amount
-                FROM transactions
-                WHERE date >= ? AND date <= ?
-                GROUP BY product_name, size
-                ORDER BY product_name, size
-            ''', (start_date, end_date))
-            product_summary = cursor.fetchall()
+                SELECT COUNT(*) FROM sales s
+                WHERE NOT EXISTS (SELECT 1 FROM or_numbers r WHERE r.transaction_id = s.transaction_id)
+            ''')
+            unregistered = cursor.fetchone()[0]
+            if unregistered:
+                problems.append(f"{unregistered} transaction(s) missing from the OR number registry (run rebuild_or_numbers)")
             
-            conn.close()
+            # The latest price on record must be the batch's current price
+            cursor.execute('''
+                SELECT COUNT(*) FROM inventory_batches b
+                WHERE b.price IS NOT (SELECT h.price FROM price_history h WHERE h.item_id = b.item_id
+                                      ORDER BY h.effective_from DESC LIMIT 1)
+            ''')
+            unrecorded = cursor.fetchone()[0]
+            if unrecorded:
+                problems.append(f"{unrecorded} batch price(s) missing from the price history")
             
-            return {
-                'total_transactions': totals[0] or 0,
-                'total_items_sold': totals[1] or 0,
-                'total_revenue': totals[2] or 0.0,
-                'transactions': transactions,
-                'product_summary': product_summary
-            }
+            conn.close()
         except Exception as e:
-            print(f"Error generating date range report: {e}")
-            return {'total_transactions': 0, 'total_items_sold': 0, 'total_revenue': 0.0, 'transactions': [], 'product_summary': []}
\ No newline at end of file
+            problems.append(f"Integrity check failed: {e}")
+        return problems
+
+
+if __name__ == "__main__":
+    # SETUP_DATABASE.bat: create (or migrate) the configured database
+    manager = DatabaseManager()
+    print(f"Database ready: {manager.db_path}")
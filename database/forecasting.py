@@ -0,0 +1,74 @@
+"""
+Stock Forecasting for EVSU-OC IGP Sales Record System
+Exponentially weighted sales velocity, updated one sale at a time
+
+Each product/size keeps a single "decayed quantity": every sale adds its quantity,
+and the running total halves every HALF_LIFE_DAYS. That total converts directly to
+a units-per-day rate, so a forecast never has to rescan the transactions table.
+"""
+
+import math
+from datetime import date
+
+# Sales from HALF_LIFE_DAYS ago count half as much as today's
+HALF_LIFE_DAYS = 14.0
+
+# Items expected to run out within this many days are flagged for reorder
+REORDER_DAYS = 14
+
+
+def _ordinal(date_str):
+    """Day number of a YYYY-MM-DD date"""
+    return date.fromisoformat(date_str[:10]).toordinal()
+
+
+def decay_factor(days):
+    """Weight left after `days` have passed"""
+    return 0.5 ** (days / HALF_LIFE_DAYS)
+
+
+def fold_sale(decayed_qty, last_date, quantity, sale_date):
+    """
+    Fold one sale (or a reversal, with negative quantity) into the running total
+
+    Args:
+        decayed_qty (float): Running total as of last_date (0 for a new item)
+        last_date (str): Date the running total refers to (None for a new item)
+        quantity (int): Units sold; negative to undo an edited/deleted sale
+        sale_date (str): Date of the sale (YYYY-MM-DD)
+
+    Returns:
+        tuple: (new decayed_qty, new last_date)
+    """
+    if last_date is None:
+        return max(quantity, 0), sale_date
+
+    gap = _ordinal(sale_date) - _ordinal(last_date)
+    if gap >= 0:
+        # Newer sale: age the total up to the sale date, then add it
+        return max(decayed_qty * decay_factor(gap) + quantity, 0.0), sale_date
+    # Back-dated sale: weigh it as of the current reference date
+    return max(decayed_qty + quantity * decay_factor(-gap), 0.0), last_date
+
+
+def daily_rate(decayed_qty, last_date, today=None):
+    """
+    Units sold per day, as of `today`
+
+    A running total of exponentially weighted sales equals rate * HALF_LIFE / ln 2
+    for a steady rate, so the rate is recovered by inverting that.
+    """
+    if not decayed_qty or last_date is None:
+        return 0.0
+    today = today or date.today().isoformat()
+    age = max(_ordinal(today) - _ordinal(last_date), 0)
+    return decayed_qty * decay_factor(age) * math.log(2) / HALF_LIFE_DAYS
+
+
+def days_until_stockout(stock, rate):
+    """Projected days left at the current rate (None if the item is not selling)"""
+    if stock <= 0:
+        return 0.0
+    if rate <= 0:
+        return None
+    return stock / rate
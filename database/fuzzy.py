@@ -0,0 +1,29 @@
+"""
+Fuzzy Name Matching for EVSU-OC IGP Sales Record System
+Trigram similarity, so "Dela Cruz", "Delacruz" and "dela  cruz" find each other
+"""
+
+
+def name_key(name):
+    """Lower-case letters and digits only: spacing, dots and dashes do not matter"""
+    return "".join(ch for ch in (name or '').lower() if ch.isalnum())
+
+
+def trigrams(name):
+    """
+    Set of three-letter pieces of a name's key, padded so the start of the name
+    weighs more than the middle (as buyers are usually typed from the start)
+    """
+    key = name_key(name)
+    if not key:
+        return set()
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    """Share of trigrams two trigram sets have in common (0.0 to 1.0)"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
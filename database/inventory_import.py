@@ -0,0 +1,81 @@
+"""
+Inventory Import for EVSU-OC IGP Sales Record System
+Supplier spreadsheets saved as CSV: every line is validated first, then the good
+lines are upserted into inventory in one write
+"""
+
+import csv
+
+COLUMNS = ("product_name", "size", "batch", "stock", "price")
+
+
+def parse_line(row):
+    """
+    One CSV line as (product_name, size, batch, stock, price)
+
+    Stock and price may be formatted the way spreadsheets save them ("1,200",
+    "₱1,250.00"). Raises ValueError with the reason if the line is not usable.
+    """
+    product_name = (row.get('product_name') or '').strip()
+    size = (row.get('size') or '').strip()
+    batch = (row.get('batch') or '').strip()
+    if not product_name or not size:
+        raise ValueError("product_name and size are required")
+    try:
+        stock = int((row.get('stock') or '0').replace(',', '').strip() or 0)
+    except ValueError:
+        raise ValueError(f"stock '{row.get('stock')}' is not a whole number")
+    try:
+        price = float((row.get('price') or '').replace('₱', '').replace(',', '').strip())
+    except ValueError:
+        raise ValueError(f"price '{row.get('price') or ''}' is not a number")
+    if stock < 0 or price < 0:
+        raise ValueError("stock and price must be positive")
+    return product_name, size, batch, stock, price
+
+
+def read_inventory_csv(path):
+    """
+    Validate every line of an inventory CSV
+
+    Returns:
+        tuple: (rows, rejected) where rows is [(line_no, product_name, size, batch,
+            stock, price), ...] and rejected is [(line_no, reason), ...]; line 1 is
+            the header
+    """
+    rows, rejected = [], []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in COLUMNS if column != 'batch' and column not in (reader.fieldnames or [])]
+        if missing:
+            return [], [(1, f"missing column(s): {', '.join(missing)}")]
+        # Row 1 is the header, so data starts on line 2
+        for line_no, row in enumerate(reader, start=2):
+            try:
+                rows.append((line_no, *parse_line(row)))
+            except ValueError as e:
+                rejected.append((line_no, str(e)))
+    return rows, rejected
+
+
+def import_inventory_csv(db, path, add_stock=True):
+    """
+    Validate an inventory CSV and upsert its good lines (see DatabaseManager.upsert_inventory)
+
+    Args:
+        add_stock (bool): True adds the file's stock to batches that already exist (a
+            delivery); False replaces their stock (a stock count)
+
+    Returns:
+        dict: 'inserted' and 'updated' batch counts and 'rejected' [(line_no, reason), ...];
+            if saving fails every valid line is rejected as well, as nothing was saved
+    """
+    rows, rejected = read_inventory_csv(path)
+    result = {'inserted': 0, 'updated': 0, 'rejected': rejected}
+    if rows:
+        counts = db.upsert_inventory([row[1:] for row in rows], add_stock)
+        if counts is None:
+            result['rejected'] = sorted(rejected + [(row[0], "database error") for row in rows])
+        else:
+            result['inserted'], result['updated'] = counts
+    return result
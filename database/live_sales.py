@@ -0,0 +1,131 @@
+"""
+Live Sales Totals for EVSU-OC IGP Sales Record System
+Running aggregates for the dashboard, kept current by folding in only the sales
+recorded, edited or deleted since the last refresh
+"""
+
+from datetime import date, timedelta
+
+
+class LiveSales:
+    """Today / this week / recent-days totals maintained incrementally"""
+
+    # Days of daily revenue kept for the sparkline (always covers the current week)
+    WINDOW_DAYS = 14
+
+    def __init__(self, db_manager):
+        """
+        Args:
+            db_manager (DatabaseManager): Source database
+        """
+        self.db = db_manager
+        self.today = None
+        self.cells = {}  # (date, product_name) -> [quantity, amount, transactions]
+        self.last_transaction_id = 0
+        self.last_change_id = None
+
+    def reset(self, today=None):
+        """Start over from the current database contents (also used at day rollover)"""
+        self.today = today or date.today()
+        self.cells = {}
+        self.last_transaction_id = 0
+        self.last_change_id = None
+        return self.poll(self.today)
+
+    @property
+    def window_start(self):
+        return (self.today - timedelta(days=self.WINDOW_DAYS - 1)).isoformat()
+
+    @property
+    def week_start(self):
+        return (self.today - timedelta(days=self.today.weekday())).isoformat()
+
+    def poll(self, today=None):
+        """
+        Fold in activity since the last poll
+
+        Returns:
+            bool: True if any totals changed
+        """
+        today = today or date.today()
+        if self.today != today:
+            return self.reset(today)
+
+        activity = self.db.get_sales_activity(self.window_start, self.last_transaction_id, self.last_change_id)
+        if activity is None:
+            return False
+
+        seen_up_to = self.last_transaction_id
+        for _, sale_date, product_name, quantity, amount in activity['transactions']:
+            self._fold(sale_date, product_name, quantity, amount, 1)
+
+        for transaction_id, sale_date, product_name, quantity, amount in activity['changes']:
+            # Sales first read in this poll already show their latest values
+            if transaction_id > seen_up_to:
+                continue
+            self._fold(sale_date, product_name, quantity, amount, 1 if quantity > 0 else -1)
+
+        self.last_transaction_id = activity['last_transaction_id']
+        self.last_change_id = activity['last_change_id']
+        return bool(activity['transactions'] or activity['changes'])
+
+    def _fold(self, sale_date, product_name, quantity, amount, count):
+        key = (sale_date[:10], product_name)
+        if key[0] < self.window_start:
+            return
+        cell = self.cells.setdefault(key, [0, 0.0, 0])
+        cell[0] += quantity
+        cell[1] += amount
+        cell[2] += count
+        if cell[2] <= 0:
+            del self.cells[key]
+
+    # ========== TOTALS ==========
+
+    def totals(self, start_date, end_date=None):
+        """
+        Returns:
+            dict: revenue, items, transactions for start_date..end_date (inclusive)
+        """
+        end_date = end_date or self.today.isoformat()
+        revenue = items = transactions = 0
+        for (sale_date, _), (quantity, amount, count) in self.cells.items():
+            if start_date <= sale_date <= end_date:
+                items += quantity
+                revenue += amount
+                transactions += count
+        return {'revenue': revenue, 'items': items, 'transactions': transactions}
+
+    def today_totals(self):
+        return self.totals(self.today.isoformat())
+
+    def week_totals(self):
+        return self.totals(self.week_start)
+
+    def top_products(self, n=5, start_date=None):
+        """
+        Best sellers by revenue since start_date (default: start of this week)
+
+        Returns:
+            list: [(product_name, quantity, revenue), ...] highest revenue first
+        """
+        start_date = start_date or self.week_start
+        products = {}
+        for (sale_date, product_name), (quantity, amount, _) in self.cells.items():
+            if sale_date >= start_date:
+                total = products.setdefault(product_name, [0, 0.0])
+                total[0] += quantity
+                total[1] += amount
+        ranked = sorted(products.items(), key=lambda item: item[1][1], reverse=True)[:n]
+        return [(name, quantity, revenue) for name, (quantity, revenue) in ranked]
+
+    def daily_revenue(self):
+        """
+        Returns:
+            list: [(date, revenue), ...] for each of the last WINDOW_DAYS days, oldest first
+        """
+        revenue = {}
+        for (sale_date, _), (_, amount, _) in self.cells.items():
+            revenue[sale_date] = revenue.get(sale_date, 0.0) + amount
+        days = [(self.today - timedelta(days=offset)).isoformat() for offset in range(self.WINDOW_DAYS - 1, -1, -1)]
+        return [(day, revenue.get(day, 0.0)) for day in days]
@@ -0,0 +1,300 @@
+"""
+Logbook Import for EVSU-OC IGP Sales Record System
+Loads years of past sales from the manual logbooks and Excel sheets the system
+replaces: rows are streamed from a CSV or XLSX file, normalized (dates, peso
+amounts, sizes, product names), validated and inserted in chunked transactions
+
+Usage (through the CLI):
+    python -m cli import logbook sales_2019_2023.xlsx --dry-run --rejects rejects.csv
+    python -m cli import logbook sales_2019_2023.xlsx
+"""
+
+import csv
+import os
+import time
+from datetime import date, datetime
+
+from database.fuzzy import name_key, similarity, trigrams
+
+# Logbook headings (compared by name_key) -> field
+HEADINGS = {
+    'date': 'date', 'datesold': 'date', 'transactiondate': 'date', 'dateofpurchase': 'date',
+    'buyername': 'buyer_name', 'buyer': 'buyer_name', 'name': 'buyer_name', 'studentname': 'buyer_name',
+    'customer': 'buyer_name', 'customername': 'buyer_name',
+    'programcourse': 'program_course', 'course': 'program_course', 'program': 'program_course',
+    'courseprogram': 'program_course', 'courseyear': 'program_course',
+    'productname': 'product_name', 'product': 'product_name', 'item': 'product_name',
+    'itemname': 'product_name', 'particulars': 'product_name', 'description': 'product_name',
+    'size': 'size',
+    'quantity': 'quantity', 'qty': 'quantity', 'pcs': 'quantity', 'noofpcs': 'quantity',
+    'amount': 'amount', 'total': 'amount', 'totalamount': 'amount', 'amountpaid': 'amount',
+    'price': 'price', 'unitprice': 'price',
+    'ornumber': 'or_number', 'orno': 'or_number', 'or': 'or_number', 'receiptno': 'or_number',
+    'receiptnumber': 'or_number', 'officialreceipt': 'or_number',
+}
+
+# Ways sizes were written by hand (compared by name_key) -> size label used in inventory
+SIZE_ALIASES = {
+    's': "Small", 'sm': "Small", 'small': "Small",
+    'm': "Medium", 'med': "Medium", 'medium': "Medium",
+    'l': "Large", 'lg': "Large", 'large': "Large",
+    'xl': "X-Large", 'xlarge': "X-Large", 'extralarge': "X-Large",
+    'xxl': "XX-Large", '2xl': "XX-Large", 'xxlarge': "XX-Large",
+    '': "N/A", 'na': "N/A", 'none': "N/A",
+}
+
+# Tried in order; month-first as written in Philippine logbooks
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%m-%d-%Y", "%Y/%m/%d", "%B %d, %Y", "%b %d, %Y",
+                "%B %d %Y", "%b %d %Y", "%d-%b-%Y", "%d-%b-%y", "%Y-%m-%d %H:%M:%S")
+
+# Sales per write transaction
+CHUNK = 50000
+
+# Lowest trigram similarity at which a logbook product is taken for an inventory
+# product (as for the similar-buyers search); the runner-up must score under half
+PRODUCT_MATCH = 0.3
+
+
+def read_rows(path):
+    """
+    Stream the rows of a CSV or XLSX logbook as (line_no, {heading: value})
+
+    XLSX files need openpyxl (pip install openpyxl); the first sheet is read in
+    read-only mode, so even very large workbooks are not loaded into memory.
+    """
+    if os.path.splitext(path)[1].lower() in ('.xlsx', '.xlsm'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Reading .xlsx logbooks needs openpyxl (pip install openpyxl); "
+                             "or save the sheet as CSV")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            headings = [str(value or '') for value in next(rows, ())]
+            for line_no, values in enumerate(rows, start=2):
+                yield line_no, dict(zip(headings, values))
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            # Row 1 is the header, so data starts on line 2
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+
+
+def parse_date(value):
+    """ISO date from a logbook date (text in any of DATE_FORMATS, or an Excel date)"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = " ".join(str(value or '').split())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"date '{text}' is not a date")
+
+
+def parse_amount(value):
+    """Pesos from "₱1,250.00", "P 1,250", "PHP1250" or a number (None if blank)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or '').upper().replace('₱', '').replace('PHP', '').replace(',', '').strip()
+    text = text[1:].strip() if text.startswith('P') else text
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"amount '{value}' is not a number")
+
+
+class LogbookImporter:
+    """Normalizes logbook rows into sales and loads them through a DatabaseManager"""
+
+    def __init__(self, db_manager, new_products=False):
+        """
+        Args:
+            new_products (bool): Import products that are not in inventory under the
+                logbook's name (e.g. discontinued items) instead of rejecting them
+        """
+        self.db = db_manager
+        self.new_products = new_products
+        self.today = date.today().isoformat()
+        # Every distinct spelling is resolved once; logbooks repeat them endlessly
+        self.dates = {}
+        self.products = {}
+        self.sizes = {}
+        inventory = self.db.get_all_inventory()
+        self.product_names = {name_key(row[1]): row[1] for row in inventory}
+        self.product_trigrams = [(trigrams(name), name) for name in self.product_names.values()]
+        self.size_labels = {name_key(row[2]): row[2] for row in inventory}
+
+    def product_name(self, value):
+        """Inventory product a logbook's product name stands for (typos and spacing allowed)"""
+        text = " ".join(str(value or '').split())
+        if text not in self.products:
+            key = name_key(text)
+            found = self.product_names.get(key)
+            if found is None and key:
+                wanted = trigrams(text)
+                scored = sorted(((similarity(wanted, grams), name) for grams, name in self.product_trigrams),
+                                reverse=True)
+                # Only a clear best match, never a toss-up between two products
+                if scored and scored[0][0] >= PRODUCT_MATCH and (len(scored) == 1 or scored[1][0] < scored[0][0] / 2):
+                    found = scored[0][1]
+            if found is None and self.new_products and key:
+                found = text
+            self.products[text] = found
+        found = self.products[text]
+        if found is None:
+            raise ValueError(f"product '{text}' is not in inventory" if text else "product is required")
+        return found
+
+    def size(self, value):
+        """Inventory size label for a hand-written size ("XL", "x-large", blank for N/A)"""
+        text = " ".join(str(value or '').split())
+        if text not in self.sizes:
+            key = name_key(text)
+            self.sizes[text] = self.size_labels.get(key) or SIZE_ALIASES.get(key) or text
+        return self.sizes[text]
+
+    def normalize(self, row):
+        """
+        One logbook row as a sale
+
+        Returns:
+            tuple: (buyer_name, program_course, product_name, size, quantity, amount,
+                or_number, date); raises ValueError with the reason for a bad row
+        """
+        buyer_name = self.db.normalize_buyer_name(str(row.get('buyer_name') or ''))
+        if not buyer_name:
+            raise ValueError("buyer name is required")
+
+        raw_date = row.get('date')
+        sale_date = self.dates.get(raw_date) if isinstance(raw_date, str) else None
+        if sale_date is None:
+            sale_date = parse_date(raw_date)
+            if isinstance(raw_date, str):
+                self.dates[raw_date] = sale_date
+        if sale_date > self.today:
+            raise ValueError(f"date {sale_date} is in the future")
+
+        product_name = self.product_name(row.get('product_name'))
+        size = self.size(row.get('size'))
+
+        quantity = row.get('quantity')
+        try:
+            quantity = int(float(str(quantity).replace(',', ''))) if str(quantity or '').strip() else 1
+        except ValueError:
+            raise ValueError(f"quantity '{quantity}' is not a number")
+        if quantity <= 0:
+            raise ValueError("quantity must be positive")
+
+        amount = parse_amount(row.get('amount'))
+        if amount is None:
+            price = parse_amount(row.get('price'))
+            if price is None:
+                raise ValueError("amount is required")
+            amount = price * quantity
+        if amount < 0:
+            raise ValueError("amount must be positive")
+
+        program_course = " ".join(str(row.get('program_course') or '').split())
+        or_number = str(row.get('or_number') or '').strip()
+        if or_number.endswith('.0'):
+            or_number = or_number[:-2]  # Excel stores numeric OR numbers as floats
+        return buyer_name, program_course, product_name, size, quantity, amount, or_number, sale_date
+
+    def run(self, path, dry_run=False, rejects_path=None, chunk=CHUNK, defer_indexes=True, progress=None):
+        """
+        Import a logbook file
+
+        Sales are inserted CHUNK at a time, each chunk in its own transaction, with
+        the sales indexes dropped during the load and rebuilt afterwards (with
+        buyers and sales velocity). Rows that cannot be imported are skipped and,
+        with `rejects_path`, written to a CSV with their line number and reason.
+
+        Args:
+            dry_run (bool): Parse and validate everything but write nothing except
+                the rejects file
+            progress (callable): Called with the number of rows read so far after
+                every chunk
+
+        Returns:
+            dict: 'read', 'imported' and 'rejected' row counts, 'first_date' and
+                'last_date' of the imported sales, 'seconds' taken and 'errors'
+                (the first few rejects as (line_no, reason))
+        """
+        started = time.perf_counter()
+        summary = {'read': 0, 'imported': 0, 'rejected': 0, 'first_date': None, 'last_date': None,
+                   'seconds': 0.0, 'errors': []}
+        rejects_file = open(rejects_path, 'w', newline='', encoding='utf-8-sig') if rejects_path else None
+        rejects = csv.writer(rejects_file) if rejects_file else None
+        suspended = None
+        headings = None
+        pending = []
+
+        def flush():
+            if pending and not dry_run:
+                inserted = self.db.add_historical_sales(pending)
+                if inserted is None:
+                    raise RuntimeError(f"saving failed after {summary['imported']:,} sales were imported")
+                summary['imported'] += inserted
+            elif pending:
+                summary['imported'] += len(pending)
+            pending.clear()
+            if progress:
+                progress(summary['read'])
+
+        try:
+            for line_no, raw in read_rows(path):
+                if headings is None:
+                    headings = {heading: HEADINGS.get(name_key(heading)) for heading in raw}
+                    found = set(headings.values())
+                    missing = [field for field in ('date', 'buyer_name', 'product_name') if field not in found]
+                    if 'amount' not in found and 'price' not in found:
+                        missing.append('amount')
+                    if missing:
+                        raise ValueError(f"no column for {', '.join(missing)} (headings: {', '.join(raw)})")
+                    if rejects:
+                        rejects.writerow(["line", "reason", *raw])
+                    if defer_indexes and not dry_run:
+                        suspended = self.db.suspend_indexes()
+
+                if not any(value not in (None, '') for value in raw.values()):
+                    continue  # blank line between logbook pages
+                summary['read'] += 1
+                try:
+                    sale = self.normalize({field: raw[heading] for heading, field in headings.items() if field})
+                except ValueError as e:
+                    summary['rejected'] += 1
+                    if len(summary['errors']) < 20:
+                        summary['errors'].append((line_no, str(e)))
+                    if rejects:
+                        rejects.writerow([line_no, str(e), *raw.values()])
+                    continue
+
+                pending.append(sale)
+                sale_date = sale[7]
+                if summary['first_date'] is None or sale_date < summary['first_date']:
+                    summary['first_date'] = sale_date
+                if summary['last_date'] is None or sale_date > summary['last_date']:
+                    summary['last_date'] = sale_date
+                if len(pending) >= chunk:
+                    flush()
+            flush()
+        finally:
+            if rejects_file:
+                rejects_file.close()
+            if suspended:
+                self.db.restore_indexes(suspended)
+
+        if summary['imported'] and not dry_run:
+            self.db.rebuild_buyers()
+            self.db.rebuild_sales_velocity()
+        summary['seconds'] = time.perf_counter() - started
+        return summary
@@ -0,0 +1,252 @@
+"""
+Database Maintenance for EVSU-OC IGP Sales Record System
+Statistics, ANALYZE / PRAGMA optimize, and incremental vacuuming of the SQLite file
+"""
+
+import sqlite3
+import os
+import threading
+import time
+from datetime import datetime
+
+from config import get_config
+from database.db_manager import DatabaseManager
+
+
+class DatabaseMaintenance:
+    """Keeps the query planner informed and the database file compact"""
+
+    # Free pages released per incremental vacuum step, and the pause between steps
+    VACUUM_STEP_PAGES = 200
+    VACUUM_STEP_PAUSE = 0.05
+
+    AUTO_VACUUM_MODES = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._vacuum_thread = None
+
+    def get_connection(self):
+        """Create and return a database connection"""
+        return sqlite3.connect(self.db_path, timeout=get_config().get("database", "busy_timeout"))
+
+    # ========== STATISTICS ==========
+
+    def get_stats(self):
+        """
+        Collect size and content statistics for the database
+
+        Returns:
+            dict: page_size, page_count, freelist_count, auto_vacuum, file_size,
+                  table_rows {table: rows}, object_sizes {table/index: bytes}
+                  (object_sizes is None if SQLite was built without dbstat)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        stats = {}
+        for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum"):
+            cursor.execute(f"PRAGMA {pragma}")
+            stats[pragma] = cursor.fetchone()[0]
+        stats['auto_vacuum'] = self.AUTO_VACUUM_MODES.get(stats['auto_vacuum'], str(stats['auto_vacuum']))
+        stats['file_size'] = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+        tables = [row[0] for row in cursor.fetchall()]
+        stats['table_rows'] = {}
+        for table in tables:
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+            stats['table_rows'][table] = cursor.fetchone()[0]
+
+        try:
+            cursor.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY SUM(pgsize) DESC")
+            stats['object_sizes'] = dict(cursor.fetchall())
+        except sqlite3.Error:
+            stats['object_sizes'] = None
+
+        conn.close()
+        return stats
+
+    def format_stats(self, stats=None):
+        """Render statistics as readable text"""
+        stats = stats or self.get_stats()
+        page_size = stats['page_size']
+        lines = [
+            f"File size:      {stats['file_size'] / 1024:,.1f} KB",
+            f"Pages:          {stats['page_count']:,} x {page_size} bytes",
+            f"Free pages:     {stats['freelist_count']:,} ({stats['freelist_count'] * page_size / 1024:,.1f} KB reclaimable)",
+            f"Auto vacuum:    {stats['auto_vacuum']}",
+            "",
+            "Rows per table:",
+        ]
+        for table, rows in stats['table_rows'].items():
+            lines.append(f"  {table:<28} {rows:>10,}")
+
+        lines += ["", "Size per table/index:"]
+        if stats['object_sizes'] is None:
+            lines.append("  (not available: SQLite built without dbstat)")
+        else:
+            for name, size in stats['object_sizes'].items():
+                lines.append(f"  {name:<28} {size / 1024:>10,.1f} KB")
+        return "\n".join(lines)
+
+    # ========== PLANNER STATISTICS ==========
+
+    def analyze(self):
+        """Gather full query planner statistics (ANALYZE)"""
+        conn = self.get_connection()
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.close()
+
+    def optimize(self):
+        """Run PRAGMA optimize: refresh planner statistics only where they are stale"""
+        conn = self.get_connection()
+        conn.execute("PRAGMA optimize")
+        conn.close()
+
+    # ========== VACUUM ==========
+
+    def enable_incremental_vacuum(self):
+        """
+        Convert the database to auto_vacuum=INCREMENTAL
+
+        Databases created by this version start out incremental. Changing the mode
+        of an older one (including one migrated by initialize_database) requires one
+        full VACUUM, which rewrites the file; run it once while nobody is recording
+        sales.
+
+        Returns:
+            bool: True if a conversion was performed, False if already incremental
+        """
+        conn = self.get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            conn.close()
+            return False
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.close()
+        return True
+
+    def vacuum_step(self, pages=None):
+        """
+        Release up to `pages` free pages back to the file system
+
+        Returns:
+            int: Free pages still left afterwards
+        """
+        conn = self.get_connection()
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages or self.VACUUM_STEP_PAGES)})")
+        remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        return remaining
+
+    def reclaim_free_pages(self, on_done=None):
+        """
+        Reclaim all free pages in small steps on a background thread
+
+        Each step holds the write lock only briefly, so sales can be recorded while
+        this runs. Requires auto_vacuum=INCREMENTAL (see enable_incremental_vacuum).
+
+        Args:
+            on_done (callable): Called with the number of pages reclaimed when finished
+
+        Returns:
+            bool: False if a reclaim is already running
+        """
+        if self._vacuum_thread and self._vacuum_thread.is_alive():
+            return False
+
+        def run():
+            reclaimed = 0
+            try:
+                conn = self.get_connection()
+                remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                conn.close()
+                while remaining:
+                    left = self.vacuum_step()
+                    # Not in incremental mode: nothing can be released this way
+                    if left >= remaining:
+                        break
+                    reclaimed += remaining - left
+                    remaining = left
+                    time.sleep(self.VACUUM_STEP_PAUSE)
+            except sqlite3.Error as e:
+                print(f"Incremental vacuum error: {e}")
+            if on_done:
+                on_done(reclaimed)
+
+        self._vacuum_thread = threading.Thread(target=run, daemon=True)
+        self._vacuum_thread.start()
+        return True
+
+    # ========== REPORT TIMINGS ==========
+
+    def time_reports(self, repeat=3):
+        """
+        Time the heavy report queries (best of `repeat` runs)
+
+        Returns:
+            dict: {report name: seconds}
+        """
+        db = DatabaseManager(self.db_path)
+        now = datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        conn = self.get_connection()
+        first, last = conn.execute("SELECT MIN(date), MAX(date) FROM sales").fetchone()
+        conn.close()
+
+        reports = {
+            "monthly report (current month)": lambda: db.get_monthly_report(now.year, now.month),
+            "date range report (all data)": lambda: db.get_date_range_report(first or today, last or today),
+            "transaction history": db.get_all_transactions,
+            "buyer search": lambda: db.search_transactions(buyer_name="a"),
+        }
+        timings = {}
+        for name, run in reports.items():
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+        return timings
+
+    def run_full_maintenance(self):
+        """
+        ANALYZE + optimize + reclaim free pages, timing the reports before and after
+
+        Returns:
+            dict: {'before': timings, 'after': timings, 'pages_reclaimed': int}
+        """
+        before = self.time_reports()
+        self.analyze()
+        self.optimize()
+
+        conn = self.get_connection()
+        free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        remaining = free_before
+        while remaining:
+            left = self.vacuum_step()
+            if left >= remaining:
+                break
+            remaining = left
+
+        after = self.time_reports()
+        return {'before': before, 'after': after, 'pages_reclaimed': free_before - remaining}
+
+    @staticmethod
+    def format_timings(result):
+        """Render before/after report timings as text"""
+        lines = [f"{'Report':<34} {'Before':>10} {'After':>10}"]
+        for name, before in result['before'].items():
+            after = result['after'][name]
+            lines.append(f"{name:<34} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms")
+        lines.append(f"Free pages reclaimed: {result['pages_reclaimed']:,}")
+        return "\n".join(lines)
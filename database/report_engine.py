@@ -0,0 +1,185 @@
+"""
+Parallel Report Engine for EVSU-OC IGP Sales Record System
+Splits long date ranges into monthly partitions, aggregates each partition on its
+own read-only connection in a worker pool, and merges the partial results
+
+The merged result has the same shape as DatabaseManager.get_date_range_report.
+Partitions run in a pool are read from separate snapshots: sales recorded meanwhile
+are left out, but a sale edited or deleted while the report runs can be seen by one
+month and not by another. With one worker every partition is read from a single
+snapshot instead.
+"""
+
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+
+EMPTY_REPORT = {'total_transactions': 0, 'total_items_sold': 0, 'total_revenue': 0.0, 'transactions': [], 'product_summary': []}
+
+
+def month_partitions(start_date, end_date):
+    """
+    Split start_date..end_date (inclusive, YYYY-MM-DD) into calendar months
+
+    Returns:
+        list: [(lower, upper), ...] where each partition is lower <= date < upper;
+              the caller still applies date <= end_date to the last one
+    """
+    year, month = int(start_date[:4]), int(start_date[5:7])
+    last = (int(end_date[:4]), int(end_date[5:7]))
+    partitions = []
+    lower = start_date
+    while (year, month) <= last:
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        upper = f"{year:04d}-{month:02d}-01"
+        partitions.append((lower, upper))
+        lower = upper
+    return partitions
+
+
+def read_only_uri(db_path):
+    """SQLite URI that opens db_path read-only (works with spaces and Windows drives)"""
+    return Path(db_path).resolve().as_uri() + "?mode=ro"
+
+
+def partition_report(uri, lower, upper, end_date, max_transaction_id, timeout=5.0):
+    """
+    Aggregate one partition on its own read-only connection
+
+    Module-level so it can run in a process pool. All three statements run in one
+    read transaction, so the partial totals match its transaction list. Sales
+    recorded after the report started (ids above max_transaction_id) are left out,
+    so partitions read at slightly different moments do not pick up new sales.
+    """
+    conn = sqlite3.connect(uri, uri=True, timeout=timeout)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        result = partition_queries(cursor, lower, upper, end_date, max_transaction_id)
+        conn.commit()
+        return result
+    finally:
+        conn.close()
+
+
+def partition_queries(cursor, lower, upper, end_date, max_transaction_id):
+    """Aggregate one partition in the caller's read transaction"""
+    params = (lower, upper, end_date, max_transaction_id)
+    where = "date >= ? AND date < ? AND date <= ? AND transaction_id <= ?"
+
+    cursor.execute(f"SELECT COUNT(*), SUM(quantity), SUM(amount) FROM sales WHERE {where}", params)
+    totals = cursor.fetchone()
+
+    cursor.execute(f'''
+        SELECT transaction_id, buyer_name, program_course, product_name, size, quantity, amount, or_number, date
+        FROM transactions
+        WHERE {where}
+        ORDER BY date, transaction_id
+    ''', params)
+    transactions = cursor.fetchall()
+
+    cursor.execute(f'''
+        SELECT p.name, z.label, g.quantity, g.amount
+        FROM (
+            SELECT product_id, size_id, SUM(quantity) AS quantity, SUM(amount) AS amount
+            FROM sales
+            WHERE {where}
+            GROUP BY product_id, size_id
+        ) g
+        JOIN products p ON p.product_id = g.product_id
+        JOIN sizes z ON z.size_id = g.size_id
+    ''', params)
+    product_summary = cursor.fetchall()
+    return totals, transactions, product_summary
+
+
+class ReportEngine:
+    """Date range reports computed month by month in parallel"""
+
+    def __init__(self, db_path, workers=None, use_processes=False, timeout=5.0):
+        """
+        Args:
+            db_path (str): Path to the SQLite database file
+            workers (int): Pool size (default: CPU count, at most 8)
+            use_processes (bool): Use a process pool instead of threads. Threads are
+                usually enough because SQLite releases the GIL while it runs a query;
+                processes avoid the GIL entirely but must pickle every result row.
+            timeout (float): Seconds each connection waits on a locked database
+        """
+        self.db_path = db_path
+        self.workers = workers or min(os.cpu_count() or 1, 8)
+        self.use_processes = use_processes
+        self.timeout = timeout
+
+    def date_range_report(self, start_date, end_date):
+        """
+        Same result as DatabaseManager.get_date_range_report
+
+        With one worker (or one month) every partition is read in the same read
+        transaction as the range bounds, so the report is one consistent snapshot.
+        """
+        try:
+            uri = read_only_uri(self.db_path)
+            conn = sqlite3.connect(uri, uri=True, timeout=self.timeout)
+            try:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN")
+                max_id, first, last = cursor.execute(
+                    "SELECT COALESCE(MAX(transaction_id), 0), MIN(date), MAX(date) FROM sales").fetchone()
+
+                # Only months that can hold sales ("all data" ranges like 0000-01-01..9999-12-31
+                # would otherwise become over a hundred thousand partitions)
+                if first is None:
+                    return dict(EMPTY_REPORT)
+                start_date, end_date = max(start_date, first), min(end_date, last)
+                if start_date > end_date:
+                    return dict(EMPTY_REPORT)
+                partitions = month_partitions(start_date, end_date)
+
+                if self.workers == 1 or len(partitions) == 1:
+                    partials = [partition_queries(cursor, lower, upper, end_date, max_id) for lower, upper in partitions]
+                else:
+                    pool_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+                    with pool_class(max_workers=self.workers) as pool:
+                        futures = [pool.submit(partition_report, uri, lower, upper, end_date, max_id, self.timeout) for lower, upper in partitions]
+                        partials = [future.result() for future in futures]
+                conn.commit()
+            finally:
+                conn.close()
+
+            return self.merge(partials)
+        except Exception as e:
+            print(f"Error generating parallel date range report: {e}")
+            return dict(EMPTY_REPORT)
+
+    @staticmethod
+    def merge(partials):
+        """
+        Combine partition results, given in date order
+
+        Partitions do not overlap and are already sorted by date, transaction_id,
+        so concatenating them keeps the monolithic query's order.
+        """
+        count = items = 0
+        revenue = 0.0
+        transactions = []
+        products = {}
+        for totals, partition_transactions, product_summary in partials:
+            count += totals[0] or 0
+            items += totals[1] or 0
+            revenue += totals[2] or 0.0
+            transactions.extend(partition_transactions)
+            for product_name, size, quantity, amount in product_summary:
+                total = products.setdefault((product_name, size), [0, 0.0])
+                total[0] += quantity or 0
+                total[1] += amount or 0.0
+
+        return {
+            'total_transactions': count,
+            'total_items_sold': items,
+            'total_revenue': revenue,
+            'transactions': transactions,
+            'product_summary': [key + tuple(total) for key, total in sorted(products.items())],
+        }
@@ -0,0 +1,307 @@
+"""
+Sale Service for EVSU-OC IGP Sales Record System
+The sale workflow behind the Transaction Entry screen (batch and price lookup,
+validation, amount calculation and saving) without any widgets, so it can be
+driven by the screen, scripts and load tests alike
+"""
+
+from datetime import datetime
+
+
+class Sale:
+    """One sale as entered on the form; numeric fields may still be raw text"""
+
+    def __init__(self, buyer_name, program_course, product_name, size, quantity, price, or_number, date, item_id=None):
+        self.buyer_name = buyer_name
+        self.program_course = program_course
+        self.product_name = product_name
+        self.size = size
+        self.quantity = quantity
+        self.price = price
+        self.or_number = or_number
+        self.date = date
+        self.item_id = item_id
+
+
+class SaleService:
+    """Validates and records sales against a DatabaseManager"""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self.codes = None  # product code -> (item_id, product_name, size, batch), loaded on first use
+
+    def reload_codes(self):
+        """Rebuild the product code map (after inventory changed)"""
+        self.codes = {code: (item_id, product_name, size, batch)
+                      for code, item_id, product_name, size, batch in self.db.get_product_codes()}
+
+    def lookup_code(self, code):
+        """
+        Batch a typed or scanned product code stands for
+
+        Codes are looked up in memory; the map is reloaded once on a miss, in case
+        the code was added since it was built.
+
+        Returns:
+            tuple: (item_id, product_name, size, batch) or None if unknown
+        """
+        code = self.db.normalize_code(code)
+        if code is None:
+            return None
+        if self.codes is None:
+            self.reload_codes()
+        found = self.codes.get(code)
+        if found is None:
+            self.reload_codes()
+            found = self.codes.get(code)
+        return found
+
+    def quote(self, product_name, size, preferred_item_id=None, as_of=None):
+        """
+        Batch and price a sale of product/size starts from, and the stock available
+
+        Args:
+            preferred_item_id (int): Batch to start from if it has stock (e.g. a scanned code)
+            as_of (str): Sale date (YYYY-MM-DD); a backdated sale is priced as of that date
+
+        Returns:
+            dict: item_id, batch, batch_stock, price (all None when no batch has
+                stock) and available (total across batches)
+        """
+        quote = {'item_id': None, 'batch': None, 'batch_stock': None, 'price': None,
+                 'available': self.db.get_available_stock(product_name, size)}
+        product_data = self.db.get_first_available_batch_for_size(product_name, size, preferred_item_id)
+        if product_data:
+            # product_data: (item_id, product_name, size, batch, stock, price)
+            quote['item_id'], _, _, quote['batch'], quote['batch_stock'], quote['price'] = product_data
+            sale_date = self.sale_date(as_of)
+            if sale_date and sale_date < datetime.now().date().isoformat():
+                quote['price'] = self.db.get_price_as_of(quote['item_id'], sale_date) or quote['price']
+        return quote
+
+    def charge(self, sale, reserved=0):
+        """
+        Amount a sale will be charged, and the batch split it is charged for
+
+        A sale larger than its first batch is split across batches (FIFO), and each
+        portion costs its own batch's price, as add_transaction() records it.
+
+        Args:
+            reserved (int): Pieces of the same product/size taken by earlier cart lines
+
+        Returns:
+            tuple: (amount, split) with split as from DatabaseManager.quote_split();
+                while the stock is not there to split, amount is quantity × the
+                quoted price (None if either is not a number yet)
+        """
+        try:
+            quantity = int(sale.quantity)
+        except (TypeError, ValueError):
+            return None, []
+        split = self.db.quote_split(sale.product_name, sale.size, quantity, sale.item_id,
+                                    self.sale_date(sale.date), reserved)
+        if quantity <= 0 or sum(qty for _, _, qty, _ in split) < quantity:
+            return self.amount(quantity, sale.price), split
+        return round(sum(qty * price for _, _, qty, price in split), 2), split
+
+    @staticmethod
+    def mixed_prices(split):
+        """True if a batch split is charged at more than one unit price"""
+        return len({price for _, _, _, price in split}) > 1
+
+    @staticmethod
+    def sale_date(text):
+        """Sale date text as YYYY-MM-DD, or None if it is not a valid date"""
+        try:
+            return datetime.strptime(str(text), "%Y-%m-%d").date().isoformat() if text else None
+        except ValueError:
+            return None  # validate() reports the bad date
+
+    @staticmethod
+    def parse_amount(text):
+        """Peso amount from entry text such as "₱1,250.00" (None if blank)"""
+        text = str(text).replace('₱', '').replace(',', '').strip()
+        return float(text) if text else None
+
+    @staticmethod
+    def amount(quantity, price):
+        """Total for `quantity` pieces at `price` (None if either is not a number yet)"""
+        try:
+            return int(quantity) * SaleService.parse_amount(price)
+        except (TypeError, ValueError):
+            return None
+
+    def validate(self, sale, reserved=0, check_stock=True):
+        """
+        Check a sale the way the form does, in the same order
+
+        Args:
+            reserved (int): Pieces of the same product/size already in the cart
+            check_stock (bool): False when the caller checks stock itself (carts)
+
+        Returns:
+            tuple: (field, title, message) for the first problem found, or None if the
+                sale can be saved; field names the form input to focus
+        """
+        if not str(sale.buyer_name or '').strip():
+            return ('buyer_name', "Validation Error", "Please enter buyer name")
+        if not str(sale.program_course or '').strip():
+            return ('program_course', "Validation Error", "Please select a Program/Course")
+
+        problem = self.validate_line(sale, reserved, check_stock)
+        if problem:
+            return problem
+
+        if not str(sale.or_number or '').strip():
+            return ('or_number', "Validation Error", "Please enter OR number")
+
+        try:
+            datetime.strptime(str(sale.date), "%Y-%m-%d")
+        except ValueError:
+            return ('date', "Validation Error", "Please enter a valid date (YYYY-MM-DD)")
+        return None
+
+    def validate_line(self, sale, reserved=0, check_stock=True):
+        """Check only the item part of a sale (product, size, quantity, stock, price)"""
+        if not sale.product_name:
+            return ('product_name', "Validation Error", "Please select a product")
+        if not sale.size:
+            return ('size', "Validation Error", "Please select a size")
+
+        try:
+            quantity = int(sale.quantity)
+            if quantity <= 0:
+                raise ValueError()
+        except (TypeError, ValueError):
+            return ('quantity', "Validation Error", "Please enter a valid quantity")
+
+        if check_stock:
+            available_stock = self.db.get_available_stock(sale.product_name, sale.size) - reserved
+            if quantity > available_stock:
+                return ('quantity', "Insufficient Stock", f"Only {available_stock} items available in stock")
+
+        if self.amount(quantity, sale.price) is None:
+            return ('product_name', "Validation Error", "No price found for this product and size")
+        return None
+
+    def or_number_warning(self, sale):
+        """
+        Warning if the sale's OR number is already on another receipt, or None
+
+        Not a validation error (a booklet may really have been issued twice), so the
+        form asks before saving. More items for the same buyer on the same day
+        are the same receipt, not a duplicate.
+        """
+        or_number = str(sale.or_number or '').strip()
+        if not or_number:
+            return None
+        buyer = self.db.normalize_buyer_name(sale.buyer_name).casefold()
+        others = [use for use in self.db.find_or_number_uses(or_number)
+                  if (use[0].casefold(), use[1]) != (buyer, str(sale.date))]
+        if not others:
+            return None
+        buyer_name, date, items = others[-1]
+        more = f" and {len(others) - 1} other receipt(s)" if len(others) > 1 else ""
+        return f"OR {or_number} is already used for {buyer_name} on {date} ({items} item(s)){more}"
+
+    def record(self, sale):
+        """
+        Validate and save a sale
+
+        Returns:
+            tuple: (success, problem) where problem is validate()'s (field, title, message)
+                or None
+        """
+        problem = self.validate(sale)
+        if problem:
+            return False, problem
+        return self.save(sale)
+
+    def save(self, sale):
+        """
+        Save a sale that already passed validate(); it is charged per batch as
+        charge() quotes it, for the split actually taken
+
+        Returns:
+            tuple: (success, problem) as for record()
+        """
+        success = self.db.add_transaction(
+            self.db.normalize_buyer_name(sale.buyer_name),
+            sale.product_name,
+            sale.size,
+            int(sale.quantity),
+            None,
+            sale.or_number.strip(),
+            sale.date,
+            sale.program_course.strip(),
+            item_id=sale.item_id
+        )
+        if not success:
+            return False, (None, "Error", "Failed to save transaction. Please try again.")
+        return True, None
+
+    def requote(self, sales, date):
+        """
+        Date every line of a cart and re-price it as of that date, as it will be
+        saved (a backdated receipt gets that day's prices)
+        """
+        for sale in sales:
+            sale.date = date
+            quote = self.quote(sale.product_name, sale.size, sale.item_id, as_of=date)
+            if quote['price'] is not None:
+                sale.price = quote['price']
+
+    def validate_cart(self, sales):
+        """
+        Check every line of a receipt; stock for all lines is checked in one query.
+        The lines are re-priced for the receipt date (the first line's) first.
+
+        Returns:
+            tuple: (field, title, message) for the first problem found, or None
+        """
+        if not sales:
+            return (None, "Empty Cart", "Add at least one item to the cart")
+        for sale in sales:
+            problem = self.validate(sale, check_stock=False)
+            if problem:
+                return problem
+        self.requote(sales, self.sale_date(sales[0].date))
+
+        wanted = {}
+        for sale in sales:
+            wanted[(sale.product_name, sale.size)] = wanted.get((sale.product_name, sale.size), 0) + int(sale.quantity)
+        levels = self.db.get_available_stocks(list(wanted))
+        for (product_name, size), quantity in wanted.items():
+            if quantity > levels[(product_name, size)]:
+                return ('quantity', "Insufficient Stock",
+                        f"Only {levels[(product_name, size)]} {product_name} ({size}) available in stock")
+        return None
+
+    def record_cart(self, sales):
+        """
+        Validate and save the lines of one receipt together
+
+        Returns:
+            tuple: (success, problem) as for record()
+        """
+        problem = self.validate_cart(sales)
+        if problem:
+            return False, problem
+        return self.save_cart(sales)
+
+    def save_cart(self, sales):
+        """
+        Save the lines of a receipt that already passed validate_cart() in one write;
+        buyer, course, OR number and date are taken from the first line, and each line
+        is charged per batch as for save()
+
+        Returns:
+            tuple: (success, problem) as for record()
+        """
+        first = sales[0]
+        items = [(sale.product_name, sale.size, int(sale.quantity), None, sale.item_id) for sale in sales]
+        success, message = self.db.add_receipt(
+            self.db.normalize_buyer_name(first.buyer_name), first.or_number.strip(), items, first.date, first.program_course.strip())
+        if not success:
+            return False, (None, "Error", message)
+        return True, None
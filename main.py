@@ -8,16 +8,17 @@ Income Generating Project Sales Record System
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import argparse
+import importlib
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from config import configure, ConfigError
 from database.db_manager import DatabaseManager
-from modules.transaction_module import TransactionModule
-from modules.inventory_module import InventoryModule
-from modules.history_module import HistoryModule
-from modules.reports_module import ReportsModule
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image", "logo.png")
 
 
 class LoginWindow(tk.Toplevel):
@@ -58,10 +59,7 @@ class LoginWindow(tk.Toplevel):
         header_frame.pack(fill=tk.X, pady=(0, 20))
         
         try:
-            logo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image", "logo.png")
-            
-            self.logo_img = tk.PhotoImage(file=logo_path)
-            self.logo_img = self.logo_img.subsample(5, 5) 
+            self.logo_img = self.parent.get_logo(5)
             
             title_label = tk.Label(
                 header_frame,
@@ -156,8 +154,8 @@ class LoginWindow(tk.Toplevel):
         password = self.password_entry.get().strip()
         
         if username == "admin" and password == "admin123":
-            self.parent.deiconify()
             self.destroy()
+            self.parent.on_login()
         else:
             messagebox.showerror(
                 "Access Denied", 
@@ -174,12 +172,28 @@ class LoginWindow(tk.Toplevel):
 class MainApplication(tk.Tk):
     """Main application window with navigation"""
     
+    # Navigation screens: (button text, module, class). Modules are imported the
+    # first time their screen is opened, and screens are kept alive afterwards.
+    SCREENS = (
+        ("🏠 Dashboard", "modules.dashboard_module", "DashboardModule"),
+        ("📝 Transaction Entry", "modules.transaction_module", "TransactionModule"),
+        ("📦 Inventory", "modules.inventory_module", "InventoryModule"),
+        ("📊 Sales History", "modules.history_module", "HistoryModule"),
+        ("📈 Reports", "modules.reports_module", "ReportsModule"),
+    )
+    
     def __init__(self):
         super().__init__()
     
         self.withdraw()
         self.db_manager = DatabaseManager()
         
+        # index -> {'container', 'screen', 'version'}; see show_screen()
+        self.screens = {}
+        self.active_screen = None
+        self._logo_source = None
+        self._logos = {}
+        
         self.title("EVSU-OC IGP Sales Record System")
         self.geometry("1450x800")
         self.configure(bg="#f0f0f0")
@@ -190,9 +204,25 @@ class MainApplication(tk.Tk):
         self.create_navigation()
         self.create_content_area()
         
+        LoginWindow(self)
+    
+    def on_login(self):
+        """Show the main window after a successful login"""
+        self.deiconify()
         self.show_transaction_module()
+    
+    def get_logo(self, factor):
+        """
+        Return the logo subsampled by `factor`
         
-        LoginWindow(self)
+        The PNG is decoded once and each size is kept, so the login window and the
+        header share the same images.
+        """
+        if factor not in self._logos:
+            if self._logo_source is None:
+                self._logo_source = tk.PhotoImage(file=LOGO_PATH)
+            self._logos[factor] = self._logo_source.subsample(factor, factor)
+        return self._logos[factor]
     
     def center_window(self):
         """Center the window on the screen"""
@@ -211,10 +241,7 @@ class MainApplication(tk.Tk):
         
         
         try:
-            logo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image", "logo.png")
-            
-            self.header_logo = tk.PhotoImage(file=logo_path)
-            self.header_logo = self.header_logo.subsample(8, 8)
+            self.header_logo = self.get_logo(8)
             
             title_label = tk.Label(
                 header_frame,
@@ -268,12 +295,10 @@ class MainApplication(tk.Tk):
         self.nav_buttons = []
         
         buttons_config = [
-            ("📝 Transaction Entry", self.show_transaction_module),
-            ("📦 Inventory", self.show_inventory_module),
-            ("📊 Sales History", self.show_history_module),
-            ("📈 Reports", self.show_reports_module),
-            ("❌ Exit", self.exit_application)
+            (text, lambda index=index: self.show_screen(index))
+            for index, (text, _, _) in enumerate(self.SCREENS)
         ]
+        buttons_config.append(("❌ Exit", self.exit_application))
         
         for text, command in buttons_config:
             btn = tk.Button(
@@ -299,11 +324,6 @@ class MainApplication(tk.Tk):
         self.content_frame = tk.Frame(self, bg="white")
         self.content_frame.pack(fill=tk.BOTH, expand=True, side=tk.RIGHT)
     
-    def clear_content(self):
-        """Clear the content area"""
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-    
     def highlight_button(self, active_index):
         """Highlight the active navigation button"""
         for i, btn in enumerate(self.nav_buttons):
@@ -312,29 +332,61 @@ class MainApplication(tk.Tk):
             else:
                 btn.configure(bg="#600000", fg="white")
     
+    def show_screen(self, index):
+        """
+        Show a navigation screen, hiding the current one
+        
+        The screen's module is imported and built on first use. Afterwards the same
+        screen is shown again and its refresh() hook (if it has one) runs only when
+        the database changed since the screen last displayed it.
+        """
+        self.highlight_button(index)
+        
+        if self.active_screen is not None:
+            self.screens[self.active_screen]['container'].pack_forget()
+        self.active_screen = index
+        
+        version = self.db_manager.get_data_version()
+        entry = self.screens.get(index)
+        
+        if entry is None:
+            _, module_name, class_name = self.SCREENS[index]
+            module_class = getattr(importlib.import_module(module_name), class_name)
+            container = tk.Frame(self.content_frame, bg="white")
+            container.pack(fill=tk.BOTH, expand=True)
+            self.screens[index] = {
+                'container': container,
+                'screen': module_class(container, self.db_manager),
+                'version': version,
+            }
+            return
+        
+        entry['container'].pack(fill=tk.BOTH, expand=True)
+        if version is None or version != entry['version']:
+            refresh = getattr(entry['screen'], 'refresh', None)
+            if refresh:
+                refresh()
+            entry['version'] = version
+    
+    def show_dashboard_module(self):
+        """Display Sales Dashboard module"""
+        self.show_screen(0)
+    
     def show_transaction_module(self):
         """Display Transaction Entry module"""
-        self.clear_content()
-        self.highlight_button(0)
-        TransactionModule(self.content_frame, self.db_manager)
+        self.show_screen(1)
     
     def show_inventory_module(self):
         """Display Inventory Management module"""
-        self.clear_content()
-        self.highlight_button(1)
-        InventoryModule(self.content_frame, self.db_manager)
+        self.show_screen(2)
     
     def show_history_module(self):
         """Display Sales History module"""
-        self.clear_content()
-        self.highlight_button(2)
-        HistoryModule(self.content_frame, self.db_manager)
+        self.show_screen(3)
     
     def show_reports_module(self):
         """Display Reports module"""
-        self.clear_content()
-        self.highlight_button(3)
-        ReportsModule(self.content_frame, self.db_manager)
+        self.show_screen(4)
     
     def exit_application(self):
         """Exit the application"""
@@ -344,9 +396,20 @@ class MainApplication(tk.Tk):
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="EVSU-OC IGP Sales Record System")
+    parser.add_argument("--profile", help="configuration profile, e.g. low-ram or desktop")
+    args, _ = parser.parse_known_args()
+    try:
+        configure(args.profile)
+    except ConfigError as e:
+        messagebox.showerror("Configuration Error", str(e))
+        print(e)
+        return
+    
     try:
         app = MainApplication()
         app.mainloop()
+        app.db_manager.close()
     except Exception as e:
         messagebox.showerror("Error", f"Application error: {str(e)}")
         print(f"Error: {e}")
@@ -2,6 +2,33 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import sqlite3
 import os
+import sys
+import time
+import argparse
+
+from config import configure, get_config, ConfigError
+from database.maintenance import DatabaseMaintenance
+
+# Rows fetched per round trip while streaming query results
+FETCH_CHUNK = 200
+# Statements that cannot run inside the transaction a script is wrapped in
+TRANSACTION_STATEMENTS = ("BEGIN", "COMMIT", "END", "ROLLBACK", "SAVEPOINT", "RELEASE", "VACUUM")
+
+
+def split_statements(script):
+    """Split an SQL script into complete statements (semicolons inside strings are kept)"""
+    lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+    statements, buffer = [], ""
+    for piece in "\n".join(lines).split(";"):
+        buffer += piece + ";"
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip(" \n\t;"):
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip(" \n\t;"):
+        statements.append(buffer.strip().rstrip(";"))
+    return statements
+
 
 class DatabaseTool:
     def __init__(self, root):
@@ -9,19 +36,37 @@ class DatabaseTool:
         self.root.title("EVSU-OC IGP Database Manager")
         self.root.geometry("1000x700")
         
-        # Database Path
-        self.db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "igp_sales.db")
+        # Database path and view sizes come from the configuration (see config.py), so
+        # this tool always opens the same database as the main system
+        config = get_config()
+        self.db_path = config.db_path
+        self.busy_timeout = config.get("database", "busy_timeout")
+        self.page_size = config.get("views", "table_page_size")        # rows per page when browsing a table
+        self.result_row_cap = config.get("views", "result_row_cap")    # most rows a query may display
+        
+        # Keyset pagination state: key columns of the table (rowid, or the primary key
+        # of a WITHOUT ROWID table), the key each visited page started after, and the
+        # key of every row shown (by Treeview item) for deleting it
+        self.page_key = []
+        self.page_starts = []
+        self.next_after_key = None
+        self.row_keys = {}
+        # Views (inventory, transactions) are listed too, but are read-only
+        self.views = set()
+        
+        self.maintenance = DatabaseMaintenance(self.db_path)
         
         # UI Setup
         self.create_ui()
         self.load_tables()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def get_connection(self):
         """Create database connection"""
         if not os.path.exists(self.db_path):
             messagebox.showerror("Error", f"Database not found at:\n{self.db_path}")
             return None
-        return sqlite3.connect(self.db_path)
+        return sqlite3.connect(self.db_path, timeout=self.busy_timeout)
 
     def create_ui(self):
         toolbar = tk.Frame(self.root, bg="#f0f0f0", padx=10, pady=10)
@@ -36,6 +81,7 @@ class DatabaseTool:
         tk.Button(toolbar, text="🔄 Refresh Data", command=self.load_data, bg="#3498db", fg="white").pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="🗑️ Delete Selected Row", command=self.delete_selected_row, bg="#e74c3c", fg="white").pack(side=tk.LEFT, padx=5)
         tk.Button(toolbar, text="⚠️ Clear Entire Table", command=self.clear_table, bg="#c0392b", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(toolbar, text="🧰 Maintenance", command=self.show_maintenance, bg="#8e44ad", fg="white").pack(side=tk.LEFT, padx=5)
 
 
         tree_frame = tk.Frame(self.root)
@@ -53,41 +99,102 @@ class DatabaseTool:
         x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
         self.tree.pack(fill=tk.BOTH, expand=True)
 
+        page_frame = tk.Frame(self.root, padx=10)
+        page_frame.pack(fill=tk.X)
+        
+        self.prev_btn = tk.Button(page_frame, text="◀ Prev", command=self.prev_page, state=tk.DISABLED)
+        self.prev_btn.pack(side=tk.LEFT)
+        self.next_btn = tk.Button(page_frame, text="Next ▶", command=self.next_page, state=tk.DISABLED)
+        self.next_btn.pack(side=tk.LEFT, padx=5)
+        self.page_label = tk.Label(page_frame, text="", fg="#7f8c8d")
+        self.page_label.pack(side=tk.LEFT, padx=10)
+
         sql_frame = tk.LabelFrame(self.root, text="Execute SQL Query (Advanced)", padx=10, pady=10)
         sql_frame.pack(fill=tk.X, padx=10, pady=10)
         
         self.sql_text = scrolledtext.ScrolledText(sql_frame, height=5, font=("Consolas", 10))
         self.sql_text.pack(fill=tk.X, pady=5)
-        self.sql_text.insert(tk.END, "-- Type SQL query here (e.g., INSERT INTO inventory...)\n")
+        self.sql_text.insert(tk.END, "-- Type SQL query here (e.g., SELECT * FROM inventory...)\n")
         
         btn_frame = tk.Frame(sql_frame)
         btn_frame.pack(fill=tk.X)
         
         tk.Button(btn_frame, text="▶️ Execute Query", command=self.execute_sql, bg="#27ae60", fg="white", font=("Arial", 10, "bold")).pack(side=tk.RIGHT)
-        tk.Label(btn_frame, text="Use this area to manually ADD data or fix issues using SQL commands.", fg="#7f8c8d").pack(side=tk.LEFT)
+        tk.Label(btn_frame, text=f"Runs one or more statements; SELECT results show in the table above (max {self.result_row_cap} rows).", fg="#7f8c8d").pack(side=tk.LEFT)
+        
+        self.sql_log = scrolledtext.ScrolledText(sql_frame, height=6, font=("Consolas", 9), state=tk.DISABLED, bg="#fafafa")
+        self.sql_log.pack(fill=tk.X, pady=(5, 0))
 
     def load_tables(self):
-        """Load list of tables from database"""
+        """Load list of tables and views from database"""
         conn = self.get_connection()
         if conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name != 'sqlite_sequence'")
-            tables = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') AND name != 'sqlite_sequence'")
+            rows = cursor.fetchall()
+            tables = [name for name, _ in rows]
+            self.views = {name for name, kind in rows if kind == 'view'}
             self.table_combo['values'] = tables
             if tables:
                 self.table_combo.current(0)
                 self.load_data()
             conn.close()
 
+    def setup_columns(self, columns):
+        """Reset the Treeview to show the given columns"""
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = columns
+        self.tree["show"] = "headings"
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=150, anchor="w")
+
     def load_data(self, event=None):
-        """Load data from selected table into Treeview"""
+        """Load the first page of the selected table into Treeview"""
+        self.page_starts = []
+        self.load_page(None)
+
+    def next_page(self):
+        """Show the page after the current one"""
+        if self.next_after_key is not None:
+            self.load_page(self.next_after_key)
+
+    def prev_page(self):
+        """Show the page before the current one"""
+        if len(self.page_starts) > 1:
+            self.page_starts.pop()
+            self.load_page(self.page_starts.pop())
+
+    def key_columns(self, cursor, table):
+        """
+        Columns that identify a row: rowid, or the primary key of a WITHOUT ROWID table;
+        none for a view
+        """
+        if table in self.views:
+            return []
+        try:
+            cursor.execute(f"SELECT rowid FROM {table} LIMIT 0")
+            return ["rowid"]
+        except sqlite3.OperationalError:
+            cursor.execute(f"PRAGMA table_info({table})")
+            return [col[1] for col in sorted(cursor.fetchall(), key=lambda col: col[5]) if col[5]]
+
+    def load_page(self, after_key):
+        """
+        Load one page of the selected table using keyset pagination on its key columns
+        
+        Only views.table_page_size rows are read per page, so browsing stays instant on large
+        tables (no OFFSET scans, no loading the whole table).
+        
+        Views have no key, so they are paged by offset instead.
+        
+        Args:
+            after_key (tuple): Key of the last row of the previous page, or for a view the
+                number of rows before the page (None for the first page)
+        """
         table = self.table_combo.get()
         if not table: return
         
-        # Clear existing view
-        self.tree.delete(*self.tree.get_children())
-        self.tree["columns"] = ()
-        
         conn = self.get_connection()
         if conn:
             cursor = conn.cursor()
@@ -95,21 +202,44 @@ class DatabaseTool:
                 # Get column names
                 cursor.execute(f"PRAGMA table_info({table})")
                 columns = [col[1] for col in cursor.fetchall()]
+                self.setup_columns(columns)
                 
-                # Setup Treeview columns
-                self.tree["columns"] = columns
-                self.tree["show"] = "headings"
-                
-                for col in columns:
-                    self.tree.heading(col, text=col)
-                    self.tree.column(col, width=150, anchor="w")
+                self.page_key = self.key_columns(cursor, table)
+                key = ", ".join(self.page_key)
+                where = f"WHERE ({key}) > ({', '.join('?' for _ in self.page_key)})" if after_key else ""
                 
-                # Fetch data
-                cursor.execute(f"SELECT * FROM {table}")
+                # Fetch one extra row to know whether a next page exists
+                if self.page_key:
+                    cursor.execute(
+                        f"SELECT {key}, * FROM {table} {where} ORDER BY {key} LIMIT ?",
+                        (*(after_key or ()), self.page_size + 1)
+                    )
+                else:
+                    cursor.execute(f"SELECT * FROM {table} LIMIT ? OFFSET ?", (self.page_size + 1, after_key or 0))
                 rows = cursor.fetchall()
+                has_more = len(rows) > self.page_size
+                rows = rows[:self.page_size]
                 
+                # Each row's key is kept so it can be deleted without assuming a rowid
+                width = len(self.page_key)
+                self.row_keys = {}
                 for row in rows:
-                    self.tree.insert("", tk.END, values=row)
+                    self.row_keys[self.tree.insert("", tk.END, values=row[width:])] = row[:width]
+                
+                self.page_starts.append(after_key)
+                if not has_more:
+                    self.next_after_key = None
+                elif self.page_key:
+                    self.next_after_key = rows[-1][:width]
+                else:
+                    self.next_after_key = (after_key or 0) + self.page_size
+                first = (len(self.page_starts) - 1) * self.page_size + 1
+                kind = " (view, read-only)" if table in self.views else ""
+                self.page_label.config(
+                    text=f"{table}{kind}: page {len(self.page_starts)}, rows {first}–{first + len(rows) - 1}" if rows else f"{table}{kind}: no rows"
+                )
+                self.prev_btn.config(state=tk.NORMAL if len(self.page_starts) > 1 else tk.DISABLED)
+                self.next_btn.config(state=tk.NORMAL if has_more else tk.DISABLED)
                     
             except Exception as e:
                 messagebox.showerror("Error", str(e))
@@ -124,22 +254,25 @@ class DatabaseTool:
             return
             
         table = self.table_combo.get()
-        # Assume first column is always the Primary Key (ID)
-        item_values = self.tree.item(selected_item)['values']
-        record_id = item_values[0]
+        if not self.page_starts:
+            messagebox.showwarning("Warning", "Rows from a query result cannot be deleted here. Browse the table instead.")
+            return
+        if table in self.views:
+            messagebox.showwarning("Warning", f"'{table}' is a read-only view. Delete the row from its table instead.")
+            return
+        record_key = self.row_keys[selected_item[0]]
+        record_id = ", ".join(str(value) for value in record_key)
         
-        # Get primary key column name dynamically
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info({table})")
-        pk_col = cursor.fetchone()[1] # First column name
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete record ID {record_id}?"):
             try:
-                cursor.execute(f"DELETE FROM {table} WHERE {pk_col} = ?", (record_id,))
+                match = " AND ".join(f"{column} = ?" for column in self.page_key)
+                cursor.execute(f"DELETE FROM {table} WHERE {match}", record_key)
                 conn.commit()
                 messagebox.showinfo("Success", "Record deleted.")
-                self.load_data()
+                self.load_page(self.page_starts.pop())
             except Exception as e:
                 messagebox.showerror("Error", str(e))
             finally:
@@ -148,6 +281,9 @@ class DatabaseTool:
     def clear_table(self):
         """Clear all data from selected table"""
         table = self.table_combo.get()
+        if table in self.views:
+            messagebox.showwarning("Warning", f"'{table}' is a read-only view and cannot be cleared.")
+            return
         if messagebox.askyesno("DANGER", f"⚠️ Are you sure you want to delete ALL data in '{table}'?\nThis cannot be undone!"):
             conn = self.get_connection()
             cursor = conn.cursor()
@@ -163,26 +299,170 @@ class DatabaseTool:
             finally:
                 conn.close()
 
+    def log(self, text):
+        """Append a line to the SQL output log"""
+        self.sql_log.config(state=tk.NORMAL)
+        self.sql_log.insert(tk.END, text + "\n")
+        self.sql_log.see(tk.END)
+        self.sql_log.config(state=tk.DISABLED)
+
+    def show_result(self, cursor):
+        """
+        Stream a result set into the Treeview in chunks, stopping at views.result_row_cap
+        
+        Returns:
+            tuple: (rows shown, True if more rows were left unread)
+        """
+        self.setup_columns([d[0] for d in cursor.description])
+        self.page_starts = []
+        self.next_after_key = None
+        self.prev_btn.config(state=tk.DISABLED)
+        self.next_btn.config(state=tk.DISABLED)
+        
+        shown = 0
+        while shown < self.result_row_cap:
+            rows = cursor.fetchmany(min(FETCH_CHUNK, self.result_row_cap - shown))
+            if not rows:
+                return shown, False
+            for row in rows:
+                self.tree.insert("", tk.END, values=row)
+            shown += len(rows)
+            # Let the first rows appear while the rest are fetched
+            self.root.update_idletasks()
+        return shown, cursor.fetchone() is not None
+
     def execute_sql(self):
-        """Execute raw SQL from text area"""
-        query = self.sql_text.get("1.0", tk.END).strip()
-        if not query or query.startswith("--"):
+        """Execute raw SQL (one or more statements) from text area"""
+        statements = split_statements(self.sql_text.get("1.0", tk.END))
+        if not statements:
             messagebox.showwarning("Warning", "Please enter a SQL query.")
             return
 
         conn = self.get_connection()
+        if not conn: return
+        # Autocommit mode, so sqlite3 never commits on its own before DDL; the script's
+        # transaction is opened explicitly and covers CREATE/DROP/ALTER as well
+        conn.isolation_level = None
         cursor = conn.cursor()
+        showed_result = False
+        wrapped = not any(statement.split(None, 1)[0].upper().rstrip(";") in TRANSACTION_STATEMENTS
+                          for statement in statements)
         try:
-            cursor.execute(query)
-            conn.commit()
-            messagebox.showinfo("Success", "Query executed successfully!")
-            self.load_data()
+            if wrapped:
+                # The whole script runs as one transaction: all statements or none
+                cursor.execute("BEGIN")
+            else:
+                self.log("[ note     ] script manages its own transactions; statements are not wrapped")
+            for statement in statements:
+                summary = " ".join(statement.split())[:80]
+                start = time.perf_counter()
+                cursor.execute(statement)
+                if cursor.description:
+                    shown, truncated = self.show_result(cursor)
+                    elapsed = (time.perf_counter() - start) * 1000
+                    more = f" (capped at {self.result_row_cap})" if truncated else ""
+                    self.log(f"[{elapsed:8.1f} ms] {summary}  →  {shown} row(s){more}")
+                    self.page_label.config(text=f"Query result: {shown} row(s){more}")
+                    showed_result = True
+                    if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                        plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+                        for _, _, _, detail in plan:
+                            self.log(f"{'':13}plan: {detail}")
+                else:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    affected = f"{cursor.rowcount} row(s) affected" if cursor.rowcount >= 0 else "done"
+                    self.log(f"[{elapsed:8.1f} ms] {summary}  →  {affected}")
+            if conn.in_transaction:
+                conn.commit()
+            if not showed_result:
+                self.load_data()
         except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            outcome = "script rolled back" if wrapped else "statements before it were kept"
+            self.log(f"[ error    ] {e}  ({outcome})")
             messagebox.showerror("SQL Error", str(e))
         finally:
             conn.close()
 
+    def show_maintenance(self):
+        """Open the database maintenance panel"""
+        if not os.path.exists(self.db_path):
+            messagebox.showerror("Error", f"Database not found at:\n{self.db_path}")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Database Maintenance")
+        window.geometry("700x600")
+        
+        btn_frame = tk.Frame(window, padx=10, pady=10)
+        btn_frame.pack(fill=tk.X)
+        
+        output = scrolledtext.ScrolledText(window, font=("Consolas", 10))
+        output.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        
+        def show(text):
+            output.delete("1.0", tk.END)
+            output.insert(tk.END, text)
+        
+        def run(action, done_message):
+            window.config(cursor="watch")
+            window.update_idletasks()
+            try:
+                result = action()
+                show(done_message(result) + "\n\n" + self.maintenance.format_stats())
+            except Exception as e:
+                messagebox.showerror("Maintenance Error", str(e), parent=window)
+            finally:
+                window.config(cursor="")
+        
+        def enable_incremental():
+            if not messagebox.askyesno(
+                "Convert Database",
+                "This rewrites the whole database file once (VACUUM).\nMake sure nobody is recording sales. Continue?",
+                parent=window
+            ):
+                return
+            run(self.maintenance.enable_incremental_vacuum,
+                lambda converted: "Converted to auto_vacuum=INCREMENTAL." if converted else "Already INCREMENTAL.")
+        
+        def reclaim():
+            # Steps run on a background thread; report back on the Tk thread
+            def on_done(pages):
+                window.after(0, lambda: show(f"Reclaimed {pages:,} free page(s).\n\n" + self.maintenance.format_stats()))
+            if self.maintenance.reclaim_free_pages(on_done):
+                show("Reclaiming free pages in the background...")
+        
+        buttons = [
+            ("📊 Stats", lambda: show(self.maintenance.format_stats())),
+            ("🔍 ANALYZE", lambda: run(self.maintenance.analyze, lambda _: "ANALYZE complete.")),
+            ("⚡ Optimize", lambda: run(self.maintenance.optimize, lambda _: "PRAGMA optimize complete.")),
+            ("🔁 Enable Incremental Vacuum", enable_incremental),
+            ("🧹 Reclaim Free Pages", reclaim),
+            ("⏱️ Full Maintenance + Timings", lambda: run(self.maintenance.run_full_maintenance, self.maintenance.format_timings)),
+        ]
+        for text, command in buttons:
+            tk.Button(btn_frame, text=text, command=command).pack(side=tk.LEFT, padx=3)
+        
+        show(self.maintenance.format_stats())
+
+    def on_close(self):
+        """Refresh stale planner statistics before exiting"""
+        try:
+            if os.path.exists(self.db_path):
+                self.maintenance.optimize()
+        except sqlite3.Error as e:
+            print(f"PRAGMA optimize failed: {e}")
+        self.root.destroy()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EVSU-OC IGP Database Manager")
+    parser.add_argument("--profile", help="configuration profile, e.g. low-ram or desktop")
+    try:
+        configure(parser.parse_args().profile)
+    except ConfigError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
     root = tk.Tk()
     app = DatabaseTool(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Sales Dashboard Module
+At-a-glance view of today's and this week's sales, refreshed every few seconds
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+
+from config import get_config
+from database.live_sales import LiveSales
+
+
+class DashboardModule:
+    """Live sales dashboard interface"""
+
+    def __init__(self, parent, db_manager):
+        self.parent = parent
+        self.db = db_manager
+        # How often the dashboard checks for new activity (views.dashboard_refresh_seconds)
+        self.refresh_ms = int(get_config().get("views", "dashboard_refresh_seconds") * 1000)
+        self.live = LiveSales(db_manager)
+        self.data_version = None
+
+        # Create main frame
+        self.main_frame = tk.Frame(parent, bg="white")
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+
+        self.create_ui()
+        self.live.reset()
+        self.data_version = self.db.get_data_version()
+        self.update_display()
+        self.main_frame.after(self.refresh_ms, self.poll)
+
+    def create_ui(self):
+        """Create dashboard interface"""
+        # Title
+        tk.Label(
+            self.main_frame,
+            text="🏠 SALES DASHBOARD",
+            font=("Arial", 18, "bold"),
+            bg="white",
+            fg="#800000"  # Maroon
+        ).pack(pady=(0, 20))
+
+        # --- Summary Cards ---
+        cards_frame = tk.Frame(self.main_frame, bg="white")
+        cards_frame.pack(fill=tk.X, pady=(0, 15))
+
+        self.cards = {}
+        cards = (
+            ("today_revenue", "Today's Revenue", "#800000"),
+            ("today_items", "Items Sold Today", "#27ae60"),
+            ("week_revenue", "This Week's Revenue", "#800000"),
+            ("week_items", "Items Sold This Week", "#27ae60"),
+        )
+        for column, (key, title, color) in enumerate(cards):
+            card = tk.Frame(cards_frame, bg="#f8f9fa", bd=1, relief=tk.SOLID, padx=15, pady=10)
+            card.grid(row=0, column=column, sticky="nsew", padx=5)
+            cards_frame.grid_columnconfigure(column, weight=1)
+
+            tk.Label(card, text=title, font=("Arial", 10), bg="#f8f9fa", fg="#555").pack(anchor="w")
+            value_label = tk.Label(card, text="—", font=("Arial", 20, "bold"), bg="#f8f9fa", fg=color)
+            value_label.pack(anchor="w")
+            detail_label = tk.Label(card, text="", font=("Arial", 9), bg="#f8f9fa", fg="#777")
+            detail_label.pack(anchor="w")
+            self.cards[key] = (value_label, detail_label)
+
+        # --- Bottom: Top Products + Sparkline ---
+        bottom_frame = tk.Frame(self.main_frame, bg="white")
+        bottom_frame.pack(fill=tk.BOTH, expand=True)
+
+        top_frame = tk.LabelFrame(bottom_frame, text="Top Products This Week", font=("Arial", 11, "bold"), bg="white", padx=10, pady=10)
+        top_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 10))
+
+        columns = ("Product", "Qty", "Revenue")
+        self.top_tree = ttk.Treeview(top_frame, columns=columns, show="headings", height=8)
+        self.top_tree.heading("Product", text="Product")
+        self.top_tree.heading("Qty", text="Qty Sold")
+        self.top_tree.heading("Revenue", text="Revenue (₱)")
+        self.top_tree.column("Product", width=250, anchor="w")
+        self.top_tree.column("Qty", width=90, anchor="center")
+        self.top_tree.column("Revenue", width=130, anchor="e")
+        self.top_tree.pack(fill=tk.BOTH, expand=True)
+
+        trend_frame = tk.LabelFrame(
+            bottom_frame,
+            text=f"Daily Revenue (last {LiveSales.WINDOW_DAYS} days)",
+            font=("Arial", 11, "bold"),
+            bg="white",
+            padx=10,
+            pady=10
+        )
+        trend_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 5))
+
+        self.sparkline = tk.Canvas(trend_frame, bg="white", height=200, highlightthickness=0)
+        self.sparkline.pack(fill=tk.BOTH, expand=True)
+        self.sparkline.bind("<Configure>", lambda event: self.draw_sparkline())
+
+        self.updated_label = tk.Label(self.main_frame, text="", font=("Arial", 9), bg="white", fg="#999")
+        self.updated_label.pack(anchor="e", pady=(10, 0))
+
+    def poll(self):
+        """Fold in new activity, then schedule the next check"""
+        if not self.main_frame.winfo_exists():
+            return
+        self.refresh()
+        self.main_frame.after(self.refresh_ms, self.poll)
+
+    def refresh(self):
+        """Apply sales recorded, edited or deleted since the last refresh"""
+        version = self.db.get_data_version()
+        day_changed = self.live.today != datetime.now().date()
+        if version is not None and version == self.data_version and not day_changed:
+            return
+        self.data_version = version
+        if self.live.poll() or day_changed:
+            self.update_display()
+
+    def update_display(self):
+        """Redraw cards, top products and sparkline from the running totals"""
+        today = self.live.today_totals()
+        week = self.live.week_totals()
+        for key, totals in (("today", today), ("week", week)):
+            revenue_label, revenue_detail = self.cards[f"{key}_revenue"]
+            revenue_label.config(text=f"₱{totals['revenue']:,.2f}")
+            revenue_detail.config(text=f"{totals['transactions']:,} transactions")
+            items_label, items_detail = self.cards[f"{key}_items"]
+            items_label.config(text=f"{totals['items']:,}")
+            items_detail.config(text=f"since {self.live.week_start}" if key == "week" else self.live.today.isoformat())
+
+        for item in self.top_tree.get_children():
+            self.top_tree.delete(item)
+        for product_name, quantity, revenue in self.live.top_products():
+            self.top_tree.insert("", tk.END, values=(product_name, quantity, f"₱{revenue:,.2f}"))
+
+        self.draw_sparkline()
+        self.updated_label.config(text=f"Updated {datetime.now().strftime('%H:%M:%S')}")
+
+    def draw_sparkline(self):
+        """Draw daily revenue as a line, highlighting today"""
+        canvas = self.sparkline
+        canvas.delete("all")
+        if self.live.today is None:
+            return
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        if width < 20 or height < 20:
+            return
+
+        days = self.live.daily_revenue()
+        peak = max(revenue for _, revenue in days) or 1.0
+        pad = 15
+        step = (width - 2 * pad) / max(len(days) - 1, 1)
+        points = []
+        for i, (_, revenue) in enumerate(days):
+            points.append(pad + i * step)
+            points.append(height - pad - (revenue / peak) * (height - 2 * pad))
+
+        canvas.create_line(pad, height - pad, width - pad, height - pad, fill="#ddd")
+        canvas.create_line(*points, fill="#800000", width=2)
+        x, y = points[-2], points[-1]
+        canvas.create_oval(x - 4, y - 4, x + 4, y + 4, fill="#FFC107", outline="#800000")
+        canvas.create_text(pad, pad, text=f"peak ₱{peak:,.0f}", anchor="nw", fill="#777", font=("Arial", 8))
+        canvas.create_text(width - pad, pad, text=f"today ₱{days[-1][1]:,.0f}", anchor="ne", fill="#800000", font=("Arial", 8, "bold"))
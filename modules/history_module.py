@@ -48,6 +48,17 @@ class HistoryModule:
         self.buyer_search = tk.Entry(row1, font=("Arial", 10), width=20)
         self.buyer_search.pack(side=tk.LEFT, padx=5)
 
+        # Also find misspelled / differently spaced names ("Delacruz" for "Dela Cruz")
+        self.fuzzy_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            row1,
+            text="≈ Similar names",
+            variable=self.fuzzy_var,
+            font=("Arial", 9),
+            bg="white",
+            activebackground="white"
+        ).pack(side=tk.LEFT)
+
         tk.Label(row1, text="Product:", font=("Arial", 10), bg="white").pack(side=tk.LEFT, padx=(15, 5))
         self.product_search = tk.Entry(row1, font=("Arial", 10), width=20)
         self.product_search.pack(side=tk.LEFT, padx=5)
@@ -175,19 +186,21 @@ class HistoryModule:
         total_revenue = 0
 
         for trans in transactions:
-            trans_id, buyer, product, size, qty, amount, or_num, date = trans
+            trans_id, buyer, product, size, qty, amount, or_num, date, batch = trans
 
             amount_str = f"₱{amount:,.2f}"
             total_revenue += amount
-
-            prod_data = self.db.get_product_by_name_size(product, size)
-            batch = prod_data[3] if prod_data and len(prod_data) > 3 else ''
+            batch = batch or ''
 
             # include transaction id as first column
             self.tree.insert("", tk.END, values=(trans_id, buyer, product, batch, size, qty, amount_str, or_num, date))
 
         self.stats_label.config(text=f"Total Transactions: {len(transactions)} | Total Revenue: ₱{total_revenue:,.2f}")
 
+    def refresh(self):
+        """Reload history after the database changed elsewhere"""
+        self.load_all_transactions()
+
     def search_transactions(self):
         buyer = self.buyer_search.get().strip()
         product = self.product_search.get().strip()
@@ -217,19 +230,18 @@ class HistoryModule:
             product_name=product if product else None,
             or_number=or_num if or_num else None,
             start_date=start if start else None,
-            end_date=end if end else None
+            end_date=end if end else None,
+            fuzzy_buyer=self.fuzzy_var.get()
         )
 
         total_revenue = 0
 
         for trans in transactions:
-            trans_id, buyer, product, size, qty, amount, or_num, date = trans
+            trans_id, buyer, product, size, qty, amount, or_num, date, batch = trans
 
             amount_str = f"₱{amount:,.2f}"
             total_revenue += amount
-
-            prod_data = self.db.get_product_by_name_size(product, size)
-            batch = prod_data[3] if prod_data and len(prod_data) > 3 else ''
+            batch = batch or ''
 
             self.tree.insert("", tk.END, values=(trans_id, buyer, product, batch, size, qty, amount_str, or_num, date))
 
@@ -240,6 +252,7 @@ class HistoryModule:
 
     def clear_filters(self):
         self.buyer_search.delete(0, tk.END)
+        self.fuzzy_var.set(False)
         self.product_search.delete(0, tk.END)
         self.or_search.delete(0, tk.END)
         try:
@@ -330,9 +343,13 @@ class HistoryModule:
             s = size_combo.get()
             try:
                 q = int(qty_entry.get())
-                prod_data = self.db.get_product_by_name_size(p, s)
-                if prod_data:
-                    price = prod_data[5]
+                sale_date = datetime.strptime(date_entry.get(), "%Y-%m-%d").date().isoformat()
+                # The price on the sale date, not today's; for the same item, that of the batch it was sold from
+                if (p, s) == (str(curr_prod), str(curr_size)):
+                    price = self.db.get_sale_price(trans_id, sale_date)
+                else:
+                    price = self.db.get_product_price_as_of(p, s, sale_date)
+                if price is not None:
                     new_total = price * q
                     amount_entry.delete(0, tk.END)
                     amount_entry.insert(0, f"{new_total:.2f}")
@@ -4,7 +4,10 @@ Handles product inventory, stock tracking, and product management
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+
+from database.forecasting import REORDER_DAYS
+from database.inventory_import import import_inventory_csv
 
 
 class InventoryModule:
@@ -14,6 +17,10 @@ class InventoryModule:
         self.parent = parent
         self.db = db_manager
         self.selected_item = None
+        self.forecast = {}
+        self.codes = {}
+        self.sort_column = None
+        self.sort_reverse = False
         
         # Create main frame
         self.main_frame = tk.Frame(parent, bg="white")
@@ -87,6 +94,20 @@ class InventoryModule:
         )
         add_stock_btn.pack(side=tk.LEFT, padx=5)
         
+        # Change Prices button (Blue)
+        price_btn = tk.Button(
+            controls_frame,
+            text="💲 Change Prices",
+            font=("Arial", 11, "bold"),
+            bg="#2980b9",  # Blue
+            fg="white",
+            padx=15,
+            pady=10,
+            cursor="hand2",
+            command=self.show_price_change_dialog
+        )
+        price_btn.pack(side=tk.LEFT, padx=5)
+        
         # Update Product button (Maroon)
         update_btn = tk.Button(
             controls_frame,
@@ -115,6 +136,34 @@ class InventoryModule:
         )
         delete_btn.pack(side=tk.LEFT, padx=5)
         
+        # Retire Batch button (Dark Gray)
+        retire_btn = tk.Button(
+            controls_frame,
+            text="📦 Retire Batch",
+            font=("Arial", 11, "bold"),
+            bg="#7f8c8d",  # Dark Gray
+            fg="white",
+            padx=15,
+            pady=10,
+            cursor="hand2",
+            command=self.retire_batch
+        )
+        retire_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Import CSV button (Teal)
+        import_btn = tk.Button(
+            controls_frame,
+            text="📥 Import CSV",
+            font=("Arial", 11, "bold"),
+            bg="#16a085",  # Teal
+            fg="white",
+            padx=15,
+            pady=10,
+            cursor="hand2",
+            command=self.import_csv
+        )
+        import_btn.pack(side=tk.LEFT, padx=5)
+        
         # Refresh button (Neutral - Gray)
         refresh_btn = tk.Button(
             controls_frame,
@@ -129,12 +178,26 @@ class InventoryModule:
         )
         refresh_btn.pack(side=tk.LEFT, padx=5)
         
+        # Reorder Alerts button (Orange)
+        alerts_btn = tk.Button(
+            controls_frame,
+            text="⚠️ Reorder Alerts",
+            font=("Arial", 11, "bold"),
+            bg="#e67e22",  # Orange
+            fg="white",
+            padx=15,
+            pady=10,
+            cursor="hand2",
+            command=self.show_reorder_alerts
+        )
+        alerts_btn.pack(side=tk.LEFT, padx=5)
+        
         # Table frame
         table_frame = tk.Frame(self.main_frame, bg="white")
         table_frame.pack(fill=tk.BOTH, expand=True)
         
         # Create Treeview
-        columns = ("Product Name", "Size", "Batch", "Stock", "Price")
+        columns = ("Product Name", "Size", "Batch", "Stock", "Price", "Days Left", "Code")
         self.tree = ttk.Treeview(
             table_frame,
             columns=columns,
@@ -142,12 +205,18 @@ class InventoryModule:
             height=15
         )
         
-        # Define column headings
-        self.tree.heading("Product Name", text="Product Name")
-        self.tree.heading("Size", text="Size")
-        self.tree.heading("Batch", text="Batch")
-        self.tree.heading("Stock", text="Available Stock")
-        self.tree.heading("Price", text="Price (₱)")
+        # Define column headings (click a heading to sort by it)
+        self.headings = {
+            "Product Name": "Product Name",
+            "Size": "Size",
+            "Batch": "Batch",
+            "Stock": "Available Stock",
+            "Price": "Price (₱)",
+            "Days Left": "Days Left",
+            "Code": "Code",
+        }
+        for column, text in self.headings.items():
+            self.tree.heading(column, text=text, command=lambda c=column: self.sort_by(c))
         
         # Define column widths
         self.tree.column("Product Name", width=350, anchor="w")
@@ -155,6 +224,8 @@ class InventoryModule:
         self.tree.column("Batch", width=120, anchor="center")
         self.tree.column("Stock", width=120, anchor="center")
         self.tree.column("Price", width=120, anchor="e")
+        self.tree.column("Days Left", width=100, anchor="center")
+        self.tree.column("Code", width=110, anchor="center")
         
         # Scrollbars
         vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
@@ -182,10 +253,16 @@ class InventoryModule:
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        # Load from database
+        # Load from database (the forecast reads per-item velocity, not sales history)
         inventory = self.db.get_all_inventory()
+        self.forecast = self.db.get_stock_forecast()
+        self.codes = {item_id: code for code, item_id, _, _, _ in self.db.get_product_codes()}
         self.populate_tree(inventory)
 
+    def refresh(self):
+        """Reload inventory after the database changed elsewhere"""
+        self.load_inventory()
+
     def filter_inventory(self, event=None):
         """Filter inventory based on search text"""
         search_text = self.search_entry.get().lower()
@@ -202,7 +279,8 @@ class InventoryModule:
         for item in all_inventory:
             # item structure: (item_id, product_name, size, stock, price)
             prod_name = str(item[1]).lower()
-            if search_text in prod_name:
+            code = (self.codes.get(item[0]) or '').lower()
+            if search_text in prod_name or (search_text and code.startswith(search_text)):
                 filtered_items.append(item)
                 
         self.populate_tree(filtered_items)
@@ -216,11 +294,18 @@ class InventoryModule:
             # Format price
             price_str = f"₱{price:,.2f}"
             
-            # Determine tag based on stock level
+            # Days until the product/size (all batches) runs out at its current pace
+            days_left = self.forecast.get((product_name, size), (stock, 0.0, None))[2]
+            days_str = "—" if days_left is None else f"{days_left:,.0f}"
+            
+            # Determine tag based on stock level and how fast the item sells;
+            # items with no recent sales fall back to the fixed threshold
             tag = ""
             if stock == 0:
                 tag = "out_of_stock"
-            elif stock < 10:
+            elif days_left is not None and days_left <= REORDER_DAYS:
+                tag = "low_stock"
+            elif days_left is None and stock < 10:
                 tag = "low_stock"
             
             # Insert into tree - skip item_id from display, use item_id as iid
@@ -228,9 +313,101 @@ class InventoryModule:
                 "",
                 tk.END,
                 iid=item_id,
-                values=(product_name, size, batch, stock, price_str),
+                values=(product_name, size, batch, stock, price_str, days_str, self.codes.get(item_id, '')),
                 tags=(tag,) if tag else ()
             )
+        
+        if self.sort_column:
+            self.apply_sort()
+    
+    def sort_key(self, column, value):
+        """Sort key for a displayed cell: numbers numerically, '—' (not selling) last"""
+        text = str(value)
+        if column in ("Stock", "Price", "Days Left"):
+            try:
+                return (0, float(text.replace('₱', '').replace(',', '')))
+            except ValueError:
+                return (1, 0.0)
+        if column == "Batch":
+            return (0, int(text)) if text.isdigit() else (1, text)
+        return (0, text.lower())
+    
+    def sort_by(self, column):
+        """Sort by a column; clicking the same heading again reverses the order"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.apply_sort()
+    
+    def apply_sort(self):
+        """Reorder the rows currently shown by the selected column"""
+        column = self.sort_column
+        index = self.tree["columns"].index(column)
+        rows = [(self.sort_key(column, self.tree.item(iid)['values'][index]), iid) for iid in self.tree.get_children()]
+        rows.sort(reverse=self.sort_reverse)
+        for position, (_, iid) in enumerate(rows):
+            self.tree.move(iid, "", position)
+        
+        for name, text in self.headings.items():
+            arrow = (" ▼" if self.sort_reverse else " ▲") if name == column else ""
+            self.tree.heading(name, text=text + arrow)
+    
+    def show_reorder_alerts(self):
+        """Show products projected to run out within REORDER_DAYS, soonest first"""
+        alerts = self.db.get_reorder_alerts()
+        
+        dialog = tk.Toplevel(self.parent)
+        dialog.title("Reorder Alerts")
+        dialog.geometry("620x400")
+        dialog.configure(bg="white")
+        dialog.transient(self.parent)
+        
+        tk.Label(
+            dialog,
+            text=f"⚠️ Running out within {REORDER_DAYS} days",
+            font=("Arial", 14, "bold"),
+            bg="white",
+            fg="#e67e22"  # Orange
+        ).pack(pady=10)
+        
+        if not alerts:
+            tk.Label(
+                dialog,
+                text="No items are projected to run out soon.",
+                font=("Arial", 11),
+                bg="white"
+            ).pack(pady=20)
+        else:
+            columns = ("Product Name", "Size", "Stock", "Sold/Day", "Days Left")
+            alert_tree = ttk.Treeview(dialog, columns=columns, show="headings", height=12)
+            widths = (220, 80, 80, 90, 90)
+            for column, width in zip(columns, widths):
+                alert_tree.heading(column, text=column)
+                alert_tree.column(column, width=width, anchor="w" if column == "Product Name" else "center")
+            alert_tree.tag_configure("out_of_stock", background="#ffcccc", foreground="#e74c3c")
+            
+            for product_name, size, stock, rate, days_left in alerts:
+                alert_tree.insert(
+                    "",
+                    tk.END,
+                    values=(product_name, size, stock, f"{rate:.2f}", f"{days_left:,.1f}"),
+                    tags=("out_of_stock",) if stock <= 0 else ()
+                )
+            alert_tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        tk.Button(
+            dialog,
+            text="Close",
+            font=("Arial", 11, "bold"),
+            bg="#95a5a6",
+            fg="white",
+            padx=20,
+            pady=5,
+            cursor="hand2",
+            command=dialog.destroy
+        ).pack(pady=10)
     
     def on_select(self, event):
         """Handle tree selection"""
@@ -241,11 +418,10 @@ class InventoryModule:
             self.selected_item = (item_id,) + values
     
     def show_add_stock_dialog(self):
-        """Show dialog to quickly add stock to existing product"""
+        """Show dialog to add a delivery to any number of sizes/batches of a product at once"""
         dialog = tk.Toplevel(self.parent)
         dialog.title("Add Stock")
-        dialog.geometry("400x350")
-        dialog.resizable(False, False)
+        dialog.geometry("520x560")
         dialog.configure(bg="white")
         
         dialog.transient(self.parent)
@@ -259,131 +435,199 @@ class InventoryModule:
             fg="#27ae60"  # Green
         ).pack(pady=15)
         
+        top_frame = tk.Frame(dialog, bg="white")
+        top_frame.pack(pady=5)
+        
+        tk.Label(top_frame, text="Product:", font=("Arial", 11, "bold"), bg="white").pack(side=tk.LEFT, padx=10)
+        product_combo = ttk.Combobox(top_frame, font=("Arial", 11), width=25, state="readonly")
+        product_combo.pack(side=tk.LEFT, padx=10)
+        product_combo['values'] = self.db.get_unique_products()
+        
+        tk.Label(
+            dialog,
+            text="Enter the quantity delivered for each size/batch (leave the rest blank)",
+            font=("Arial", 9),
+            bg="white",
+            fg="#7f8c8d"
+        ).pack()
+        
+        # Scrollable list of the product's batches, one quantity entry each
+        list_frame = tk.Frame(dialog, bg="white")
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
+        canvas = tk.Canvas(list_frame, bg="white", highlightthickness=0)
+        vsb = ttk.Scrollbar(list_frame, orient="vertical", command=canvas.yview)
+        rows_frame = tk.Frame(canvas, bg="white")
+        rows_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=rows_frame, anchor="nw")
+        canvas.configure(yscrollcommand=vsb.set)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # item_id -> (label, quantity entry)
+        entries = {}
+        
+        def on_product_change(event):
+            for widget in rows_frame.winfo_children():
+                widget.destroy()
+            entries.clear()
+            
+            for column, text in enumerate(("Size", "Batch", "In Stock", "Quantity to Add")):
+                tk.Label(rows_frame, text=text, font=("Arial", 10, "bold"), bg="white").grid(
+                    row=0, column=column, padx=8, pady=(0, 5), sticky="w")
+            
+            batches = self.db.get_product_batches(product_combo.get())
+            for row, (item_id, size, batch, stock, price) in enumerate(batches, start=1):
+                tk.Label(rows_frame, text=size, font=("Arial", 10), bg="white").grid(row=row, column=0, padx=8, sticky="w")
+                tk.Label(rows_frame, text=batch or "(no batch)", font=("Arial", 10), bg="white").grid(row=row, column=1, padx=8, sticky="w")
+                tk.Label(rows_frame, text=stock, font=("Arial", 10), bg="white").grid(row=row, column=2, padx=8)
+                qty_entry = tk.Entry(rows_frame, font=("Arial", 10), width=10)
+                qty_entry.grid(row=row, column=3, padx=8, pady=2)
+                entries[item_id] = (f"{size} [Batch: {batch or '-'}]", qty_entry)
+            if not batches:
+                tk.Label(rows_frame, text="-- No existing batches --", font=("Arial", 10), bg="white").grid(
+                    row=1, column=0, columnspan=4, pady=10)
+        
+        product_combo.bind("<<ComboboxSelected>>", on_product_change)
+        
+        def preview_stock():
+            if not product_combo.get():
+                messagebox.showerror("Error", "Please select a product", parent=dialog)
+                return
+            
+            lines = []
+            for item_id, (label, qty_entry) in entries.items():
+                qty_str = qty_entry.get().strip()
+                if not qty_str:
+                    continue
+                try:
+                    qty = int(qty_str)
+                except ValueError:
+                    messagebox.showerror("Error", f"Please enter a valid number for {label}", parent=dialog)
+                    return
+                if qty <= 0:
+                    messagebox.showerror("Error", f"Quantity for {label} must be positive", parent=dialog)
+                    return
+                lines.append((item_id, qty))
+            if not lines:
+                messagebox.showerror("Error", "Please enter the quantity for at least one size/batch", parent=dialog)
+                return
+            
+            self.show_bulk_preview(
+                dialog,
+                "Add Stock",
+                "Stock",
+                self.db.preview_restock(lines),
+                lambda expected: self.db.restock_batches(lines, expected),
+                "Added stock to {} batch(es)"
+            )
+        
+        # Buttons
+        btn_frame = tk.Frame(dialog, bg="white")
+        btn_frame.pack(pady=15)
+        
+        tk.Button(
+            btn_frame,
+            text="🔍 Preview",
+            font=("Arial", 11, "bold"),
+            bg="#27ae60",
+            fg="white",
+            padx=20,
+            pady=8,
+            cursor="hand2",
+            command=preview_stock
+        ).pack(side=tk.LEFT, padx=10)
+        
+        tk.Button(
+            btn_frame,
+            text="❌ Cancel",
+            font=("Arial", 11, "bold"),
+            bg="#95a5a6",
+            fg="white",
+            padx=20,
+            pady=8,
+            cursor="hand2",
+            command=dialog.destroy
+        ).pack(side=tk.LEFT, padx=10)
+    
+    def show_price_change_dialog(self):
+        """Show dialog to change every price of a product (or of one size) by a percentage"""
+        dialog = tk.Toplevel(self.parent)
+        dialog.title("Change Prices")
+        dialog.geometry("420x300")
+        dialog.resizable(False, False)
+        dialog.configure(bg="white")
+        
+        dialog.transient(self.parent)
+        dialog.grab_set()
+        
+        tk.Label(
+            dialog,
+            text="Change Prices",
+            font=("Arial", 16, "bold"),
+            bg="white",
+            fg="#2980b9"  # Blue
+        ).pack(pady=15)
+        
         form_frame = tk.Frame(dialog, bg="white")
         form_frame.pack(pady=10)
         
-        # 1. Product Dropdown
         tk.Label(form_frame, text="Product:", font=("Arial", 11, "bold"), bg="white").grid(row=0, column=0, sticky="w", pady=10, padx=10)
-        
         product_combo = ttk.Combobox(form_frame, font=("Arial", 11), width=23, state="readonly")
         product_combo.grid(row=0, column=1, pady=10, padx=10)
+        product_combo['values'] = self.db.get_unique_products()
         
-        # Populate Products
-        products = self.db.get_unique_products()
-        product_combo['values'] = products
-        
-        # 2. Size Dropdown
         tk.Label(form_frame, text="Size:", font=("Arial", 11, "bold"), bg="white").grid(row=1, column=0, sticky="w", pady=10, padx=10)
-        
         size_combo = ttk.Combobox(form_frame, font=("Arial", 11), width=23, state="readonly")
         size_combo.grid(row=1, column=1, pady=10, padx=10)
         
-        # Event: When product selected, load sizes
         def on_product_change(event):
-            selected_prod = product_combo.get()
-            if selected_prod:
-                sizes = self.db.get_sizes_for_product(selected_prod)
-                size_combo['values'] = sizes
-                size_combo.set('')
+            size_combo['values'] = ["All sizes"] + self.db.get_sizes_for_product(product_combo.get())
+            size_combo.set("All sizes")
         
         product_combo.bind("<<ComboboxSelected>>", on_product_change)
         
-        # 3. Batch Dropdown (choose which batch to add stock to)
-        tk.Label(form_frame, text="Batch:", font=("Arial", 11, "bold"), bg="white").grid(row=2, column=0, sticky="w", pady=10, padx=10)
-
-        batch_combo = ttk.Combobox(form_frame, font=("Arial", 11), width=23, state="readonly")
-        batch_combo.grid(row=2, column=1, pady=10, padx=10)
-
-        # Map displayed batch -> item_id
-        batch_map = {}
-
-        # Load batches when size is selected
-        def on_size_change(event):
-            selected_prod = product_combo.get()
-            selected_size = size_combo.get()
-            batch_map.clear()
-            batch_combo.set('')
-            batch_combo['values'] = []
-            if not selected_prod or not selected_size:
-                return
-
-            # Gather batches for this product+size from inventory
-            try:
-                inv = self.db.get_all_inventory()
-                batches = []
-                for row in inv:
-                    # row structure: (item_id, product_name, size, batch, stock, price)
-                    item_id, pname, sz, batch, stock, price = row
-                    if pname == selected_prod and sz == selected_size:
-                        display = batch if batch else f"(no batch) - {item_id}"
-                        if display not in batches:
-                            batches.append(display)
-                            batch_map[display] = item_id
-
-                if batches:
-                    batch_combo['values'] = batches
-                else:
-                    # No existing batches found
-                    batch_combo['values'] = ["-- No existing batches --"]
-                    batch_map["-- No existing batches --"] = None
-            except Exception:
-                batch_combo['values'] = ["-- Error loading batches --"]
-                batch_map["-- Error loading batches --"] = None
-
-        size_combo.bind("<<ComboboxSelected>>", on_size_change)
-
-        # 4. Quantity Entry
-        tk.Label(form_frame, text="Quantity to Add:", font=("Arial", 11, "bold"), bg="white").grid(row=3, column=0, sticky="w", pady=10, padx=10)
-
-        qty_entry = tk.Entry(form_frame, font=("Arial", 11), width=25)
-        qty_entry.grid(row=3, column=1, pady=10, padx=10)
+        tk.Label(form_frame, text="Change (%):", font=("Arial", 11, "bold"), bg="white").grid(row=2, column=0, sticky="w", pady=10, padx=10)
+        percent_entry = tk.Entry(form_frame, font=("Arial", 11), width=25)
+        percent_entry.grid(row=2, column=1, pady=10, padx=10)
         
-        # Logic to Save
-        def save_stock():
-            prod = product_combo.get()
-            size = size_combo.get()
-            qty_str = qty_entry.get().strip()
-            selected_batch = batch_combo.get()
-
-            if not prod or not size:
-                messagebox.showerror("Error", "Please select a product and size")
+        def preview_prices():
+            product = product_combo.get()
+            if not product:
+                messagebox.showerror("Error", "Please select a product", parent=dialog)
                 return
-            
             try:
-                qty = int(qty_str)
-                if qty <= 0:
-                    messagebox.showerror("Error", "Quantity must be positive")
-                    return
-                # Determine target item_id from selected batch
-                target_item_id = batch_map.get(selected_batch)
-                if target_item_id is None:
-                    messagebox.showerror("Error", "Please select an existing batch to add stock to")
-                    return
-
-                # Update Database using specific item_id so only chosen batch is modified
-                if self.db.update_stock(item_id=target_item_id, quantity_change=qty):
-                    messagebox.showinfo("Success", f"Added {qty} stock to {prod} ({size}) [Batch: {selected_batch}]")
-                    dialog.destroy()
-                    self.load_inventory()
-                else:
-                    messagebox.showerror("Error", "Failed to update stock")
+                percent = float(percent_entry.get().strip().rstrip('%'))
             except ValueError:
-                messagebox.showerror("Error", "Please enter a valid number")
-
-        # Buttons
+                messagebox.showerror("Error", "Please enter a percentage, e.g. 10 or -5", parent=dialog)
+                return
+            if percent == 0 or percent <= -100:
+                messagebox.showerror("Error", "Please enter a change above -100% other than 0", parent=dialog)
+                return
+            size = size_combo.get()
+            size = None if size == "All sizes" else size
+            
+            self.show_bulk_preview(
+                dialog,
+                "Change Prices",
+                "Price",
+                self.db.preview_price_change(product, percent, size),
+                lambda expected: self.db.change_prices(product, percent, size, expected),
+                "Repriced {} batch(es)"
+            )
+        
         btn_frame = tk.Frame(dialog, bg="white")
-        btn_frame.pack(pady=20)
+        btn_frame.pack(pady=10)
         
         tk.Button(
             btn_frame,
-            text="💾 Add Stock",
+            text="🔍 Preview",
             font=("Arial", 11, "bold"),
-            bg="#27ae60",
+            bg="#2980b9",
             fg="white",
             padx=20,
             pady=8,
             cursor="hand2",
-            command=save_stock
+            command=preview_prices
         ).pack(side=tk.LEFT, padx=10)
         
         tk.Button(
@@ -397,12 +641,153 @@ class InventoryModule:
             cursor="hand2",
             command=dialog.destroy
         ).pack(side=tk.LEFT, padx=10)
+    
+    def retire_batch(self):
+        """Write off the remaining stock of the selected row's batch, in every size"""
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("Warning", "Please select a batch to retire")
+            return
+        
+        item_id = int(selection[0])  # iid is item_id
+        product_name = str(self.tree.item(selection[0])['values'][0])
+        # Read the batch label back from the database, as the Treeview turns "01" into 1
+        batch = next((batch for other_id, _, batch, _, _ in self.db.get_product_batches(product_name)
+                      if other_id == item_id), None)
+        if batch is None:
+            messagebox.showerror("Error", "This batch no longer exists. Please refresh.")
+            return
+        
+        self.show_bulk_preview(
+            self.parent,
+            f"Retire Batch {batch or '(no batch)'} of {product_name}",
+            "Stock",
+            self.db.preview_retire_batch(product_name, batch),
+            lambda expected: self.db.retire_batch(product_name, batch, expected),
+            "Retired {} batch(es)"
+        )
+    
+    def import_csv(self):
+        """Upsert a supplier spreadsheet saved as CSV (product_name, size, batch, stock, price)"""
+        path = filedialog.askopenfilename(
+            title="Import Inventory CSV",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        
+        add_stock = messagebox.askyesnocancel(
+            "Import Inventory",
+            "For batches already in inventory, add the file's stock to the current stock?\n\n"
+            "Yes: add (a delivery)\nNo: replace (a stock count)"
+        )
+        if add_stock is None:
+            return
+        
+        try:
+            result = import_inventory_csv(self.db, path, add_stock)
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"Could not read the file:\n{e}")
+            return
+        
+        summary = (f"Inserted {result['inserted']} batch(es)\n"
+                   f"Updated {result['updated']} batch(es)\n"
+                   f"Rejected {len(result['rejected'])} line(s)")
+        if result['rejected']:
+            shown = result['rejected'][:15]
+            summary += "\n\n" + "\n".join(f"Line {line_no}: {reason}" for line_no, reason in shown)
+            if len(result['rejected']) > len(shown):
+                summary += f"\n... and {len(result['rejected']) - len(shown)} more"
+            messagebox.showwarning("Import Inventory", summary)
+        else:
+            messagebox.showinfo("Import Inventory", summary)
+        self.load_inventory()
+    
+    def show_bulk_preview(self, parent, title, column, rows, apply, done_message):
+        """
+        Show the rows a bulk change will touch, then apply it in one go
+        
+        Args:
+            rows (list): Preview from the database:
+                [(item_id, product_name, size, batch, current, new), ...]
+            apply (callable): Called with the number of previewed rows; returns
+                (success, rows changed or error message)
+            done_message (str): Success message, formatted with the rows changed
+        """
+        if not rows:
+            messagebox.showinfo(title, "No batches would change.", parent=parent)
+            return
+        
+        preview = tk.Toplevel(parent)
+        preview.title(f"Preview - {title}")
+        preview.geometry("640x420")
+        preview.configure(bg="white")
+        preview.transient(parent)
+        preview.grab_set()
+        
+        tk.Label(
+            preview,
+            text=f"{title}: {len(rows)} batch(es) will change",
+            font=("Arial", 13, "bold"),
+            bg="white",
+            fg="#800000"  # Maroon
+        ).pack(pady=10)
+        
+        columns = ("Product Name", "Size", "Batch", "Current", "New")
+        preview_tree = ttk.Treeview(preview, columns=columns, show="headings", height=12)
+        for name, width in zip(columns, (220, 90, 90, 100, 100)):
+            heading = f"{name} {column}" if name in ("Current", "New") else name
+            preview_tree.heading(name, text=heading)
+            preview_tree.column(name, width=width, anchor="w" if name == "Product Name" else "center")
+        
+        show = (lambda value: f"₱{value:,.2f}") if column == "Price" else (lambda value: value)
+        for item_id, product_name, size, batch, current, new in rows:
+            preview_tree.insert("", tk.END, values=(product_name, size, batch, show(current), show(new)))
+        preview_tree.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        def confirm():
+            success, result = apply(len(rows))
+            if success:
+                messagebox.showinfo("Success", done_message.format(result), parent=preview)
+                preview.destroy()
+                if parent is not self.parent:
+                    parent.destroy()
+                self.load_inventory()
+            else:
+                messagebox.showerror("Error", result, parent=preview)
+        
+        btn_frame = tk.Frame(preview, bg="white")
+        btn_frame.pack(pady=10)
+        
+        tk.Button(
+            btn_frame,
+            text="✅ Apply",
+            font=("Arial", 11, "bold"),
+            bg="#27ae60",
+            fg="white",
+            padx=20,
+            pady=8,
+            cursor="hand2",
+            command=confirm
+        ).pack(side=tk.LEFT, padx=10)
+        
+        tk.Button(
+            btn_frame,
+            text="❌ Cancel",
+            font=("Arial", 11, "bold"),
+            bg="#95a5a6",
+            fg="white",
+            padx=20,
+            pady=8,
+            cursor="hand2",
+            command=preview.destroy
+        ).pack(side=tk.LEFT, padx=10)
 
     def show_add_dialog(self):
         """Show dialog to add new product"""
         dialog = tk.Toplevel(self.parent)
         dialog.title("Add New Product")
-        dialog.geometry("450x400")
+        dialog.geometry("450x450")
         dialog.resizable(False, False)
         dialog.configure(bg="white")
         
@@ -482,6 +867,17 @@ class InventoryModule:
         price_entry = tk.Entry(form_frame, font=("Arial", 11), width=25)
         price_entry.grid(row=4, column=1, pady=10, padx=10)
         
+        # Product code (optional; typed or scanned in Transaction Entry)
+        tk.Label(
+            form_frame,
+            text="Product Code:",
+            font=("Arial", 11, "bold"),
+            bg="white"
+        ).grid(row=5, column=0, sticky="w", pady=10, padx=10)
+        
+        code_entry = tk.Entry(form_frame, font=("Arial", 11), width=25)
+        code_entry.grid(row=5, column=1, pady=10, padx=10)
+        
         # Button frame
         btn_frame = tk.Frame(dialog, bg="white")
         btn_frame.pack(pady=20)
@@ -505,16 +901,21 @@ class InventoryModule:
                     return
                 
                 # Check if product already exists with same batch
-                existing = self.db.get_product_by_name_size(product, size)
-                if existing and existing[3] == batch:
+                existing = self.db.get_product_batches(product)
+                if any(other_size == size and other_batch == batch for _, other_size, other_batch, _, _ in existing):
                     messagebox.showerror(
                         "Error",
                         f"Product '{product}' with size '{size}' and batch '{batch}' already exists"
                     )
                     return
                 
+                code = self.db.normalize_code(code_entry.get())
+                if code and code in self.codes.values():
+                    messagebox.showerror("Error", f"Product code '{code}' is already used by another item")
+                    return
+                
                 # Save to database
-                if self.db.add_product(product, size, stock, price, batch):
+                if self.db.add_product(product, size, stock, price, batch, code):
                     messagebox.showinfo("Success", "Product added successfully!")
                     dialog.destroy()
                     self.load_inventory()
@@ -559,12 +960,12 @@ class InventoryModule:
         
         item_id = int(selection[0])
         values = self.tree.item(selection[0])['values']
-        product_name, size, batch_val, stock, price_str = values
+        product_name, size, batch_val, stock, price_str = values[:5]
         price = float(price_str.replace('₱', '').replace(',', ''))
         
         dialog = tk.Toplevel(self.parent)
         dialog.title("Update Product")
-        dialog.geometry("450x400")
+        dialog.geometry("450x450")
         dialog.resizable(False, False)
         dialog.configure(bg="white")
         
@@ -644,6 +1045,18 @@ class InventoryModule:
         price_entry.grid(row=4, column=1, pady=10, padx=10)
         price_entry.insert(0, str(price))
         
+        # Product code
+        tk.Label(
+            form_frame,
+            text="Product Code:",
+            font=("Arial", 11, "bold"),
+            bg="white"
+        ).grid(row=5, column=0, sticky="w", pady=10, padx=10)
+        
+        code_entry = tk.Entry(form_frame, font=("Arial", 11), width=25)
+        code_entry.grid(row=5, column=1, pady=10, padx=10)
+        code_entry.insert(0, self.codes.get(item_id, ''))
+        
         # Button frame
         btn_frame = tk.Frame(dialog, bg="white")
         btn_frame.pack(pady=20)
@@ -666,8 +1079,13 @@ class InventoryModule:
                     messagebox.showerror("Error", "Stock and price must be positive")
                     return
                 
+                code = self.db.normalize_code(code_entry.get())
+                if code and any(other == code for other_id, other in self.codes.items() if other_id != item_id):
+                    messagebox.showerror("Error", f"Product code '{code}' is already used by another item")
+                    return
+                
                 # Update in database
-                if self.db.update_product(item_id, product, size_val, stock_val, price_val, batch_val_new):
+                if self.db.update_product(item_id, product, size_val, stock_val, price_val, batch_val_new, code or ''):
                     messagebox.showinfo("Success", "Product updated successfully!")
                     dialog.destroy()
                     self.load_inventory()
@@ -98,6 +98,18 @@ class ReportsModule:
             command=self.generate_monthly_report
         ).pack(side=tk.LEFT, padx=20)
         
+        tk.Button(
+            monthly_frame,
+            text="🎓 By Course",
+            font=("Arial", 11, "bold"),
+            bg="#800000",  # Maroon
+            fg="white",
+            padx=15,
+            pady=8,
+            cursor="hand2",
+            command=self.generate_monthly_course_report
+        ).pack(side=tk.LEFT)
+        
         # Separator
         ttk.Separator(options_frame, orient="horizontal").pack(fill=tk.X, pady=15)
         
@@ -176,6 +188,30 @@ class ReportsModule:
             command=self.generate_custom_report
         ).pack(side=tk.LEFT, padx=20)
         
+        tk.Button(
+            custom_frame,
+            text="🎓 By Course",
+            font=("Arial", 11, "bold"),
+            bg="#800000",  # Maroon
+            fg="white",
+            padx=15,
+            pady=8,
+            cursor="hand2",
+            command=self.generate_custom_course_report
+        ).pack(side=tk.LEFT)
+        
+        tk.Button(
+            custom_frame,
+            text="🧾 OR Audit",
+            font=("Arial", 11, "bold"),
+            bg="#34495e",
+            fg="white",
+            padx=15,
+            pady=8,
+            cursor="hand2",
+            command=self.generate_or_audit
+        ).pack(side=tk.LEFT, padx=10)
+        
         # Report display frame
         self.report_frame = tk.Frame(self.main_frame, bg="white")
         self.report_frame.pack(fill=tk.BOTH, expand=True)
@@ -200,15 +236,15 @@ class ReportsModule:
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid year")
     
-    def generate_custom_report(self):
-        """Generate custom date range report"""
+    def get_custom_range(self):
+        """Return the validated (start, end) custom dates, or None after showing an error"""
         start_date = self.custom_start_date.get().strip()
         end_date = self.custom_end_date.get().strip()
         
         # Validate dates
         if not start_date or not end_date:
             messagebox.showerror("Error", "Please enter both start and end dates")
-            return
+            return None
         
         try:
             datetime.strptime(start_date, "%Y-%m-%d")
@@ -218,7 +254,16 @@ class ReportsModule:
                 "Error",
                 "Invalid date format. Please use YYYY-MM-DD"
             )
+            return None
+        
+        return start_date, end_date
+    
+    def generate_custom_report(self):
+        """Generate custom date range report"""
+        date_range = self.get_custom_range()
+        if not date_range:
             return
+        start_date, end_date = date_range
         
         # Get report data
         report_data = self.db.get_date_range_report(start_date, end_date)
@@ -229,6 +274,260 @@ class ReportsModule:
             report_data
         )
     
+    def generate_monthly_course_report(self):
+        """Generate per-course breakdown for the selected month"""
+        try:
+            month_name = self.month_combo.get()
+            year = int(self.year_entry.get())
+            month = list(calendar.month_name).index(month_name)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid year")
+            return
+        
+        last_day = calendar.monthrange(year, month)[1]
+        breakdown = self.db.get_course_breakdown(f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day:02d}")
+        self.display_course_report(f"{month_name} {year} Sales by Course", breakdown)
+    
+    def generate_custom_course_report(self):
+        """Generate per-course breakdown for the custom date range"""
+        date_range = self.get_custom_range()
+        if not date_range:
+            return
+        start_date, end_date = date_range
+        
+        breakdown = self.db.get_course_breakdown(start_date, end_date)
+        self.display_course_report(f"Sales by Course ({start_date} to {end_date})", breakdown)
+    
+    def generate_or_audit(self):
+        """Find duplicate and skipped OR numbers in the custom date range"""
+        date_range = self.get_custom_range()
+        if not date_range:
+            return
+        start_date, end_date = date_range
+        
+        audit = self.db.get_or_number_audit(start_date, end_date)
+        if audit is None:
+            messagebox.showerror("Error", "Failed to audit OR numbers")
+            return
+        self.display_or_audit(f"OR Number Audit ({start_date} to {end_date})", audit)
+    
+    def display_or_audit(self, title, audit):
+        """Display duplicate OR numbers (with every receipt using them) and skipped ranges"""
+        report_window = tk.Toplevel(self.parent)
+        report_window.title(title)
+        report_window.geometry("900x650")
+        report_window.configure(bg="white")
+        self.center_window(report_window)
+        
+        header_frame = tk.Frame(report_window, bg="#800000", padx=20, pady=15)
+        header_frame.pack(fill=tk.X)
+        
+        tk.Label(
+            header_frame,
+            text="EVSU-OC IGP OR NUMBER AUDIT",
+            font=("Arial", 16, "bold"),
+            bg="#800000",
+            fg="white"
+        ).pack()
+        
+        tk.Label(
+            header_frame,
+            text=title,
+            font=("Arial", 12),
+            bg="#800000",
+            fg="white"
+        ).pack()
+        
+        missing = sum(last - first + 1 for _, first, last in audit['gaps'])
+        tk.Label(
+            report_window,
+            text=f"Receipts: {audit['receipts']} in {audit['booklets']} booklet(s)  |  "
+                 f"Duplicates: {len(audit['duplicates'])}  |  Skipped numbers: {missing}",
+            font=("Arial", 12, "bold"),
+            bg="white",
+            fg="#800000"
+        ).pack(pady=10)
+        
+        table_frame = tk.Frame(report_window, bg="white", padx=20)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        if audit['duplicates'] or audit['gaps']:
+            # Duplicates are parents with one child per receipt using the number
+            columns = ("Buyer", "Date", "Items")
+            tree = ttk.Treeview(table_frame, columns=columns, show="tree headings", height=18)
+            tree.heading("#0", text="OR Number")
+            tree.heading("Buyer", text="Buyer")
+            tree.heading("Date", text="Date")
+            tree.heading("Items", text="Items")
+            tree.column("#0", width=260, anchor="w")
+            tree.column("Buyer", width=280, anchor="w")
+            tree.column("Date", width=120, anchor="center")
+            tree.column("Items", width=80, anchor="center")
+            
+            if audit['duplicates']:
+                duplicates = tree.insert("", tk.END, text=f"Duplicates ({len(audit['duplicates'])})", open=True)
+                for or_number, uses in audit['duplicates']:
+                    parent = tree.insert(duplicates, tk.END, text=or_number, values=(f"{len(uses)} receipts", "", ""), open=True)
+                    for buyer_name, date, items in uses:
+                        tree.insert(parent, tk.END, text="", values=(buyer_name, date, items))
+            if audit['gaps']:
+                gaps = tree.insert("", tk.END, text=f"Skipped numbers ({missing})", open=True)
+                for booklet, first, last in audit['gaps']:
+                    span = f"{booklet}{first}" if first == last else f"{booklet}{first} to {booklet}{last}"
+                    tree.insert(gaps, tk.END, text=span, values=(f"{last - first + 1} missing", "", ""))
+            
+            scroll = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scroll.set)
+            tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        else:
+            tk.Label(
+                table_frame,
+                text="No duplicate or skipped OR numbers in this period",
+                font=("Arial", 12, "italic"),
+                bg="white",
+                fg="#27ae60"
+            ).pack(pady=30)
+        
+        button_frame = tk.Frame(report_window, bg="white", pady=15, padx=20)
+        button_frame.pack(fill=tk.X)
+        
+        tk.Button(
+            button_frame,
+            text="💾 Export to Excel",
+            font=("Arial", 12, "bold"),
+            bg="#27ae60",  # Green
+            fg="white",
+            padx=30,
+            pady=12,
+            cursor="hand2",
+            command=lambda: self.export_or_audit(audit, title)
+        ).pack(side=tk.LEFT, padx=10)
+        
+        tk.Button(
+            button_frame,
+            text="❌ Close",
+            font=("Arial", 12, "bold"),
+            bg="#800000",  # Maroon
+            fg="white",
+            padx=30,
+            pady=12,
+            cursor="hand2",
+            command=report_window.destroy
+        ).pack(side=tk.LEFT, padx=10)
+    
+    def display_course_report(self, title, breakdown):
+        """Display per-course totals with each course's product mix underneath"""
+        report_window = tk.Toplevel(self.parent)
+        report_window.title(title)
+        report_window.geometry("900x650")
+        report_window.configure(bg="white")
+        self.center_window(report_window)
+        
+        header_frame = tk.Frame(report_window, bg="#800000", padx=20, pady=15)
+        header_frame.pack(fill=tk.X)
+        
+        tk.Label(
+            header_frame,
+            text="EVSU-OC IGP SALES BY PROGRAM/COURSE",
+            font=("Arial", 16, "bold"),
+            bg="#800000",
+            fg="white"
+        ).pack()
+        
+        tk.Label(
+            header_frame,
+            text=title,
+            font=("Arial", 12),
+            bg="#800000",
+            fg="white"
+        ).pack()
+        
+        tk.Label(
+            report_window,
+            text=f"Courses: {len(breakdown['courses'])}  |  Items Sold: {breakdown['total_quantity']}  |  "
+                 f"Total Revenue: ₱{breakdown['total_revenue']:,.2f}",
+            font=("Arial", 12, "bold"),
+            bg="white",
+            fg="#800000"
+        ).pack(pady=10)
+        
+        table_frame = tk.Frame(report_window, bg="white", padx=20)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        if breakdown['courses']:
+            # Course rows are parents; expanding one shows its product mix
+            columns = ("Transactions", "Qty", "Revenue", "Share")
+            tree = ttk.Treeview(table_frame, columns=columns, show="tree headings", height=18)
+            tree.heading("#0", text="Program/Course / Product")
+            tree.heading("Transactions", text="Transactions")
+            tree.heading("Qty", text="Qty")
+            tree.heading("Revenue", text="Revenue")
+            tree.heading("Share", text="% of Revenue")
+            tree.column("#0", width=300, anchor="w")
+            tree.column("Transactions", width=110, anchor="center")
+            tree.column("Qty", width=80, anchor="center")
+            tree.column("Revenue", width=130, anchor="e")
+            tree.column("Share", width=110, anchor="center")
+            
+            total = breakdown['total_revenue'] or 1
+            for course, count, qty, revenue in breakdown['courses']:
+                parent = tree.insert(
+                    "",
+                    tk.END,
+                    text=course or "(No course)",
+                    values=(count, qty, f"₱{revenue:,.2f}", f"{revenue / total:.1%}"),
+                    open=False
+                )
+                for product, p_count, p_qty, p_revenue in breakdown['product_mix'][course]:
+                    share = p_revenue / revenue if revenue else 0
+                    tree.insert(
+                        parent,
+                        tk.END,
+                        text=f"    {product}",
+                        values=(p_count, p_qty, f"₱{p_revenue:,.2f}", f"{share:.1%} of course")
+                    )
+            
+            scroll = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scroll.set)
+            tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        else:
+            tk.Label(
+                table_frame,
+                text="No transactions found for this period",
+                font=("Arial", 12, "italic"),
+                bg="white",
+                fg="#95a5a6"
+            ).pack(pady=30)
+        
+        button_frame = tk.Frame(report_window, bg="white", pady=15, padx=20)
+        button_frame.pack(fill=tk.X)
+        
+        tk.Button(
+            button_frame,
+            text="💾 Export to Excel",
+            font=("Arial", 12, "bold"),
+            bg="#27ae60",  # Green
+            fg="white",
+            padx=30,
+            pady=12,
+            cursor="hand2",
+            command=lambda: self.export_course_breakdown(breakdown, title)
+        ).pack(side=tk.LEFT, padx=10)
+        
+        tk.Button(
+            button_frame,
+            text="❌ Close",
+            font=("Arial", 12, "bold"),
+            bg="#800000",  # Maroon
+            fg="white",
+            padx=30,
+            pady=12,
+            cursor="hand2",
+            command=report_window.destroy
+        ).pack(side=tk.LEFT, padx=10)
+    
     def center_window(self, window):
         """Center a window on screen"""
         window.update_idletasks()
@@ -444,19 +743,69 @@ class ReportsModule:
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
             
+    def ask_export_path(self, title):
+        """Ask where to save an exported report; returns '' if cancelled"""
+        # Generate default filename
+        filename = f"{title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        
+        # Ask user for save location
+        return filedialog.asksaveasfilename(
+            initialfile=filename,
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")],
+            title="Save Report As"
+        )
+    
+    def export_course_breakdown(self, breakdown, title):
+        """Export the per-course breakdown to CSV (opens in Excel)"""
+        try:
+            filepath = self.ask_export_path(title)
+            if not filepath:
+                return
+            
+            with open(filepath, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow([title])
+                writer.writerow(["COURSE", "PRODUCT", "TRANSACTIONS", "QTY", "AMOUNT"])
+                for course, count, qty, revenue in breakdown['courses']:
+                    label = course or "(No course)"
+                    for product, p_count, p_qty, p_revenue in breakdown['product_mix'][course]:
+                        writer.writerow([label, product, p_count, p_qty, f"{p_revenue:.2f}"])
+                    writer.writerow([label, "COURSE TOTAL", count, qty, f"{revenue:.2f}"])
+                    writer.writerow([])
+                writer.writerow(["ALL COURSES", "GRAND TOTAL", "", breakdown['total_quantity'], f"{breakdown['total_revenue']:.2f}"])
+            
+            messagebox.showinfo("Success", f"Report exported successfully to:\n{filepath}")
+            
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Failed to export CSV: {str(e)}")
+            
+    def export_or_audit(self, audit, title):
+        """Export the OR number audit to CSV (opens in Excel)"""
+        try:
+            filepath = self.ask_export_path(title)
+            if not filepath:
+                return
+            
+            with open(filepath, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow([title])
+                writer.writerow(["ISSUE", "OR NUMBER", "BUYER", "DATE", "ITEMS"])
+                for or_number, uses in audit['duplicates']:
+                    for buyer_name, date, items in uses:
+                        writer.writerow(["Duplicate", or_number, buyer_name, date, items])
+                for booklet, first, last in audit['gaps']:
+                    writer.writerow(["Skipped", f"{booklet}{first} - {booklet}{last}", "", "", last - first + 1])
+            
+            messagebox.showinfo("Success", f"Report exported successfully to:\n{filepath}")
+            
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Failed to export CSV: {str(e)}")
+            
     def export_to_csv(self, report_data, title):
         """Export report data to CSV file"""
         try:
-            # Generate default filename
-            filename = f"{title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            # Ask user for save location
-            filepath = filedialog.asksaveasfilename(
-                initialfile=filename,
-                defaultextension=".csv",
-                filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")],
-                title="Save Report As"
-            )
+            filepath = self.ask_export_path(title)
             
             if not filepath:
                 return
@@ -8,6 +8,8 @@ from tkinter import ttk, messagebox
 from datetime import datetime
 from tkcalendar import DateEntry
 
+from database.sale_service import Sale, SaleService
+
 
 class TransactionModule:
     """Transaction entry form with validation"""
@@ -15,7 +17,10 @@ class TransactionModule:
     def __init__(self, parent, db_manager):
         self.parent = parent
         self.db = db_manager
+        self.service = SaleService(db_manager)
         self.selected_item_id = None
+        # Items waiting to be saved together under one OR number
+        self.cart = []
         
         # Create main frame
         self.main_frame = tk.Frame(parent, bg="white")
@@ -35,9 +40,37 @@ class TransactionModule:
         )
         title_label.pack(pady=(0, 20))
         
+        # --- Quick entry: type or scan a product code, Enter fills product/size/batch ---
+        quick_frame = tk.Frame(self.main_frame, bg="#f8f9fa", bd=1, relief=tk.SOLID, padx=10, pady=8)
+        quick_frame.pack(fill=tk.X)
+        
+        tk.Label(
+            quick_frame,
+            text="⚡ Product Code:",
+            font=("Arial", 12, "bold"),
+            bg="#f8f9fa"
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.code_entry = tk.Entry(quick_frame, font=("Arial", 12), width=20)
+        self.code_entry.pack(side=tk.LEFT)
+        self.code_entry.bind("<Return>", self.on_code_entered)
+        
+        self.code_hint = tk.Label(
+            quick_frame,
+            text="Type or scan a code and press Enter, then Enter again on Quantity to add to cart",
+            font=("Arial", 9, "italic"),
+            bg="#f8f9fa",
+            fg="#777"
+        )
+        self.code_hint.pack(side=tk.LEFT, padx=10)
+        
+        # Form on the left, cart on the right
+        body_frame = tk.Frame(self.main_frame, bg="white")
+        body_frame.pack(pady=10)
+        
         # Form frame
-        form_frame = tk.Frame(self.main_frame, bg="white")
-        form_frame.pack(pady=10)
+        form_frame = tk.Frame(body_frame, bg="white")
+        form_frame.pack(side=tk.LEFT, anchor="n")
         
         # --- Row 0: Buyer Name ---
         tk.Label(
@@ -54,6 +87,14 @@ class TransactionModule:
         )
         self.buyer_name_entry.grid(row=0, column=1, pady=10, padx=10)
         
+        # Autocomplete from past buyers (most recent first); picking one fills the course
+        self.buyer_popup = None
+        self.buyer_suggestions = []
+        self.buyer_name_entry.bind("<KeyRelease>", self.on_buyer_typed)
+        self.buyer_name_entry.bind("<Down>", self.focus_buyer_suggestions)
+        self.buyer_name_entry.bind("<Escape>", lambda event: self.hide_buyer_suggestions())
+        self.buyer_name_entry.bind("<FocusOut>", lambda event: self.main_frame.after(150, self.hide_buyer_suggestions_unless_focused))
+        
         # --- Row 1: Program/Course (NEW) ---
         tk.Label(
             form_frame,
@@ -155,6 +196,8 @@ class TransactionModule:
         self.quantity_entry.grid(row=5, column=1, pady=10, padx=10)
         # Also recalc when user types directly
         self.quantity_entry.bind("<KeyRelease>", self.calculate_amount)
+        # Enter adds the item to the cart and goes back to the code field
+        self.quantity_entry.bind("<Return>", self.on_quantity_entered)
         
         # --- Row 6: Price ---
         tk.Label(
@@ -190,6 +233,18 @@ class TransactionModule:
         )
         self.amount_entry.grid(row=7, column=1, pady=10, padx=10)
         
+        # Shown while the quantity spans batches priced differently
+        self.amount_hint = tk.Label(
+            form_frame,
+            text="",
+            font=("Arial", 9, "italic"),
+            bg="white",
+            fg="#e67e22",
+            wraplength=180,
+            justify="left"
+        )
+        self.amount_hint.grid(row=7, column=2, sticky="w")
+        
         # --- Row 8: OR Number ---
         tk.Label(
             form_frame,
@@ -204,6 +259,20 @@ class TransactionModule:
             width=35
         )
         self.or_number_entry.grid(row=8, column=1, pady=10, padx=10)
+        self.or_number_entry.bind("<Return>", lambda event: self.save_transaction())
+        self.or_number_entry.bind("<KeyRelease>", self.on_or_number_typed)
+        
+        # Shown while the typed OR number is already on another receipt
+        self.or_hint = tk.Label(
+            form_frame,
+            text="",
+            font=("Arial", 9, "italic"),
+            bg="white",
+            fg="#e74c3c",
+            wraplength=180,
+            justify="left"
+        )
+        self.or_hint.grid(row=8, column=2, sticky="w")
         
         # --- Row 9: Date ---
         # Date (Calendar Picker)
@@ -225,13 +294,71 @@ class TransactionModule:
             showweeknumbers=False
         )
         self.date_entry.grid(row=9, column=1, pady=10, padx=10)
+        self.date_entry.bind("<<DateEntrySelected>>", self.on_date_selected)
+        self.date_entry.bind("<FocusOut>", self.on_date_selected)
+        
+        # --- Cart: several items under one OR number ---
+        cart_frame = tk.LabelFrame(
+            body_frame,
+            text="🛒 Cart (one OR number)",
+            font=("Arial", 11, "bold"),
+            bg="white",
+            padx=10,
+            pady=10
+        )
+        cart_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(20, 0))
+        
+        columns = ("Product", "Size", "Qty", "Amount")
+        self.cart_tree = ttk.Treeview(cart_frame, columns=columns, show="headings", height=12)
+        self.cart_tree.heading("Product", text="Product")
+        self.cart_tree.heading("Size", text="Size")
+        self.cart_tree.heading("Qty", text="Qty")
+        self.cart_tree.heading("Amount", text="Amount (₱)")
+        self.cart_tree.column("Product", width=160, anchor="w")
+        self.cart_tree.column("Size", width=70, anchor="center")
+        self.cart_tree.column("Qty", width=50, anchor="center")
+        self.cart_tree.column("Amount", width=100, anchor="e")
+        self.cart_tree.pack(fill=tk.BOTH, expand=True)
+        
+        self.cart_total_label = tk.Label(
+            cart_frame,
+            text="Cart Total: ₱0.00",
+            font=("Arial", 12, "bold"),
+            bg="white",
+            fg="#800000"
+        )
+        self.cart_total_label.pack(anchor="e", pady=(10, 5))
+        
+        tk.Button(
+            cart_frame,
+            text="➖ Remove Selected",
+            font=("Arial", 10),
+            bg="#e74c3c",
+            fg="white",
+            cursor="hand2",
+            command=self.remove_from_cart
+        ).pack(anchor="e")
         
         # Buttons frame
         button_frame = tk.Frame(self.main_frame, bg="white")
         button_frame.pack(pady=20)
         
+        # Add to cart button
+        cart_btn = tk.Button(
+            button_frame,
+            text="➕ ADD TO CART",
+            font=("Arial", 13, "bold"),
+            bg="#27ae60",  # Green
+            fg="white",
+            padx=30,
+            pady=15,
+            cursor="hand2",
+            command=self.add_to_cart
+        )
+        cart_btn.pack(side=tk.LEFT, padx=10)
+        
         # Save button
-        save_btn = tk.Button(
+        self.save_btn = tk.Button(
             button_frame,
             text="💾 SAVE TRANSACTION",
             font=("Arial", 13, "bold"),
@@ -242,7 +369,7 @@ class TransactionModule:
             cursor="hand2",
             command=self.save_transaction
         )
-        save_btn.pack(side=tk.LEFT, padx=10)
+        self.save_btn.pack(side=tk.LEFT, padx=10)
         
         # Clear button
         clear_btn = tk.Button(
@@ -272,6 +399,116 @@ class TransactionModule:
                 "No products found in inventory. Please add products first."
             )
     
+    def refresh(self):
+        """Reload the product list after inventory changed elsewhere"""
+        self.product_combo['values'] = self.db.get_unique_products()
+        self.service.reload_codes()
+    
+    def on_buyer_typed(self, event=None):
+        """Show past buyers whose name starts with what has been typed"""
+        if event is not None and event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        text = self.buyer_name_entry.get()
+        suggestions = self.db.get_buyer_suggestions(text)
+        if not suggestions or (len(suggestions) == 1 and suggestions[0][0] == text.strip()):
+            self.hide_buyer_suggestions()
+            return
+        self.show_buyer_suggestions(suggestions)
+    
+    def show_buyer_suggestions(self, suggestions):
+        """Show the suggestion list just below the buyer name field"""
+        self.buyer_suggestions = suggestions
+        if self.buyer_popup is None:
+            self.buyer_popup = tk.Toplevel(self.main_frame)
+            self.buyer_popup.overrideredirect(True)
+            self.buyer_list = tk.Listbox(self.buyer_popup, font=("Arial", 11), activestyle="dotbox")
+            self.buyer_list.pack(fill=tk.BOTH, expand=True)
+            self.buyer_list.bind("<ButtonRelease-1>", self.choose_buyer)
+            self.buyer_list.bind("<Return>", self.choose_buyer)
+            self.buyer_list.bind("<Escape>", lambda event: self.hide_buyer_suggestions(refocus=True))
+            self.buyer_list.bind("<FocusOut>", lambda event: self.main_frame.after(150, self.hide_buyer_suggestions_unless_focused))
+        
+        self.buyer_list.delete(0, tk.END)
+        for name, course in suggestions:
+            self.buyer_list.insert(tk.END, f"{name}  ·  {course}" if course else name)
+        self.buyer_list.config(height=len(suggestions))
+        
+        entry = self.buyer_name_entry
+        self.buyer_popup.geometry(f"{entry.winfo_width()}x{self.buyer_list.winfo_reqheight()}"
+                                  f"+{entry.winfo_rootx()}+{entry.winfo_rooty() + entry.winfo_height()}")
+        self.buyer_popup.deiconify()
+        self.buyer_popup.lift()
+    
+    def focus_buyer_suggestions(self, event=None):
+        """Down arrow in the name field moves into the suggestion list"""
+        if self.buyer_popup is not None and self.buyer_popup.winfo_viewable():
+            self.buyer_list.focus_set()
+            self.buyer_list.selection_clear(0, tk.END)
+            self.buyer_list.selection_set(0)
+            self.buyer_list.activate(0)
+        return "break"
+    
+    def choose_buyer(self, event=None):
+        """Fill the buyer name and their last program/course, then go to the product code"""
+        selection = self.buyer_list.curselection()
+        if not selection:
+            return
+        name, course = self.buyer_suggestions[selection[0]]
+        self.buyer_name_entry.delete(0, tk.END)
+        self.buyer_name_entry.insert(0, name)
+        # Course list entries may carry stray spaces ("BSCE ")
+        for value in self.course_combo['values']:
+            if value.strip() == course:
+                self.course_combo.set(value)
+                break
+        self.hide_buyer_suggestions()
+        self.code_entry.focus()
+        return "break"
+    
+    def hide_buyer_suggestions(self, refocus=False):
+        """Close the suggestion list"""
+        if self.buyer_popup is not None:
+            self.buyer_popup.withdraw()
+        if refocus:
+            self.buyer_name_entry.focus()
+    
+    def hide_buyer_suggestions_unless_focused(self):
+        """Close the list when focus left both the name field and the list"""
+        try:
+            focused = self.main_frame.focus_get()
+        except KeyError:
+            # Focus is inside a combobox dropdown
+            focused = None
+        if self.buyer_popup is not None and focused not in (self.buyer_name_entry, self.buyer_list):
+            self.hide_buyer_suggestions()
+    
+    def on_code_entered(self, event=None):
+        """Fill product, size and batch from a typed or scanned code, then go to Quantity"""
+        code = self.code_entry.get()
+        found = self.service.lookup_code(code)
+        if found is None:
+            self.code_hint.config(text=f"Unknown code: {code.strip()}", fg="#e74c3c")
+            self.code_entry.bell()
+            self.code_entry.select_range(0, tk.END)
+            return "break"
+        
+        item_id, product, size, batch = found
+        self.code_hint.config(text=f"{product} ({size}) · Batch {batch}", fg="#27ae60")
+        self.product_combo.set(product)
+        self.on_product_selected()
+        self.size_combo.set(size)
+        self.on_size_selected(preferred_item_id=item_id)
+        self.code_entry.delete(0, tk.END)
+        self.quantity_entry.focus()
+        self.quantity_entry.selection_range(0, tk.END)
+        return "break"
+    
+    def on_quantity_entered(self, event=None):
+        """Enter on Quantity: add the item to the cart and get ready for the next code"""
+        if self.add_to_cart():
+            self.code_entry.focus()
+        return "break"
+    
     def on_product_selected(self, event=None):
         """Handle product selection"""
         product = self.product_combo.get()
@@ -288,26 +525,28 @@ class TransactionModule:
             self.amount_entry.config(state="normal")
             self.amount_entry.delete(0, tk.END)
             self.amount_entry.config(state="readonly")
+            self.amount_hint.config(text="")
     
-    def on_size_selected(self, event=None):
-        """Handle size selection and display stock"""
+    def on_size_selected(self, event=None, preferred_item_id=None):
+        """Handle size selection and display stock (starting from preferred_item_id's batch if given)"""
         product = self.product_combo.get()
         size = self.size_combo.get()
         
         if product and size:
-            # Get first available batch with stock for this product/size
-            product_data = self.db.get_first_available_batch_for_size(product, size)
+            # First available batch with stock for this product/size
+            quote = self.service.quote(product, size, preferred_item_id, as_of=self.date_entry.get())
+            available_stock = quote['available']
             
-            if product_data:
-                # product_data: (item_id, product_name, size, batch, stock, price)
-                item_id, prod_name, prod_size, batch, stock, price = product_data
+            if quote['item_id'] is not None:
+                batch, stock, price = quote['batch'], quote['batch_stock'], quote['price']
                 # remember selected item (batch) for transactions
-                self.selected_item_id = item_id
-                
-                # Update stock label
-                stock_color = "#27ae60" if stock > 10 else "#e74c3c"
+                self.selected_item_id = quote['item_id']
+
+                # A sale may span several batches (FIFO), so show the total across batches
+                stock_color = "#27ae60" if available_stock > 10 else "#e74c3c"
+                batch_note = f"Batch: {batch}" if available_stock == stock else f"from Batch {batch} onwards"
                 self.stock_label.config(
-                    text=f"Available Stock: {stock} (Batch: {batch})",
+                    text=f"Available Stock: {available_stock} ({batch_note})",
                     fg=stock_color
                 )
                 
@@ -326,7 +565,6 @@ class TransactionModule:
             else:
                 # No batch with available stock was found.
                 # If overall available stock for this product/size is zero, show clear red message.
-                available_stock = self.db.get_available_stock(product, size)
                 if available_stock == 0:
                     self.selected_item_id = None
                     self.stock_label.config(text="No available stock left", fg="#e74c3c")
@@ -337,32 +575,52 @@ class TransactionModule:
                     self.amount_entry.config(state="normal")
                     self.amount_entry.delete(0, tk.END)
                     self.amount_entry.config(state="readonly")
+                    self.amount_hint.config(text="")
                 else:
                     # There is stock somewhere but no single batch found (unexpected); show available amount
                     self.selected_item_id = None
                     self.stock_label.config(text=f"Available Stock: {available_stock} (No batch available)", fg="#e74c3c")
     
-    def calculate_amount(self, event=None):
-        """Calculate total amount based on quantity and price"""
+    def on_date_selected(self, event=None):
+        """Re-price the selected batch and the cart for the sale date (a backdated sale gets that day's prices)"""
         try:
-            quantity_text = self.quantity_entry.get()
-            if quantity_text == "":
-                raise ValueError()
-            quantity = int(quantity_text)
-            price_text = self.price_entry.get().replace('₱', '').replace(',', '')
-            
-            if price_text:
-                price = float(price_text)
-                total = quantity * price
-                
-                self.amount_entry.config(state="normal")
-                self.amount_entry.delete(0, tk.END)
-                self.amount_entry.insert(0, f"₱{total:,.2f}")
-                self.amount_entry.config(state="readonly")
+            sale_date = datetime.strptime(self.date_entry.get(), "%Y-%m-%d").date().isoformat()
         except ValueError:
-            self.amount_entry.config(state="normal")
-            self.amount_entry.delete(0, tk.END)
-            self.amount_entry.config(state="readonly")
+            return  # still being typed; validation reports a bad date on save
+        if self.cart:
+            self.service.requote(self.cart, sale_date)
+            self.refresh_cart()
+        if self.selected_item_id is None:
+            return
+        price = self.db.get_price_as_of(self.selected_item_id, sale_date)
+        if price is None:
+            return
+        self.price_entry.config(state="normal")
+        self.price_entry.delete(0, tk.END)
+        self.price_entry.insert(0, f"₱{price:.2f}")
+        self.price_entry.config(state="readonly")
+        self.calculate_amount()
+    
+    def calculate_amount(self, event=None):
+        """Calculate total amount: each batch the quantity is drawn from at its own price"""
+        sale = self.get_sale()
+        total, split = self.service.charge(sale, self.reserved_in_cart(sale))
+        self.amount_entry.config(state="normal")
+        self.amount_entry.delete(0, tk.END)
+        if total is not None:
+            self.amount_entry.insert(0, f"₱{total:,.2f}")
+        self.amount_entry.config(state="readonly")
+        if self.service.mixed_prices(split):
+            parts = " + ".join(f"{qty} × ₱{price:,.2f}" for _, _, qty, price in split)
+            self.amount_hint.config(text=f"Batches at different prices: {parts}")
+        else:
+            self.amount_hint.config(text="")
+    
+    def reserved_in_cart(self, sale, lines=None):
+        """Pieces of the sale's product/size taken by the cart lines (all, or `lines`)"""
+        lines = self.cart if lines is None else lines
+        return sum(int(item.quantity) for item in lines
+                   if (item.product_name, item.size) == (sale.product_name, sale.size))
 
     def _validate_positive_int(self, proposed: str) -> bool:
         """Validate that the Spinbox input is a positive integer or empty during edit."""
@@ -375,92 +633,141 @@ class TransactionModule:
                 return False
         return False
     
+    def get_sale(self):
+        """The sale currently entered on the form"""
+        return Sale(
+            buyer_name=self.buyer_name_entry.get(),
+            program_course=self.course_combo.get(),
+            product_name=self.product_combo.get(),
+            size=self.size_combo.get(),
+            quantity=self.quantity_entry.get(),
+            price=self.price_entry.get(),
+            or_number=self.or_number_entry.get(),
+            date=self.date_entry.get(),
+            item_id=self.selected_item_id
+        )
+    
+    def show_problem(self, problem):
+        """Show a validation/save problem and focus the field it concerns"""
+        field, title, message = problem
+        messagebox.showerror(title, message)
+        widget = {
+            'buyer_name': self.buyer_name_entry,
+            'quantity': self.quantity_entry,
+            'or_number': self.or_number_entry,
+            'date': self.date_entry,
+        }.get(field)
+        if widget is not None:
+            widget.focus()
+    
     def validate_form(self):
         """Validate all form fields"""
-        # Check buyer name
-        if not self.buyer_name_entry.get().strip():
-            messagebox.showerror("Validation Error", "Please enter buyer name")
-            self.buyer_name_entry.focus()
-            return False
-        
-        # Check course/program (Optional but good to have)
-        if not self.course_combo.get().strip():
-            messagebox.showerror("Validation Error", "Please select a Program/Course")
-            return False
-
-        # Check product
-        if not self.product_combo.get():
-            messagebox.showerror("Validation Error", "Please select a product")
+        sale = self.get_sale()
+        problem = self.service.validate(sale)
+        if problem:
+            self.show_problem(problem)
             return False
-        
-        # Check size
-        if not self.size_combo.get():
-            messagebox.showerror("Validation Error", "Please select a size")
-            return False
-        
-        # Check quantity
-        try:
-            quantity = int(self.quantity_entry.get())
-            if quantity <= 0:
-                raise ValueError()
-        except ValueError:
-            messagebox.showerror("Validation Error", "Please enter a valid quantity")
-            self.quantity_entry.focus()
-            return False
-        
-        # Check stock availability
-        product = self.product_combo.get()
-        size = self.size_combo.get()
-        available_stock = self.db.get_available_stock(product, size)
-        
-        if quantity > available_stock:
-            messagebox.showerror(
-                "Insufficient Stock",
-                f"Only {available_stock} items available in stock"
-            )
+        return self.confirm_or_number(sale)
+    
+    def on_or_number_typed(self, event=None):
+        """Warn as soon as the typed OR number turns out to be on another receipt"""
+        if event is not None and event.keysym == "Return":
+            return
+        warning = self.service.or_number_warning(self.get_sale())
+        self.or_hint.config(text=f"⚠ {warning}" if warning else "")
+    
+    def confirm_or_number(self, sale):
+        """Ask before saving under an OR number that is already used; True to go ahead"""
+        warning = self.service.or_number_warning(sale)
+        if not warning:
+            return True
+        if messagebox.askyesno("Duplicate OR Number", f"{warning}.\n\nSave anyway?"):
+            return True
+        self.or_number_entry.focus()
+        return False
+    
+    def add_to_cart(self):
+        """
+        Add the selected product/size/quantity to the cart
+        
+        Returns:
+            bool: True if the item was added
+        """
+        sale = self.get_sale()
+        problem = self.service.validate_line(sale, self.reserved_in_cart(sale))
+        if problem:
+            self.show_problem(problem)
             return False
         
-        # Check OR number
-        if not self.or_number_entry.get().strip():
-            messagebox.showerror("Validation Error", "Please enter OR number")
-            self.or_number_entry.focus()
-            return False
+        self.cart.append(sale)
+        self.refresh_cart()
+        self.clear_item_fields()
+        return True
+    
+    def remove_from_cart(self):
+        """Remove the selected cart line"""
+        selected = self.cart_tree.selection()
+        if not selected:
+            messagebox.showwarning("No Selection", "Please select an item in the cart to remove")
+            return
+        del self.cart[self.cart_tree.index(selected[0])]
+        self.refresh_cart()
+    
+    def refresh_cart(self):
+        """Redraw the cart list, its total and the save button label"""
+        for item in self.cart_tree.get_children():
+            self.cart_tree.delete(item)
+        total = 0.0
+        for index, sale in enumerate(self.cart):
+            amount, _ = self.service.charge(sale, self.reserved_in_cart(sale, self.cart[:index]))
+            total += amount
+            self.cart_tree.insert("", tk.END, values=(sale.product_name, sale.size, sale.quantity, f"₱{amount:,.2f}"))
+        self.cart_total_label.config(text=f"Cart Total: ₱{total:,.2f}")
+        if self.cart:
+            self.save_btn.config(text=f"💾 SAVE RECEIPT ({len(self.cart)} items)")
+        else:
+            self.save_btn.config(text="💾 SAVE TRANSACTION")
+    
+    def save_cart(self):
+        """Save every cart line under the form's buyer, course, OR number and date"""
+        header = self.get_sale()
+        for sale in self.cart:
+            sale.buyer_name = header.buyer_name
+            sale.program_course = header.program_course
+            sale.or_number = header.or_number
+            sale.date = header.date
+        
+        problem = self.service.validate_cart(self.cart)
+        if problem:
+            self.show_problem(problem)
+            return
+        if not self.confirm_or_number(header):
+            return
         
-        # Check date
         try:
-            date_str = self.date_entry.get()
-            datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            messagebox.showerror(
-                "Validation Error",
-                "Please enter a valid date (YYYY-MM-DD)"
-            )
-            self.date_entry.focus()
-            return False
-        
-        return True
+            success, problem = self.service.save_cart(self.cart)
+            if success:
+                messagebox.showinfo(
+                    "Success",
+                    f"Receipt saved successfully! ({len(self.cart)} items)"
+                )
+                self.clear_form()
+            else:
+                self.show_problem(problem)
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
     def save_transaction(self):
-        """Save transaction to database"""
+        """Save transaction to database (the whole cart if it has items)"""
+        if self.cart:
+            self.save_cart()
+            return
+        
         if not self.validate_form():
             return
         
         try:
-            # Get form data
-            buyer_name = self.buyer_name_entry.get().strip()
-            program_course = self.course_combo.get().strip() # Get course
-            product = self.product_combo.get()
-            size = self.size_combo.get()
-            quantity = int(self.quantity_entry.get())
-            amount = float(self.amount_entry.get().replace('₱', '').replace(',', ''))
-            or_number = self.or_number_entry.get().strip()
-            date = self.date_entry.get()
-            
-            # Save to database (Pass program_course)
-            success = self.db.add_transaction(
-                buyer_name, product, size, quantity, amount, or_number, date, program_course, item_id=self.selected_item_id
-            )
-            
+            success, problem = self.service.save(self.get_sale())
             if success:
                 messagebox.showinfo(
                     "Success",
@@ -468,17 +775,12 @@ class TransactionModule:
                 )
                 self.clear_form()
             else:
-                messagebox.showerror(
-                    "Error",
-                    "Failed to save transaction. Please try again."
-                )
+                self.show_problem(problem)
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
-    def clear_form(self):
-        """Clear all form fields"""
-        self.buyer_name_entry.delete(0, tk.END)
-        self.course_combo.set('') # Clear course
+    def clear_item_fields(self):
+        """Clear product, size, quantity, price and amount (keeps buyer, OR and date)"""
         self.product_combo.set('')
         self.size_combo.set('')
         self.size_combo['values'] = []
@@ -494,10 +796,20 @@ class TransactionModule:
         self.amount_entry.config(state="normal")
         self.amount_entry.delete(0, tk.END)
         self.amount_entry.config(state="readonly")
+        self.amount_hint.config(text="")
+        self.stock_label.config(text="Available Stock: --")
+        # clear selected item_id
+        self.selected_item_id = None
+    
+    def clear_form(self):
+        """Clear all form fields and empty the cart"""
+        self.buyer_name_entry.delete(0, tk.END)
+        self.course_combo.set('') # Clear course
+        self.clear_item_fields()
         self.or_number_entry.delete(0, tk.END)
+        self.or_hint.config(text="")
         self.date_entry.delete(0, tk.END)
         self.date_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
-        self.stock_label.config(text="Available Stock: --")
-        self.buyer_name_entry.focus()
-        # clear selected item_id
-        self.selected_item_id = None
\ No newline at end of file
+        self.cart = []
+        self.refresh_cart()
+        self.buyer_name_entry.focus()
\ No newline at end of file